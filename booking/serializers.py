@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.utils import timezone
 
 from .models import Booking, BookingStatusHistory
+from .signals import booking_created
 from service.serializers import ProfessionalServiceSerializer
 from professional.serializers import ProfessionalRetrieveSerializer
 from customer.serializers import CustomerRetrieveProfileSerializer
@@ -64,7 +65,7 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         service_id = validated_data.pop('service_id')
         service = Service.objects.get(id=service_id)
 
-        customer = self.context['request'].user.customerprofile
+        customer = self.context['request'].user.customer_profile
 
         booking = Booking.objects.create(
             customer=customer,
@@ -81,6 +82,8 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             note='Booking created'
         )
 
+        booking_created.send(sender=Booking, booking=booking)
+
         return booking
 
 
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent with booking=<Booking> once a customer creates a booking
+booking_created = Signal()
+
+# Sent with booking=<Booking>, old_status, new_status after a status change
+booking_status_changed = Signal()
@@ -9,6 +9,7 @@ from rest_framework.decorators import action
 from rest_framework import status
 
 from .models import Booking, BookingStatusHistory
+from .signals import booking_status_changed
 from .filters import MyBookingFilter
 from .serializers import (
     BookingCreateSerializer,
@@ -108,6 +109,13 @@ class BookingViewSet(ModelViewSet):
             note=note
         )
 
+        booking_status_changed.send(
+            sender=Booking,
+            booking=booking,
+            old_status=old_status,
+            new_status=new_status
+        )
+
         return booking
     
     @action(detail=True, methods=["POST"], permission_classes=[IsAuthenticated, CanAcceptBooking])
@@ -1,4 +1,5 @@
 from rest_framework.test import APIClient
+from django.core.cache import cache
 
 import pytest
 from decimal import Decimal
@@ -14,6 +15,14 @@ from payment.models import Payment
 
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached ML tables and counters must not leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
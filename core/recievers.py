@@ -1,10 +1,12 @@
 from django.core.mail import EmailMultiAlternatives
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.conf import settings
 
 from .email_templates import WELCOME_EMAIL_TEMPLATE
 from .signals import otp_verified, create_profile
+from .utils.spatial_index import invalidate_professional_index
 from professional.models import Professional
 from customer.models import CustomerProfile, Cart
 
@@ -37,5 +39,8 @@ def create_user_profile(sender, user, **kwargs):
     if user.role == "customer":
         customer = CustomerProfile.objects.create(user=user)
         Cart.objects.create(customer=customer)
-    
-    
\ No newline at end of file
+
+
+@receiver([post_save, post_delete], sender=Professional)
+def refresh_professional_index(sender, **kwargs):
+    invalidate_professional_index()
@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from decimal import Decimal
+
+from core.utils.location import haversine_distance
+from core.utils.spatial_index import ProfessionalSpatialIndex, get_professional_index
+
+
+@pytest.fixture
+def random_index():
+    rng = np.random.default_rng(7)
+    n = 2000
+    lats = rng.uniform(29, 38, n)
+    lons = rng.uniform(60, 75, n)
+    active = rng.random(n) > 0.3
+    return ProfessionalSpatialIndex(np.arange(n), lats, lons, active), lats, lons, active
+
+
+def test_within_radius_matches_brute_force(random_index):
+    index, lats, lons, active = random_index
+    center = (34.5553, 69.2075)  # Kabul
+
+    ids, distances = index.within_radius(*center, 100)
+
+    expected = {
+        i for i in range(len(lats))
+        if haversine_distance(*center, lats[i], lons[i]) <= 100
+    }
+    assert set(ids.tolist()) == expected
+    assert np.all(np.diff(distances) >= 0)
+
+
+def test_within_radius_active_only(random_index):
+    index, lats, lons, active = random_index
+
+    ids, _ = index.within_radius(34.5553, 69.2075, 200, active_only=True)
+
+    assert len(ids) > 0
+    assert active[ids].all()
+
+
+def test_nearest_matches_brute_force(random_index):
+    index, lats, lons, active = random_index
+    center = (31.0, 65.0)
+
+    ids, distances = index.nearest(*center, 5)
+
+    brute = sorted(range(len(lats)), key=lambda i: haversine_distance(*center, lats[i], lons[i]))
+    assert ids.tolist() == brute[:5]
+
+
+def test_within_radius_wraps_at_the_antimeridian():
+    lats = np.array([-17.0, -17.0, -17.0, 60.0])
+    lons = np.array([179.95, -179.95, 180.0, 0.0])
+    index = ProfessionalSpatialIndex(np.arange(4), lats, lons, np.ones(4, dtype=bool))
+
+    for lon in (179.9, -179.9, 180.0):
+        ids, _ = index.within_radius(-17.0, lon, 50)
+        assert sorted(ids.tolist()) == [0, 1, 2]
+
+
+def test_within_radius_near_a_pole_covers_every_longitude():
+    lats = np.array([89.9, 89.9])
+    lons = np.array([-90.0, 90.0])
+    index = ProfessionalSpatialIndex(np.arange(2), lats, lons, np.ones(2, dtype=bool))
+
+    ids, _ = index.within_radius(89.95, 0.0, 50)
+    assert sorted(ids.tolist()) == [0, 1]
+
+
+@pytest.mark.django_db
+def test_index_is_refreshed_when_professional_moves(professional):
+    assert len(get_professional_index()) == 0
+
+    professional.latitude = Decimal('34.555300')
+    professional.longitude = Decimal('69.207500')
+    professional.save()
+
+    ids, distances = get_professional_index().within_radius(34.56, 69.21, 5)
+    assert ids.tolist() == [professional.id]
@@ -86,4 +86,13 @@ def get_bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, f
     min_lon = lon - lon_delta
     max_lon = lon + lon_delta
 
-    return (min_lat, max_lat, min_lon, max_lon)
\ No newline at end of file
+    return (min_lat, max_lat, min_lon, max_lon)
+
+def normalize_city_key(city: Optional[str]) -> str:
+    """
+    Normalize a free-text city name into a key for grouping and caching,
+    e.g. "  Kabul " and "kabul" both become "kabul".
+    """
+    if not city:
+        return ''
+    return ' '.join(city.split()).casefold()
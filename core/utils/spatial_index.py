@@ -0,0 +1,168 @@
+from typing import Tuple
+from uuid import uuid4
+
+import numpy as np
+from django.core.cache import cache
+
+from .location import get_bounding_box
+
+
+EARTH_RADIUS_KM = 6371.0
+
+# Grid cell size in degrees (~11 km of latitude)
+CELL_SIZE = 0.1
+LON_CELLS = int(round(360 / CELL_SIZE))
+
+VERSION_CACHE_KEY = 'core:professional_index:version'
+
+
+def haversine_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Haversine distance from one point to many, in kilometers.
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _cells(lats, lons):
+    lat_cells = np.floor((np.asarray(lats) + 90) / CELL_SIZE).astype(np.int64)
+    lon_cells = np.floor((np.asarray(lons) + 180) / CELL_SIZE).astype(np.int64)
+    # Longitude wraps around: 180 and -180 are the same column
+    return lat_cells, lon_cells % LON_CELLS
+
+
+def _lon_ranges(min_lat, max_lat, min_lon, max_lon):
+    """
+    Inclusive (first, last) longitude cell ranges covering the box, split
+    in two when it crosses the antimeridian.
+    """
+    lo = int(np.floor((min_lon + 180) / CELL_SIZE))
+    hi = int(np.floor((max_lon + 180) / CELL_SIZE))
+    # Boxes reaching a pole cover every longitude
+    if hi - lo + 1 >= LON_CELLS or min_lat <= -90 or max_lat >= 90:
+        return [(0, LON_CELLS - 1)]
+
+    lo, hi = lo % LON_CELLS, hi % LON_CELLS
+    if lo <= hi:
+        return [(lo, hi)]
+    return [(lo, LON_CELLS - 1), (0, hi)]
+
+
+class ProfessionalSpatialIndex:
+    """
+    Grid index over professional coordinates.
+
+    Points are sorted by grid cell, so a radius query only looks at the
+    cells overlapping the bounding box of the circle and runs the exact
+    Haversine check on those candidates.
+    """
+
+    def __init__(self, ids, lats, lons, active):
+        lat_cells, lon_cells = _cells(lats, lons)
+        keys = lat_cells * LON_CELLS + lon_cells
+        order = np.argsort(keys, kind='stable')
+
+        self.keys = keys[order]
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.active = active[order]
+
+    @classmethod
+    def build(cls):
+        from professional.models import Professional
+
+        rows = list(
+            Professional.objects.filter(
+                latitude__isnull=False,
+                longitude__isnull=False
+            ).values_list('id', 'latitude', 'longitude', 'is_active', 'verification_status')
+        )
+
+        return cls(
+            ids=np.array([r[0] for r in rows], dtype=np.int64),
+            lats=np.array([float(r[1]) for r in rows], dtype=np.float64),
+            lons=np.array([float(r[2]) for r in rows], dtype=np.float64),
+            active=np.array([r[3] and r[4] == 'VERIFIED' for r in rows], dtype=bool),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, lat, lon, radius_km):
+        min_lat, max_lat, min_lon, max_lon = get_bounding_box(lat, lon, radius_km)
+        lat_lo, lat_hi = _cells([min_lat, max_lat], [0, 0])[0]
+
+        rows = np.arange(max(lat_lo, 0), lat_hi + 1)
+        starts, ends = [], []
+        for lon_lo, lon_hi in _lon_ranges(min_lat, max_lat, min_lon, max_lon):
+            starts.append(np.searchsorted(self.keys, rows * LON_CELLS + lon_lo, side='left'))
+            ends.append(np.searchsorted(self.keys, rows * LON_CELLS + lon_hi, side='right'))
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+
+        lengths = ends - starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+    def within_radius(self, lat: float, lon: float, radius_km: float,
+                      active_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Professionals within radius_km of a point.
+
+        Returns:
+            (professional ids, distances in km), nearest first
+        """
+        idx = self._candidates(lat, lon, radius_km)
+        if active_only:
+            idx = idx[self.active[idx]]
+
+        distances = haversine_distances(lat, lon, self.lats[idx], self.lons[idx])
+        keep = distances <= radius_km
+        idx, distances = idx[keep], distances[keep]
+
+        order = np.argsort(distances, kind='stable')
+        return self.ids[idx[order]], distances[order]
+
+    def nearest(self, lat: float, lon: float, k: int,
+                active_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k professionals closest to a point.
+
+        Grows the search radius until k points are found inside it, so
+        the result is exact without scanning the whole index.
+        """
+        radius_km = CELL_SIZE * 111
+        while True:
+            ids, distances = self.within_radius(lat, lon, radius_km, active_only)
+            if len(ids) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                return ids[:k], distances[:k]
+            radius_km *= 2
+
+
+_index = None
+_index_version = None
+
+
+def get_professional_index() -> ProfessionalSpatialIndex:
+    """This worker's index, rebuilt if a professional changed since it was built."""
+    global _index, _index_version
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+
+    if _index is None or version != _index_version:
+        _index = ProfessionalSpatialIndex.build()
+        _index_version = version
+
+    return _index
+
+
+def invalidate_professional_index():
+    """Mark every worker's index as stale."""
+    cache.set(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
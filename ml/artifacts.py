@@ -0,0 +1,150 @@
+"""
+Versioned on-disk store for precomputed ML arrays.
+
+A published artifact is a directory of .npy files plus metadata.json:
+
+    <ARTIFACT_DIR>/<name>/<version>/*.npy
+    <ARTIFACT_DIR>/<name>/<version>/metadata.json
+    <ARTIFACT_DIR>/<name>/CURRENT           (the live version)
+
+publish_artifact() writes a new version into a temporary directory, renames
+it into place and then replaces CURRENT, so readers only ever see complete
+versions. Workers open arrays with numpy.load(mmap_mode='r'), which lets
+every process on the host share the same pages, and re-read CURRENT at most
+every ARTIFACT_CHECK_INTERVAL seconds to pick up new versions.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from uuid import uuid4
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .conf import ml_setting
+
+
+CURRENT = 'CURRENT'
+METADATA = 'metadata.json'
+
+
+def artifact_root():
+    return ml_setting('ARTIFACT_DIR') or os.path.join(settings.BASE_DIR, 'ml_artifacts')
+
+
+class Artifact:
+    """One loaded version: metadata and memory-mapped arrays."""
+
+    def __init__(self, name, version, path):
+        self.name = name
+        self.version = version
+
+        with open(os.path.join(path, METADATA)) as f:
+            self.metadata = json.load(f)
+
+        # Open every array now: pruning may remove the files later, but
+        # open mappings stay valid
+        self.arrays = {
+            array: np.load(os.path.join(path, f'{array}.npy'), mmap_mode='r')
+            for array in self.metadata['arrays']
+        }
+
+    def __getitem__(self, array):
+        return self.arrays[array]
+
+
+def publish_artifact(name, arrays, metadata=None):
+    """
+    Write `arrays` ({array_name: ndarray}) as a new version of `name` and
+    make it current. Returns the version string.
+    """
+    directory = os.path.join(artifact_root(), name)
+    os.makedirs(directory, exist_ok=True)
+
+    version = f"{timezone.now():%Y%m%dT%H%M%S%f}-{uuid4().hex[:8]}"
+    staging = os.path.join(directory, f'.staging-{version}')
+    os.makedirs(staging)
+
+    for array, values in arrays.items():
+        np.save(os.path.join(staging, f'{array}.npy'), np.ascontiguousarray(values))
+    with open(os.path.join(staging, METADATA), 'w') as f:
+        json.dump({
+            **(metadata or {}),
+            'name': name,
+            'version': version,
+            'created_at': timezone.now().isoformat(),
+            'arrays': sorted(arrays),
+        }, f)
+
+    os.rename(staging, os.path.join(directory, version))
+
+    pointer = os.path.join(directory, f'.{CURRENT}-{version}')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, CURRENT))
+    # This process serves its own version right away
+    _loaded.pop(name, None)
+
+    _prune(directory, keep=ml_setting('ARTIFACT_KEEP_VERSIONS'))
+    return version
+
+
+def _prune(directory, keep):
+    versions = sorted(
+        entry for entry in os.listdir(directory)
+        if not entry.startswith('.') and entry != CURRENT
+    )
+    for version in versions[:-keep]:
+        shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
+
+
+def current_version(name):
+    """The published version of `name`, or None."""
+    try:
+        with open(os.path.join(artifact_root(), name, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# name -> (Artifact or None, monotonic time CURRENT was last read)
+_loaded = {}
+_lock = threading.Lock()
+
+
+def get_artifact(name):
+    """
+    This process's copy of the current version of `name`, or None if it has
+    never been published.
+    """
+    artifact, checked_at = _loaded.get(name, (None, None))
+    if checked_at is not None and time.monotonic() - checked_at < ml_setting('ARTIFACT_CHECK_INTERVAL'):
+        return artifact
+
+    with _lock:
+        artifact, checked_at = _loaded.get(name, (None, None))
+        version = current_version(name)
+        if version is not None and (artifact is None or artifact.version != version):
+            artifact = Artifact(name, version, os.path.join(artifact_root(), name, version))
+        elif version is None:
+            artifact = None
+        _loaded[name] = (artifact, time.monotonic())
+
+    return artifact
+
+
+def loaded_versions():
+    """{name: version} of the artifacts this process is serving."""
+    return {
+        name: artifact.version
+        for name, (artifact, _) in list(_loaded.items())
+        if artifact is not None
+    }
+
+
+def reset_artifacts():
+    """Forget loaded artifacts so the next get_artifact() re-reads CURRENT."""
+    _loaded.clear()
@@ -0,0 +1,262 @@
+"""
+Trained cancellation risk model.
+
+CancellationRiskPredictor scores a booking from six factors (customer and
+professional history, lead time, price deviation, first-time pairing and
+category rate, see risk_features()). Without a trained model the score is
+a hand-weighted sum of the factors. train_cancellation_model() exports the
+same factors for every finished booking, with its history as it stood
+when the booking was created, fits a NumPy logistic regression on whether it
+was cancelled, and publishes the weights as the `cancellation_model`
+artifact (see ml/artifacts.py). Scoring is one matrix product for any
+number of bookings.
+"""
+import numpy as np
+from django.db.models import F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from booking.models import Booking
+from .artifacts import get_artifact, publish_artifact
+from .conf import ml_setting
+
+
+ARTIFACT_NAME = 'cancellation_model'
+
+FEATURES = (
+    'customer_history',
+    'professional_history',
+    'lead_time',
+    'price_deviation',
+    'first_time',
+    'category_rate',
+)
+# Used until a model has been trained
+HAND_WEIGHTS = np.array([0.25, 0.20, 0.15, 0.15, 0.10, 0.15])
+
+FINISHED_STATUSES = ('COMPLETED', 'CANCELLED', 'REJECTED')
+
+
+def risk_features(customer_total, customer_cancelled, professional_total, professional_issues,
+                  category_total, category_cancelled, days_until, price, avg_price, completed_pairings):
+    """
+    The bookings x FEATURES matrix of risk factors, from per-booking arrays
+    of history counts, lead time in days, price, the customer's average
+    completed price (0 if none) and completed bookings with the professional.
+    """
+    customer_total, professional_total, category_total = (
+        np.asarray(total, dtype=np.float64)
+        for total in (customer_total, professional_total, category_total)
+    )
+    days_until = np.asarray(days_until)
+    price = np.asarray(price, dtype=np.float64)
+    avg_price = np.asarray(avg_price, dtype=np.float64)
+
+    # Rates fall back to a default without enough history
+    customer = np.where(
+        customer_total < 3, 0.2, np.divide(customer_cancelled, np.maximum(customer_total, 1))
+    )
+    professional = np.where(
+        professional_total < 5, 0.15, np.divide(professional_issues, np.maximum(professional_total, 1))
+    )
+    category = np.where(
+        category_total < 10, 0.15, np.divide(category_cancelled, np.maximum(category_total, 1))
+    )
+
+    # Same day, within 3 days, more than 30 days out, otherwise
+    lead_time = np.select([days_until < 1, days_until < 3, days_until > 30], [0.4, 0.2, 0.3], 0.1)
+
+    has_average = avg_price > 0
+    deviation = np.abs(price - avg_price) / np.where(has_average, avg_price, 1.0)
+    price_deviation = np.where(
+        has_average, np.select([deviation > 1.0, deviation > 0.5], [0.4, 0.3], 0.1), 0.1
+    )
+
+    first_time = np.where(np.asarray(completed_pairings) > 0, 0.0, 0.3)
+
+    return np.column_stack([customer, professional, lead_time, price_deviation, first_time, category])
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+def predict_cancellation(features):
+    """Risk score (0.0 to 1.0) for every row of the feature matrix."""
+    features = np.asarray(features, dtype=np.float64)
+    model = get_artifact(ARTIFACT_NAME)
+    if model is None:
+        return features @ HAND_WEIGHTS
+    return _sigmoid(features @ model['weights'] + model['intercept'][0])
+
+
+def fit_logistic_regression(features, labels, l2=1.0, iterations=50):
+    """
+    L2-regularized logistic regression by Newton's method (the intercept
+    is not regularized). Returns (weights, intercept).
+    """
+    design = np.column_stack([np.ones(len(features)), features])
+    labels = np.asarray(labels, dtype=np.float64)
+    penalty = np.diag([1e-6] + [l2] * (design.shape[1] - 1))
+    beta = np.zeros(design.shape[1])
+
+    for _ in range(iterations):
+        p = _sigmoid(design @ beta)
+        gradient = design.T @ (p - labels) + penalty @ beta
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + penalty
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+
+    return beta[1:], beta[0]
+
+
+def _earlier(subject_ids, values):
+    """
+    Sum of `values` over the earlier rows sharing each row's subject, for
+    rows in creation order.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(subject_ids, kind='stable')
+    subjects = subject_ids[order]
+    running = np.cumsum(values[order]) - values[order]
+
+    # Subtract the running total at the first row of each subject
+    starts = np.r_[True, subjects[1:] != subjects[:-1]]
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+
+    earlier = np.empty(len(order))
+    earlier[order] = running - running[first]
+    return earlier
+
+
+def _resolved_before(subject_ids, values, resolved_ats, created_ats):
+    """
+    Sum of `values` over the rows sharing each row's subject that were
+    resolved before the row was created.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+
+    # Resolutions and lookups in one time-ordered sequence per subject; at
+    # equal times the lookup comes first, so it only sees earlier ones
+    subjects = np.r_[subject_ids, subject_ids]
+    times = np.r_[resolved_ats, created_ats]
+    is_resolution = np.r_[np.ones(count, dtype=bool), np.zeros(count, dtype=bool)]
+    order = np.lexsort((is_resolution, times, subjects))
+
+    amounts = np.r_[values, np.zeros(count)][order]
+    running = np.cumsum(amounts) - amounts
+    sorted_subjects = subjects[order]
+    starts = np.r_[True, sorted_subjects[1:] != sorted_subjects[:-1]]
+    first = np.maximum.accumulate(np.where(starts, np.arange(2 * count), 0))
+
+    before = np.empty(2 * count)
+    before[order] = running - running[first]
+    return before[count:]
+
+
+def training_data():
+    """
+    (features, labels) for every finished booking: the risk factors as
+    they would have been at booking time, and whether it was cancelled.
+
+    Totals count the bookings created before the booking. Outcomes count
+    only the bookings resolved before it was created, at the time of the
+    status change to their current status (or their last update when there
+    is no status history), and lead time is counted from when the booking
+    was created.
+    """
+    rows = list(Booking.objects.annotate(
+        resolved_at=Coalesce(
+            Max('status_history__created_at', filter=Q(status_history__to_status=F('status'))),
+            'updated_at'
+        )
+    ).values_list(
+        'customer_id', 'customer__user_id', 'professional_id', 'professional__user_id',
+        'service__category_id', 'status', 'cancelled_by_id', 'scheduled_date',
+        'created_at', 'resolved_at', 'estimated_price'
+    ).order_by('created_at', 'id'))
+    if not rows:
+        return np.zeros((0, len(FEATURES))), np.zeros(0)
+
+    (customers, customer_users, professionals, professional_users, categories,
+     statuses, cancelled_by, scheduled_dates, created_ats, resolved_ats, prices) = zip(*rows)
+
+    customers = np.array(customers, dtype=np.int64)
+    professionals = np.array(professionals, dtype=np.int64)
+    categories = np.array(categories, dtype=np.int64)
+    statuses = np.array(statuses)
+    cancelled_by = np.array([user or 0 for user in cancelled_by], dtype=np.int64)
+    prices = np.array([float(price) for price in prices])
+    ones = np.ones(len(rows))
+    created = np.array([moment.timestamp() for moment in created_ats])
+    resolved = np.array([moment.timestamp() for moment in resolved_ats])
+
+    def resolved_before(subject_ids, values):
+        return _resolved_before(subject_ids, values, resolved, created)
+
+    cancelled = statuses == 'CANCELLED'
+    completed = statuses == 'COMPLETED'
+    by_customer = cancelled & (cancelled_by == np.array(customer_users, dtype=np.int64))
+    professional_issue = (statuses == 'REJECTED') | (
+        cancelled & (cancelled_by == np.array(professional_users, dtype=np.int64))
+    )
+
+    completed_count = resolved_before(customers, completed)
+    completed_value = resolved_before(customers, prices * completed)
+    avg_price = np.divide(
+        completed_value, completed_count, out=np.zeros(len(rows)), where=completed_count > 0
+    )
+
+    pairs = customers * (professionals.max() + 1) + professionals
+    completed_pairings = resolved_before(pairs, completed)
+
+    features = risk_features(
+        customer_total=_earlier(customers, ones),
+        customer_cancelled=resolved_before(customers, by_customer),
+        professional_total=_earlier(professionals, ones),
+        professional_issues=resolved_before(professionals, professional_issue),
+        category_total=_earlier(categories, ones),
+        category_cancelled=resolved_before(categories, cancelled),
+        days_until=np.array([
+            (scheduled - timezone.localdate(created)).days
+            for scheduled, created in zip(scheduled_dates, created_ats)
+        ]),
+        price=prices,
+        avg_price=avg_price,
+        completed_pairings=completed_pairings,
+    )
+
+    finished = np.isin(statuses, FINISHED_STATUSES)
+    return features[finished], cancelled[finished].astype(np.float64)
+
+
+def train_cancellation_model():
+    """
+    Fit the model on finished bookings and publish it. Returns
+    (version, metadata); version is None when there are fewer than
+    CANCELLATION_MODEL_MIN_SAMPLES bookings or only one outcome.
+    """
+    features, labels = training_data()
+    metadata = {
+        'features': list(FEATURES),
+        'samples': len(labels),
+        'cancelled': int(labels.sum()),
+    }
+    if len(labels) < ml_setting('CANCELLATION_MODEL_MIN_SAMPLES') or labels.min() == labels.max():
+        return None, metadata
+
+    weights, intercept = fit_logistic_regression(
+        features, labels, l2=ml_setting('CANCELLATION_MODEL_L2')
+    )
+    p = np.clip(_sigmoid(features @ weights + intercept), 1e-12, 1 - 1e-12)
+    metadata['log_loss'] = round(float(-np.mean(labels * np.log(p) + (1 - labels) * np.log(1 - p))), 4)
+
+    version = publish_artifact(
+        ARTIFACT_NAME,
+        {'weights': weights, 'intercept': np.array([intercept])},
+        metadata
+    )
+    return version, metadata
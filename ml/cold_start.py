@@ -0,0 +1,128 @@
+"""
+Fallback recommendations for customers without history.
+
+rebuild_cold_start_lists() ranks the active services for every combination
+of professional city and professional language (plus "any" for each), by
+recent bookings in that city (the ServiceTrendBucket counts, decayed as in
+ml/trending.py) and professional rating, and stores the top
+COLD_START_TOP_N of each in ColdStartList. The engine serves these lists
+directly to a customer with no bookings, no coordinates and no tracked
+interactions, instead of running strategies that would find nothing.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from core.utils.location import normalize_city_key
+from service.models import Service
+from .conf import ml_setting
+from .models import ColdStartList, ServiceTrendBucket
+
+
+# Score components (sum to 1.0)
+BOOKINGS_WEIGHT = 0.6
+RATING_WEIGHT = 0.4
+
+
+def _decayed_bookings(service_ids):
+    """{city_key: decayed bookings per service}, '' being every city."""
+    today = timezone.localdate()
+    rows = ServiceTrendBucket.objects.filter(
+        day__gt=today - timedelta(days=ml_setting('TRENDING_WINDOW_DAYS')),
+        bookings__gt=0
+    ).values_list('service_id', 'city_key', 'day', 'bookings')
+
+    bookings = {'': np.zeros(len(service_ids))}
+    for service_id, city_key, day, count in rows.iterator():
+        position = np.searchsorted(service_ids, service_id)
+        if position == len(service_ids) or service_ids[position] != service_id:
+            continue
+        decayed = count * 0.5 ** ((today - day).days / ml_setting('TRENDING_HALF_LIFE_DAYS'))
+        bookings.setdefault(city_key, np.zeros(len(service_ids)))[position] += decayed
+        bookings[''][position] += decayed
+    return bookings
+
+
+def rebuild_cold_start_lists():
+    """Recompute every cold start list. Returns the number of lists written."""
+    rows = list(
+        Service.objects.filter(
+            is_active=True,
+            professional__is_active=True,
+            professional__verification_status='VERIFIED'
+        ).order_by('id').values_list(
+            'id', 'professional__city',
+            'professional__preferred_language', 'professional__avg_rating'
+        )
+    )
+
+    service_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    cities = np.array([normalize_city_key(r[1]) for r in rows], dtype=object)
+    languages = np.array([r[2] or '' for r in rows], dtype=object)
+    ratings = np.array([r[3] or 0.0 for r in rows], dtype=np.float64)
+
+    bookings = _decayed_bookings(service_ids)
+    top_n = ml_setting('COLD_START_TOP_N')
+
+    # Positions of the services in each city, with '' for any city
+    groups = {}
+    for position, city_key in enumerate(cities):
+        for key in {city_key, ''}:
+            groups.setdefault(key, []).append(position)
+
+    lists = []
+    for city_key, positions in groups.items():
+        positions = np.array(positions, dtype=np.int64)
+        counts = bookings.get(city_key, bookings[''])
+
+        # The whole group for any language, then one slice per language
+        by_language = np.argsort(languages[positions], kind='stable')
+        positions = positions[by_language]
+        slice_languages, starts = np.unique(languages[positions], return_index=True)
+        slices = [('', positions)] + [
+            (language, candidates)
+            for language, candidates in zip(slice_languages, np.split(positions, starts[1:]))
+            if language
+        ]
+
+        for language, candidates in slices:
+            scores = (
+                BOOKINGS_WEIGHT * counts[candidates] / max(counts[candidates].max(), 1e-9) +
+                RATING_WEIGHT * ratings[candidates] / 5.0
+            )
+            # Ties keep service id order
+            top = candidates[np.lexsort((candidates, -scores))[:top_n]]
+
+            lists.append(ColdStartList(
+                city_key=city_key, language=language, services=service_ids[top].tolist()
+            ))
+
+    with transaction.atomic():
+        ColdStartList.objects.all().delete()
+        ColdStartList.objects.bulk_create(lists, batch_size=1000)
+
+    return len(lists)
+
+
+def cold_start_services(city=None, language=None):
+    """
+    The most specific stored list for the city and language, as service ids:
+    city and language, then city only, then language only, then any.
+    """
+    city_key = normalize_city_key(city)
+    language = language or ''
+
+    lists = dict(
+        ((row_city, row_language), services)
+        for row_city, row_language, services in ColdStartList.objects.filter(
+            city_key__in={city_key, ''},
+            language__in={language, ''}
+        ).values_list('city_key', 'language', 'services')
+    )
+
+    for key in ((city_key, language), (city_key, ''), ('', language), ('', '')):
+        if lists.get(key):
+            return lists[key]
+    return []
@@ -0,0 +1,59 @@
+from django.conf import settings
+
+
+# Defaults for settings.ML_SETTINGS, see ml/README.md
+DEFAULTS = {
+    'SIMILARITY_THRESHOLD': 0.3,
+    'SIMILARITY_TOP_K': 20,
+    'INTERACTION_MATRIX_TTL': 900,  # seconds
+    'RECOMMENDATION_CACHE_TIMEOUT': 3600,  # seconds
+    'PROFESSIONAL_SCORE_WEIGHTS': {
+        'rating': 0.4,
+        'completion_rate': 0.3,
+        'response_time': 0.2,
+        'experience': 0.05,
+        'consistency': 0.05,
+    },
+    'TRENDING_HALF_LIFE_DAYS': 7,
+    'TRENDING_WINDOW_DAYS': 30,
+    'TRENDING_TOP_N': 50,
+    'TRENDING_CACHE_TIMEOUT': 300,  # seconds
+    'INTERACTION_BATCH_MAX': 500,  # events per ingestion request
+    'INTERACTION_MAX_LAG': 3600,  # seconds an event's occurred_at may be in the past
+    'INTERACTION_FLUSH_SIZE': 500,
+    'INTERACTION_FLUSH_INTERVAL': 2.0,  # seconds
+    'INTERACTION_BUFFER_LIMIT': 50000,
+    'INTERACTION_BACKGROUND_FLUSH': True,
+    'INTERACTION_RAW_RETENTION_DAYS': 30,
+    'INTERACTION_ROLLUP_RETENTION_DAYS': 365,
+    'ARTIFACT_DIR': None,  # default: <BASE_DIR>/ml_artifacts
+    'ARTIFACT_CHECK_INTERVAL': 5,  # seconds
+    'ARTIFACT_KEEP_VERSIONS': 3,
+    'CANDIDATE_LIMIT': 200,  # candidates kept per strategy
+    'COVISITATION_HALF_LIFE_DAYS': 7,
+    'COVISITATION_TOP_K': 20,
+    'COVISITATION_SESSION_HOURS': 24,  # look-back for a session's earlier views
+    'COVISITATION_WINDOW_DAYS': 30,  # first run / rebuild
+    'COVISITATION_LAG_SECONDS': 60,
+    'COLD_START_TOP_N': 50,
+    'MATERIALIZED_TOP_N': 20,
+    'RISK_BATCH_MAX': 500,  # bookings per batch risk request
+    'CANCELLATION_MODEL_MIN_SAMPLES': 50,  # finished bookings needed to train
+    'CANCELLATION_MODEL_L2': 1.0,
+    'FORECAST_HISTORY_DAYS': 112,  # days of history each refit reads
+    'FORECAST_BATCH_MAX': 500,  # series per batch forecast request
+    'PEAK_HOURS_CACHE_TIMEOUT': 900,  # seconds
+    'STRATEGY_EXECUTION': 'serial',  # or 'threads'
+    'STRATEGY_WORKERS': 8,
+    'STRATEGY_TIMEOUTS': {  # seconds, only enforced with 'threads'
+        'collaborative': 0.5,
+        'content': 0.5,
+        'location': 0.5,
+        'popularity': 0.5,
+    },
+}
+
+
+def ml_setting(name):
+    """Read an ML setting, falling back to the app default."""
+    return getattr(settings, 'ML_SETTINGS', {}).get(name, DEFAULTS[name])
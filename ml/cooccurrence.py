@@ -0,0 +1,180 @@
+"""
+Category x category co-booking matrix.
+
+CategoryCoOccurrence holds, for every pair of categories, how many customers
+have completed bookings in both. It is rebuilt in bulk by
+rebuild_category_cooccurrence() and bumped incrementally when a customer
+completes their first booking in a category (see ml/recievers.py).
+
+Categories are few, so each worker keeps the matrix as a dense array and
+reloads it when the shared version key in the cache changes.
+"""
+from uuid import uuid4
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from booking.models import Booking
+from professional.models import ServiceCategory
+from .models import CategoryCoOccurrence
+
+
+VERSION_CACHE_KEY = 'ml:category_cooccurrence:version'
+
+CUSTOMER_CHUNK_SIZE = 10000
+
+
+class CategoryCoOccurrenceMatrix:
+    """Dense co-booking counts, rows and columns ordered by category id."""
+
+    def __init__(self, ids, counts):
+        self.ids = ids
+        self.counts = counts
+
+    @classmethod
+    def build(cls):
+        ids = np.array(
+            ServiceCategory.objects.order_by('id').values_list('id', flat=True),
+            dtype=np.int64
+        )
+        counts = np.zeros((len(ids), len(ids)), dtype=np.float64)
+
+        rows = list(CategoryCoOccurrence.objects.values_list(
+            'category_a_id', 'category_b_id', 'customers'
+        ))
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            counts[np.searchsorted(ids, rows[:, 0]), np.searchsorted(ids, rows[:, 1])] = rows[:, 2]
+
+        return cls(ids, counts)
+
+    def positions(self, category_ids):
+        """Positions of category_ids in the matrix, dropping unknown ones."""
+        category_ids = np.asarray(list(category_ids), dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.array([], dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.ids, category_ids), len(self.ids) - 1)
+        return pos[self.ids[pos] == category_ids]
+
+    def recommend(self, category_ids, limit=5):
+        """
+        Categories most often co-booked with `category_ids`, as
+        [(category_id, score)] with scores normalized to the best one.
+        """
+        rows = self.positions(category_ids)
+        if len(rows) == 0:
+            return []
+
+        scores = self.counts[rows].sum(axis=0)
+        scores[rows] = 0
+
+        top = [i for i in np.argsort(-scores, kind='stable')[:limit] if scores[i] > 0]
+        if not top:
+            return []
+        best = scores[top[0]]
+        return [(int(self.ids[i]), float(scores[i] / best)) for i in top]
+
+
+def rebuild_category_cooccurrence():
+    """Recompute every pair from completed bookings. Returns the pair count."""
+    ids = np.array(
+        ServiceCategory.objects.order_by('id').values_list('id', flat=True),
+        dtype=np.int64
+    )
+    pairs = np.array(list(
+        Booking.objects.filter(status='COMPLETED').values_list(
+            'customer_id', 'service__category_id'
+        ).distinct().order_by()
+    ), dtype=np.int64).reshape(-1, 2)
+
+    counts = np.zeros((len(ids), len(ids)), dtype=np.int64)
+    if len(pairs):
+        customers, customer_rows = np.unique(pairs[:, 0], return_inverse=True)
+        columns = np.searchsorted(ids, pairs[:, 1])
+
+        # X^T X over a customer x category indicator matrix, a chunk of customers at a time
+        for start in range(0, len(customers), CUSTOMER_CHUNK_SIZE):
+            in_chunk = (customer_rows >= start) & (customer_rows < start + CUSTOMER_CHUNK_SIZE)
+            indicator = np.zeros((min(CUSTOMER_CHUNK_SIZE, len(customers) - start), len(ids)), dtype=np.int64)
+            indicator[customer_rows[in_chunk] - start, columns[in_chunk]] = 1
+            counts += indicator.T @ indicator
+
+    a, b = np.nonzero(counts)
+    rows = [
+        CategoryCoOccurrence(
+            category_a_id=int(ids[i]), category_b_id=int(ids[j]), customers=int(counts[i, j])
+        )
+        for i, j in zip(a, b)
+    ]
+
+    with transaction.atomic():
+        CategoryCoOccurrence.objects.all().delete()
+        CategoryCoOccurrence.objects.bulk_create(rows, batch_size=1000)
+
+    invalidate_category_cooccurrence()
+    return len(rows)
+
+
+def record_completed_booking(booking):
+    """
+    Count the booking's customer towards their categories' pairs, if this is
+    their first completed booking in the booking's category.
+    """
+    category_id = booking.service.category_id
+    completed = dict(
+        Booking.objects.filter(
+            customer_id=booking.customer_id, status='COMPLETED'
+        ).values('service__category_id').annotate(
+            count=Count('id')
+        ).order_by().values_list('service__category_id', 'count')
+    )
+    if completed.get(category_id) != 1:
+        return
+
+    # (category, other) and (other, category) for every category the customer
+    # has completed, including the diagonal once
+    others = list(completed)
+    pairs = {(category_id, other) for other in others} | {(other, category_id) for other in others}
+
+    pair_filter = (
+        Q(category_a_id=category_id, category_b_id__in=others) |
+        Q(category_b_id=category_id, category_a_id__in=others)
+    )
+    with transaction.atomic():
+        existing = set(CategoryCoOccurrence.objects.filter(pair_filter).values_list(
+            'category_a_id', 'category_b_id'
+        ))
+        CategoryCoOccurrence.objects.filter(pair_filter).update(customers=F('customers') + 1)
+        CategoryCoOccurrence.objects.bulk_create([
+            CategoryCoOccurrence(category_a_id=a, category_b_id=b, customers=1)
+            for a, b in pairs - existing
+        ])
+
+    invalidate_category_cooccurrence()
+
+
+_matrix = None
+_matrix_version = None
+
+
+def get_category_cooccurrence():
+    """This worker's co-occurrence matrix, reloaded if another process changed it."""
+    global _matrix, _matrix_version
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+
+    if _matrix is None or version != _matrix_version:
+        _matrix = CategoryCoOccurrenceMatrix.build()
+        _matrix_version = version
+
+    return _matrix
+
+
+def invalidate_category_cooccurrence():
+    """Mark every worker's co-occurrence matrix as stale."""
+    cache.set(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
@@ -0,0 +1,230 @@
+"""
+"Customers also viewed" from session co-visitation.
+
+update_covisitation() reads the service VIEW events (UserInteraction and
+InteractionEvent rows with a session id) written since its checkpoint. Each
+newly viewed service in a session is paired once with every service viewed
+before it in that session, looking back COVISITATION_SESSION_HOURS for the
+session's earlier views, so every pair counts once per session.
+
+Decay is applied lazily: an event at time t adds
+2 ** ((t - epoch) / half_life) to the pair's score instead of rewriting
+every stored score. Newer sessions weigh more, and since scores only need
+to be compared per service, old rows never change. When the weights grow
+large the epoch moves forward and all scores are rescaled once.
+
+Only the services whose pairs changed get their CoVisitationList (top
+COVISITATION_TOP_K neighbours) rewritten, so frequent runs stay cheap.
+"""
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from service.models import Service
+from .conf import ml_setting
+from .models import (
+    CoVisitationList,
+    InteractionEvent,
+    PipelineCheckpoint,
+    ServiceCoVisitation,
+    UserInteraction,
+)
+
+
+CHECKPOINT_NAME = 'covisitation'
+EPOCH_NAME = 'covisitation_epoch'
+
+# Rescale once weights pass 2 ** MAX_EXPONENT
+MAX_EXPONENT = 40
+# Pairs whose score falls below this after rescaling are dropped
+MIN_SCORE = 1e-6
+
+
+def _session_views(start, end, sessions=None):
+    """
+    [(session, created_at, service_id)] of service views written in
+    [start, end), where session is (user_id, session_id).
+
+    Events are selected by ingested_at rather than their client-supplied
+    created_at, so a view that arrives late is still read by the next run.
+    UserInteraction rows are stamped when they are written.
+    """
+    interactions = UserInteraction.objects.filter(
+        interaction_type='VIEW',
+        content_type=ContentType.objects.get_for_model(Service),
+        created_at__gte=start, created_at__lt=end
+    ).exclude(session_id='')
+    events = InteractionEvent.objects.filter(
+        event_type=InteractionEvent.VIEW,
+        target_type=InteractionEvent.SERVICE,
+        ingested_at__gte=start, ingested_at__lt=end
+    ).exclude(session_id='')
+
+    if sessions is not None:
+        users = {user_id for user_id, _ in sessions}
+        session_ids = {session_id for _, session_id in sessions}
+        interactions = interactions.filter(user_id__in=users, session_id__in=session_ids)
+        events = events.filter(user_id__in=users, session_id__in=session_ids)
+
+    views = []
+    for queryset in (interactions, events):
+        for user_id, session_id, created_at, service_id in queryset.values_list(
+            'user_id', 'session_id', 'created_at', 'object_id'
+        ).order_by().iterator():
+            session = (user_id, session_id)
+            if sessions is None or session in sessions:
+                views.append((session, created_at, service_id))
+    return views
+
+
+def _checkpoint(name):
+    checkpoint = PipelineCheckpoint.objects.filter(name=name).first()
+    return checkpoint.position if checkpoint else None
+
+
+def _set_checkpoint(name, position):
+    PipelineCheckpoint.objects.update_or_create(name=name, defaults={'position': position})
+
+
+def _epoch(now):
+    """The decay epoch, moved forward (rescaling every score) when needed."""
+    epoch = _checkpoint(EPOCH_NAME)
+    half_life = timedelta(days=ml_setting('COVISITATION_HALF_LIFE_DAYS'))
+
+    if epoch is None:
+        epoch = now
+        _set_checkpoint(EPOCH_NAME, epoch)
+    elif (now - epoch) / half_life > MAX_EXPONENT:
+        factor = 2 ** (-((now - epoch) / half_life))
+        ServiceCoVisitation.objects.update(score=F('score') * factor)
+        ServiceCoVisitation.objects.filter(score__lt=MIN_SCORE).delete()
+        CoVisitationList.objects.all().delete()
+        _refresh_lists(set(
+            ServiceCoVisitation.objects.values_list('service_a_id', flat=True).distinct()
+        ))
+        epoch = now
+        _set_checkpoint(EPOCH_NAME, epoch)
+
+    return epoch, half_life
+
+
+def _pair_increments(new_views, earlier_views, epoch, half_life):
+    """{(service_a, service_b): weight}, both directions."""
+    seen = {}
+    for session, created_at, service_id in earlier_views:
+        seen.setdefault(session, set()).add(service_id)
+
+    increments = {}
+    for session, created_at, service_id in sorted(new_views, key=lambda view: view[1]):
+        services = seen.setdefault(session, set())
+        if service_id in services:
+            continue
+
+        weight = 2 ** ((created_at - epoch) / half_life)
+        for other in services:
+            for pair in ((service_id, other), (other, service_id)):
+                increments[pair] = increments.get(pair, 0) + weight
+        services.add(service_id)
+
+    return increments
+
+
+def _apply_increments(increments):
+    existing = {
+        (pair.service_a_id, pair.service_b_id): pair
+        for pair in ServiceCoVisitation.objects.filter(
+            service_a_id__in={a for a, _ in increments},
+            service_b_id__in={b for _, b in increments}
+        )
+    }
+
+    updated, created = [], []
+    for (a, b), weight in increments.items():
+        pair = existing.get((a, b))
+        if pair is None:
+            created.append(ServiceCoVisitation(service_a_id=a, service_b_id=b, score=weight))
+        else:
+            pair.score += weight
+            updated.append(pair)
+
+    ServiceCoVisitation.objects.bulk_update(updated, ['score'], batch_size=1000)
+    ServiceCoVisitation.objects.bulk_create(created, batch_size=1000)
+
+
+def _refresh_lists(service_ids):
+    """Rewrite the neighbour lists of these services."""
+    top_k = ml_setting('COVISITATION_TOP_K')
+    neighbours = {service_id: [] for service_id in service_ids}
+
+    pairs = ServiceCoVisitation.objects.filter(
+        service_a_id__in=service_ids
+    ).order_by('service_a_id', '-score').values_list('service_a_id', 'service_b_id', 'score')
+    for a, b, score in pairs:
+        if len(neighbours[a]) < top_k:
+            neighbours[a].append((b, score))
+
+    CoVisitationList.objects.bulk_create(
+        [
+            CoVisitationList(
+                service_id=service_id,
+                neighbours=[[b, round(score / top[0][1], 4)] for b, score in top]
+            )
+            for service_id, top in neighbours.items() if top
+        ],
+        update_conflicts=True,
+        unique_fields=['service'],
+        update_fields=['neighbours', 'updated_at'],
+        batch_size=1000
+    )
+
+
+def update_covisitation(now=None):
+    """
+    Fold the views logged since the last run into the co-visitation pairs
+    and refresh the affected neighbour lists. Returns (views, pairs updated).
+
+    Views from the last COVISITATION_LAG_SECONDS are left for the next run,
+    so events still in the ingestion buffer aren't skipped.
+    """
+    now = now or timezone.now()
+    end = now - timedelta(seconds=ml_setting('COVISITATION_LAG_SECONDS'))
+    start = _checkpoint(CHECKPOINT_NAME) or (
+        end - timedelta(days=ml_setting('COVISITATION_WINDOW_DAYS'))
+    )
+    if start >= end:
+        return 0, 0
+
+    new_views = _session_views(start, end)
+    sessions = {session for session, _, _ in new_views}
+    earlier_views = _session_views(
+        start - timedelta(hours=ml_setting('COVISITATION_SESSION_HOURS')), start, sessions
+    ) if sessions else []
+
+    # Ingestion accepts any object id and services can be deleted since
+    existing = set(Service.objects.filter(
+        id__in={service_id for _, _, service_id in new_views + earlier_views}
+    ).values_list('id', flat=True))
+    new_views = [view for view in new_views if view[2] in existing]
+    earlier_views = [view for view in earlier_views if view[2] in existing]
+
+    with transaction.atomic():
+        epoch, half_life = _epoch(now)
+        increments = _pair_increments(new_views, earlier_views, epoch, half_life)
+        if increments:
+            _apply_increments(increments)
+            _refresh_lists({a for a, _ in increments})
+        _set_checkpoint(CHECKPOINT_NAME, end)
+
+    return len(new_views), len(increments)
+
+
+def rebuild_covisitation(now=None):
+    """Drop every pair and list and recount the last COVISITATION_WINDOW_DAYS."""
+    with transaction.atomic():
+        ServiceCoVisitation.objects.all().delete()
+        CoVisitationList.objects.all().delete()
+        PipelineCheckpoint.objects.filter(name__in=[CHECKPOINT_NAME, EPOCH_NAME]).delete()
+    return update_covisitation(now)
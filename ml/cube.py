@@ -0,0 +1,136 @@
+"""
+Daily booking cube for demand analytics.
+
+Every booking adds to the BookingDailyCube row of its scheduled day,
+service category, city and scheduled hour when it is created, and moves
+between the status counts as its status changes (see ml/recievers.py). An
+edit to the booking's day, time or city moves its counts to the new row.
+Completed bookings add their final (or estimated) price to
+completed_revenue. DemandForecaster reads these rows instead of scanning
+the bookings table; rebuild_booking_cube() recreates them from bookings.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour
+
+from booking.models import Booking
+from core.utils.location import normalize_city_key
+from .models import BookingDailyCube
+
+
+# Booking status -> cube count
+STATUS_FIELDS = {
+    'PENDING': 'pending',
+    'ACCEPTED': 'accepted',
+    'REJECTED': 'rejected',
+    'IN_PROGRESS': 'in_progress',
+    'COMPLETED': 'completed',
+    'CANCELLED': 'cancelled',
+}
+
+
+def _revenue(booking):
+    return booking.final_price if booking.final_price is not None else booking.estimated_price
+
+
+def _cell(booking):
+    return {
+        'day': booking.scheduled_date,
+        'category_id': booking.service.category_id,
+        'city_key': normalize_city_key(booking.city),
+        'hour': booking.scheduled_time.hour,
+    }
+
+
+def _add(booking, **deltas):
+    filters = _cell(booking)
+    cells = BookingDailyCube.objects.filter(**filters)
+
+    if cells.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        return
+    try:
+        with transaction.atomic():
+            BookingDailyCube.objects.create(**filters, **deltas)
+    except IntegrityError:
+        # Created concurrently
+        cells.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def _counts(booking):
+    """What the booking adds to its cell."""
+    deltas = {'bookings': 1, 'booked_value': booking.estimated_price or Decimal('0')}
+    if booking.status in STATUS_FIELDS:
+        deltas[STATUS_FIELDS[booking.status]] = 1
+    if booking.status == 'COMPLETED':
+        deltas['completed_revenue'] = _revenue(booking) or Decimal('0')
+    return deltas
+
+
+def add_booking_to_cube(booking):
+    _add(booking, **_counts(booking))
+
+
+def relocate_booking_in_cube(stored, booking):
+    """
+    Move what `stored` (the booking as last saved) counted to the cell of
+    `booking` when its day, hour or city was edited.
+    """
+    if _cell(stored) == _cell(booking):
+        return
+    counts = _counts(stored)
+    _add(stored, **{field: -delta for field, delta in counts.items()})
+    _add(booking, **counts)
+
+
+def move_booking_in_cube(booking, old_status, new_status):
+    deltas = {}
+    for status, delta in ((old_status, -1), (new_status, 1)):
+        if status in STATUS_FIELDS:
+            deltas[STATUS_FIELDS[status]] = deltas.get(STATUS_FIELDS[status], 0) + delta
+        if status == 'COMPLETED':
+            deltas['completed_revenue'] = (_revenue(booking) or Decimal('0')) * delta
+
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        _add(booking, **deltas)
+
+
+def rebuild_booking_cube():
+    """Recreate every cube row from bookings. Returns the number of rows."""
+    rows = Booking.objects.annotate(
+        hour=ExtractHour('scheduled_time')
+    ).values(
+        'scheduled_date', 'service__category_id', 'city', 'hour'
+    ).annotate(
+        total=Count('id'),
+        booked_value=Sum('estimated_price'),
+        completed_revenue=Sum(
+            Coalesce('final_price', 'estimated_price'), filter=Q(status='COMPLETED')
+        ),
+        **{
+            field: Count('id', filter=Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        }
+    ).order_by()
+
+    cells = {}
+    for row in rows:
+        key = (row['scheduled_date'], row['service__category_id'], normalize_city_key(row['city']), row['hour'])
+        if key not in cells:
+            cells[key] = BookingDailyCube(
+                day=key[0], category_id=key[1], city_key=key[2], hour=key[3]
+            )
+        cell = cells[key]
+        cell.bookings += row['total']
+        cell.booked_value += row['booked_value'] or 0
+        cell.completed_revenue += row['completed_revenue'] or 0
+        for field in STATUS_FIELDS.values():
+            setattr(cell, field, getattr(cell, field) + row[field])
+
+    with transaction.atomic():
+        BookingDailyCube.objects.all().delete()
+        BookingDailyCube.objects.bulk_create(cells.values(), batch_size=1000)
+
+    return len(cells)
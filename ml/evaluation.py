@@ -0,0 +1,338 @@
+"""
+Offline evaluation and latency benchmark for RecommendationEngine.
+
+build_dataset() fills the database with a synthetic marketplace using the
+app factories: customers favour one or two categories and services follow a
+long-tailed popularity curve. Every booking gets a timestamp in the last
+HISTORY_DAYS days; bookings before the split point are inserted as completed
+history and the rest are held out as what each customer books next.
+
+evaluate() then scores each strategy against the held-out bookings
+(precision@k, recall@k, coverage) and times each engine method (p50/p95/p99
+latency and query counts). Run it through the evaluate_recommendations
+command, which does all of this inside a rolled-back transaction and with
+a temporary artifact directory.
+"""
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from booking.factories import BookingFactory
+from booking.models import Booking
+from customer.factories import CustomerFactory
+from professional.factories import ProfessionalFactory
+from service.factories import ServiceCategoryFactory, ServiceFactory
+from service.models import Service
+from core.utils.spatial_index import invalidate_professional_index
+from .artifacts import reset_artifacts
+from .cooccurrence import invalidate_category_cooccurrence, rebuild_category_cooccurrence
+from .features import invalidate_service_features
+from .interactions import reset_interaction_matrix
+from .preferences import compute_customer_preferences
+from .recommendation_engine import RecommendationEngine
+from .scoring import compute_professional_scores
+from .similarity import ServiceSimilarityBuilder
+from .trending import rebuild_trend_buckets
+
+
+HISTORY_DAYS = 90
+FAVOURITE_CATEGORY_SHARE = 0.8  # bookings that go to a customer's favourite categories
+POPULARITY_EXPONENT = 1.1  # Zipf-like skew of service popularity
+
+# City name -> (latitude, longitude) of its centre
+CITIES = {
+    'Kabul': (34.53, 69.17),
+    'Herat': (34.35, 62.20),
+}
+CITY_SPREAD = 0.1  # degrees around the centre
+
+# Engine methods returning {service_id: score}
+STRATEGIES = [
+    '_collaborative_filtering_services',
+    '_content_based_services',
+    '_location_based_services',
+    '_popularity_based_services',
+]
+
+
+class Dataset:
+    """Ids of the generated rows and the held-out bookings per customer."""
+
+    def __init__(self, customers, services, categories, held_out, held_out_categories):
+        self.customers = customers
+        self.services = services
+        self.categories = categories
+        self.held_out = held_out
+        self.held_out_categories = held_out_categories
+
+
+def _point(rng, city):
+    lat, lon = CITIES[city]
+    return (
+        Decimal(str(round(lat + rng.uniform(-CITY_SPREAD, CITY_SPREAD), 6))),
+        Decimal(str(round(lon + rng.uniform(-CITY_SPREAD, CITY_SPREAD), 6))),
+    )
+
+
+def build_dataset(customers=200, professionals=40, categories=10,
+                  services_per_professional=3, bookings_per_customer=6,
+                  split=0.8, seed=42):
+    """Create the synthetic data and refresh every precomputed ML table."""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    category_objs = [
+        ServiceCategoryFactory(name=f'Evaluation category {i}') for i in range(categories)
+    ]
+
+    services = []
+    for i in range(professionals):
+        city = rng.choice(list(CITIES))
+        latitude, longitude = _point(rng, city)
+        category = rng.choice(category_objs)
+        professional = ProfessionalFactory(
+            user__username=f'mleval_pro{i}',
+            user__phone=f'+93790{i:06d}',
+            city=city,
+            latitude=latitude,
+            longitude=longitude,
+            avg_rating=round(rng.uniform(2.5, 5.0), 1),
+            services=[category],
+        )
+        for _ in range(services_per_professional):
+            services.append(ServiceFactory(professional=professional, category=category))
+
+    rng.shuffle(services)
+    popularity = 1 / np.arange(1, len(services) + 1) ** POPULARITY_EXPONENT
+    by_category = {}
+    for position, service in enumerate(services):
+        by_category.setdefault(service.category_id, []).append(position)
+
+    def pick(positions):
+        weights = popularity[positions]
+        return services[rng.choices(positions, weights=weights)[0]]
+
+    # (timestamp, customer, service) for every booking, history and held-out
+    events = []
+    customer_objs = []
+    for i in range(customers):
+        city = rng.choice(list(CITIES))
+        latitude, longitude = _point(rng, city)
+        customer = CustomerFactory(
+            user__username=f'mleval_customer{i}',
+            user__phone=f'+93791{i:06d}',
+            city=city,
+            latitude=latitude,
+            longitude=longitude,
+        )
+        customer_objs.append(customer)
+
+        favourites = rng.sample(sorted(by_category), k=min(2, len(by_category)))
+        favourite_positions = [p for category_id in favourites for p in by_category[category_id]]
+        for _ in range(bookings_per_customer):
+            if rng.random() < FAVOURITE_CATEGORY_SHARE:
+                service = pick(favourite_positions)
+            else:
+                service = pick(list(range(len(services))))
+            events.append((now - timedelta(days=rng.uniform(0, HISTORY_DAYS)), customer, service))
+
+    events.sort(key=lambda event: event[0])
+    cutoff = int(len(events) * split)
+
+    history = {}
+    bookings = []
+    for created_at, customer, service in events[:cutoff]:
+        history.setdefault(customer.id, set()).add(service.id)
+        bookings.append((created_at, BookingFactory.build(
+            customer=customer,
+            professional=service.professional,
+            service=service,
+            city=customer.city,
+            estimated_price=Decimal(service.price_per_unit),
+            status='COMPLETED',
+        )))
+    Booking.objects.bulk_create([booking for _, booking in bookings], batch_size=1000)
+
+    # created_at is auto_now_add, so set it afterwards, one update per day
+    by_day = {}
+    for created_at, booking in bookings:
+        day = created_at.replace(hour=12, minute=0, second=0, microsecond=0)
+        by_day.setdefault(day, []).append(booking.id)
+    for day, ids in by_day.items():
+        Booking.objects.filter(id__in=ids).update(created_at=day)
+
+    service_categories = {service.id: service.category_id for service in services}
+    held_out = {}
+    held_out_categories = {}
+    for _, customer, service in events[cutoff:]:
+        if service.id in history.get(customer.id, ()):
+            continue
+        held_out.setdefault(customer.id, set()).add(service.id)
+        booked = {service_categories[s] for s in history.get(customer.id, ())}
+        if service.category_id not in booked:
+            held_out_categories.setdefault(customer.id, set()).add(service.category_id)
+
+    refresh_ml_tables()
+
+    return Dataset(
+        customers=customer_objs,
+        services=[service.id for service in services],
+        categories=[category.id for category in category_objs],
+        held_out=held_out,
+        held_out_categories=held_out_categories,
+    )
+
+
+def refresh_ml_tables():
+    """Rebuild every precomputed table and drop per-process caches."""
+    compute_professional_scores()
+    compute_customer_preferences()
+    rebuild_category_cooccurrence()
+    rebuild_trend_buckets()
+    ServiceSimilarityBuilder().build()
+    drop_process_caches()
+
+
+def drop_process_caches():
+    """Make this process reload its in-memory tables and artifacts on next use."""
+    reset_artifacts()
+    reset_interaction_matrix()
+    invalidate_service_features()
+    invalidate_professional_index()
+    invalidate_category_cooccurrence()
+
+
+def _top(scores, k, exclude):
+    ranked = sorted(
+        ((score, service_id) for service_id, score in scores.items() if service_id not in exclude),
+        reverse=True
+    )
+    return [service_id for _, service_id in ranked[:k]]
+
+
+def _ranking_metrics(recommendations, relevant, k, catalog_size):
+    """Mean precision@k and recall@k over customers, and catalog coverage."""
+    precision, recall, covered = [], [], set()
+    for customer_id, items in recommendations.items():
+        hits = len(set(items) & relevant[customer_id])
+        precision.append(hits / k)
+        recall.append(hits / len(relevant[customer_id]))
+        covered.update(items)
+
+    return {
+        'customers': len(precision),
+        'precision_at_k': float(np.mean(precision)) if precision else 0.0,
+        'recall_at_k': float(np.mean(recall)) if recall else 0.0,
+        'coverage': len(covered) / catalog_size if catalog_size else 0.0,
+    }
+
+
+def _timed(function, *args, **kwargs):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed * 1000, len(queries)
+
+
+def _latency(samples):
+    ms = np.array([sample[0] for sample in samples])
+    queries = np.array([sample[1] for sample in samples])
+    return {
+        'calls': len(samples),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_queries': float(queries.mean()),
+        'max_queries': int(queries.max()),
+    }
+
+
+def evaluate(dataset, k=10):
+    """Quality metrics per strategy and latency per engine method."""
+    customers = [c for c in dataset.customers if c.id in dataset.held_out]
+    history = {}
+    for customer_id, service_id in Booking.objects.filter(
+        customer_id__in=[c.id for c in customers]
+    ).values_list('customer_id', 'service_id'):
+        history.setdefault(customer_id, set()).add(service_id)
+
+    catalog_size = Service.objects.filter(id__in=dataset.services, is_active=True).count()
+
+    # Warm up process-wide tables so the first customer doesn't pay for them
+    if customers:
+        engine = RecommendationEngine(customers[0])
+        engine.get_recommended_services(limit=k)
+        engine.get_recommended_categories(limit=k)
+
+    recommendations = {name: {} for name in STRATEGIES + ['get_recommended_services']}
+    category_recommendations = {}
+    timings = {
+        name: [] for name in STRATEGIES + [
+            'get_recommended_services', 'get_recommended_professionals',
+            'get_recommended_categories', 'get_similar_services',
+        ]
+    }
+
+    for customer in customers:
+        booked = history.get(customer.id, set())
+
+        for name in STRATEGIES:
+            engine = RecommendationEngine(customer)
+            scores, ms, queries = _timed(getattr(engine, name))
+            timings[name].append((ms, queries))
+            recommendations[name][customer.id] = _top(scores, k, booked)
+
+        engine = RecommendationEngine(customer)
+        services, ms, queries = _timed(engine.get_recommended_services, limit=k)
+        timings['get_recommended_services'].append((ms, queries))
+        recommendations['get_recommended_services'][customer.id] = [s.id for s in services]
+
+        engine = RecommendationEngine(customer)
+        _, ms, queries = _timed(engine.get_recommended_professionals, limit=k)
+        timings['get_recommended_professionals'].append((ms, queries))
+
+        engine = RecommendationEngine(customer)
+        categories, ms, queries = _timed(engine.get_recommended_categories, limit=k)
+        timings['get_recommended_categories'].append((ms, queries))
+        if customer.id in dataset.held_out_categories:
+            category_recommendations[customer.id] = [c.id for c in categories]
+
+        if booked:
+            engine = RecommendationEngine(customer)
+            _, ms, queries = _timed(engine.get_similar_services, min(booked), limit=k)
+            timings['get_similar_services'].append((ms, queries))
+
+    quality = {
+        name: _ranking_metrics(recs, dataset.held_out, k, catalog_size)
+        for name, recs in recommendations.items()
+    }
+    quality['get_recommended_categories'] = _ranking_metrics(
+        category_recommendations, dataset.held_out_categories, k, len(dataset.categories)
+    )
+
+    return {
+        'quality': quality,
+        'latency': {name: _latency(samples) for name, samples in timings.items() if samples},
+    }
+
+
+def diff_reports(current, baseline):
+    """
+    [(section, name, metric, baseline, current, change)] for every numeric
+    metric present in both reports.
+    """
+    rows = []
+    for section in ('quality', 'latency'):
+        for name, metrics in current.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name, {})
+            for metric, value in metrics.items():
+                if metric in previous:
+                    rows.append((section, name, metric, previous[metric], value, value - previous[metric]))
+    return rows
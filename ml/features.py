@@ -0,0 +1,118 @@
+"""
+Array-backed service feature table.
+
+One row per service (id, category, professional, price, professional
+rating, active flag), loaded in a single query. Each worker keeps its own
+copy and rebuilds it when the shared version in the cache is bumped by a
+Service or Professional change (see ml/recievers.py).
+"""
+from uuid import uuid4
+
+import numpy as np
+from django.core.cache import cache
+
+from service.models import Service
+
+
+VERSION_CACHE_KEY = 'ml:service_features:version'
+
+# Content-based component weights
+CATEGORY_WEIGHT = 0.5
+PRICE_WEIGHT = 0.3
+RATING_WEIGHT = 0.2
+PRICE_TOLERANCE = 0.5  # +/- 50% of the customer's average price
+
+
+class ServiceFeatureTable:
+    """Columns of service features, sorted by service id."""
+
+    def __init__(self, ids, categories, professionals, prices, ratings, active):
+        self.ids = ids
+        self.categories = categories
+        self.professionals = professionals
+        self.prices = prices
+        self.ratings = ratings
+        self.active = active
+
+    @classmethod
+    def build(cls):
+        rows = list(
+            Service.objects.order_by('id').values_list(
+                'id', 'category_id', 'professional_id', 'price_per_unit',
+                'professional__avg_rating', 'is_active',
+                'professional__is_active', 'professional__verification_status'
+            )
+        )
+
+        return cls(
+            ids=np.array([r[0] for r in rows], dtype=np.int64),
+            categories=np.array([r[1] for r in rows], dtype=np.int64),
+            professionals=np.array([r[2] for r in rows], dtype=np.int64),
+            prices=np.array([float(r[3]) for r in rows], dtype=np.float64),
+            ratings=np.array([r[4] or 0.0 for r in rows], dtype=np.float64),
+            active=np.array([r[5] and r[6] and r[7] == 'VERIFIED' for r in rows], dtype=bool),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, service_ids):
+        """Positions of service_ids in the table, -1 where missing."""
+        service_ids = np.asarray(service_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(service_ids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.ids, service_ids), len(self.ids) - 1)
+        return np.where(self.ids[pos] == service_ids, pos, -1)
+
+    def content_scores(self, category_weights, avg_price, exclude_ids=(), limit=200):
+        """
+        Score active services against a customer's preferred categories
+        ({category_id: weight}, the heaviest counting fully) and average
+        price. Returns the top `limit` as {service_id: score}.
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float64)
+        top_weight = max(category_weights.values(), default=0)
+        for category_id, weight in category_weights.items():
+            scores[self.categories == category_id] = CATEGORY_WEIGHT * weight / top_weight
+
+        tolerance = avg_price * PRICE_TOLERANCE
+        if tolerance > 0:
+            diff = np.abs(self.prices - avg_price)
+            scores += PRICE_WEIGHT * np.where(diff <= tolerance, 1 - diff / tolerance, 0.0)
+
+        scores += RATING_WEIGHT * (self.ratings / 5.0)
+
+        scores[~self.active] = 0
+        excluded = self.positions(list(exclude_ids))
+        scores[excluded[excluded >= 0]] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+
+        return {int(self.ids[i]): float(scores[i]) for i in candidates}
+
+
+_table = None
+_table_version = None
+
+
+def get_service_features():
+    """This worker's feature table, rebuilt if another process invalidated it."""
+    global _table, _table_version
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+
+    if _table is None or version != _table_version:
+        _table = ServiceFeatureTable.build()
+        _table_version = version
+
+    return _table
+
+
+def invalidate_service_features():
+    """Mark every worker's feature table as stale."""
+    cache.set(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
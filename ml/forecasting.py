@@ -0,0 +1,189 @@
+"""
+Holt-Winters demand forecasting for every category and city.
+
+fit_forecast_models() reads the last FORECAST_HISTORY_DAYS of daily
+bookings from BookingDailyCube in one query, as one series per category
+and city (plus every-city, every-category and overall totals), and fits
+additive Holt-Winters with a weekly season to all of them at once: the
+series and the grid of smoothing parameters are the two axes of the same
+arrays, so the recursion runs once per day rather than once per series.
+Each series keeps the parameters with the smallest one-step-ahead error,
+and its final state is stored in ForecastModel for the forecast
+endpoints.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core.utils.location import normalize_city_key
+from .conf import ml_setting
+from .models import BookingDailyCube, ForecastModel
+
+
+SEASON = 7
+
+# Smoothing parameter grid searched for every series
+ALPHAS = (0.1, 0.2, 0.4, 0.6)
+BETAS = (0.0, 0.02, 0.05, 0.1)
+GAMMAS = (0.05, 0.1, 0.2, 0.4)
+
+
+def fit_holt_winters(series, start_weekday=0, alphas=ALPHAS, betas=BETAS, gammas=GAMMAS):
+    """
+    Fit additive Holt-Winters to every row of `series` (series x days, at
+    least two weeks), picking the best (alpha, beta, gamma) per row.
+
+    Returns a dict of arrays: level, trend, seasonal (series x 7, Monday
+    first when the first day is `start_weekday`), alpha, beta, gamma and
+    rmse.
+    """
+    y = np.asarray(series, dtype=np.float64)
+    n, days = y.shape
+    alpha, beta, gamma = (
+        grid.ravel() for grid in np.meshgrid(alphas, betas, gammas, indexing='ij')
+    )
+
+    # Initial state from the first two weeks, the same for every parameter set
+    level0 = y[:, :SEASON].mean(axis=1)
+    trend0 = (y[:, SEASON:2 * SEASON].mean(axis=1) - level0) / SEASON
+    level = np.repeat(level0[:, None], len(alpha), axis=1)
+    trend = np.repeat(trend0[:, None], len(alpha), axis=1)
+    seasonal = np.repeat((y[:, :SEASON] - level0[:, None])[:, :, None], len(alpha), axis=2)
+    sse = np.zeros_like(level)
+
+    for t in range(SEASON, days):
+        position = t % SEASON
+        observed = y[:, t, None]
+        season = seasonal[:, position, :]
+
+        error = observed - (level + trend + season)
+        sse += error ** 2
+
+        new_level = alpha * (observed - season) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        seasonal[:, position, :] = gamma * (observed - new_level) + (1 - gamma) * season
+        level = new_level
+
+    rows = np.arange(n)
+    best = sse.argmin(axis=1)
+    return {
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        # Position p is weekday (start_weekday + p) % 7
+        'seasonal': np.roll(seasonal[rows, :, best], start_weekday, axis=1),
+        'alpha': alpha[best],
+        'beta': beta[best],
+        'gamma': gamma[best],
+        'rmse': np.sqrt(sse[rows, best] / max(days - SEASON, 1)),
+    }
+
+
+def _daily_series(start, days):
+    """
+    ([(category_id, city_key)], series x days array) of daily bookings from
+    `start`, with None / '' keys for the every-category and every-city totals.
+    """
+    rows = BookingDailyCube.objects.filter(
+        day__gte=start,
+        day__lt=start + timedelta(days=days)
+    ).values('category_id', 'city_key', 'day').annotate(
+        count=Sum('bookings')
+    ).order_by().values_list('category_id', 'city_key', 'day', 'count')
+
+    index = {}
+    cells = []
+    for category_id, city_key, day, count in rows.iterator():
+        day_index = (day - start).days
+        # A set, so bookings without a city only count once in the totals
+        for key in {
+            (category_id, city_key),
+            (category_id, ''),
+            (None, city_key),
+            (None, ''),
+        }:
+            cells.append((index.setdefault(key, len(index)), day_index, count))
+
+    series = np.zeros((len(index), days))
+    if cells:
+        positions, day_indexes, counts = np.array(cells).T
+        np.add.at(series, (positions, day_indexes), counts)
+
+    return list(index), series
+
+
+def fit_forecast_models(today=None):
+    """
+    Refit every series over the FORECAST_HISTORY_DAYS up to yesterday.
+    Returns (series fitted, seconds).
+    """
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    days = ml_setting('FORECAST_HISTORY_DAYS')
+    start = today - timedelta(days=days)
+
+    keys, series = _daily_series(start, days)
+    models = []
+    if keys:
+        fitted = fit_holt_winters(series, start_weekday=start.weekday())
+        totals = series.sum(axis=1)
+        for i, (category_id, city_key) in enumerate(keys):
+            models.append(ForecastModel(
+                category_id=category_id,
+                city_key=city_key,
+                level=float(fitted['level'][i]),
+                trend=float(fitted['trend'][i]),
+                seasonal=[round(float(offset), 4) for offset in fitted['seasonal'][i]],
+                alpha=float(fitted['alpha'][i]),
+                beta=float(fitted['beta'][i]),
+                gamma=float(fitted['gamma'][i]),
+                rmse=float(fitted['rmse'][i]),
+                observations=int(totals[i]),
+                fitted_through=today - timedelta(days=1),
+            ))
+
+    with transaction.atomic():
+        ForecastModel.objects.all().delete()
+        ForecastModel.objects.bulk_create(models, batch_size=1000)
+
+    return len(models), time.perf_counter() - started
+
+
+def series_key(category_id=None, city=None):
+    """(category_id, city_key) of a series; a None category or empty city means all."""
+    return int(category_id) if category_id else None, normalize_city_key(city)
+
+
+def get_forecast_models(series):
+    """{series_key: ForecastModel} for [(category_id, city)] pairs, in one query."""
+    keys = {series_key(category_id, city) for category_id, city in series}
+    if not keys:
+        return {}
+
+    wanted = Q(pk__in=[])
+    for category_id, city_key in keys:
+        if category_id is None:
+            wanted |= Q(category__isnull=True, city_key=city_key)
+        else:
+            wanted |= Q(category_id=category_id, city_key=city_key)
+
+    return {
+        (model.category_id, model.city_key): model
+        for model in ForecastModel.objects.filter(wanted)
+    }
+
+
+def forecast_days(model, dates):
+    """Predicted bookings for each date after the model's history, never below 0."""
+    return [
+        max(
+            model.level +
+            (date - model.fitted_through).days * model.trend +
+            model.seasonal[date.weekday()],
+            0.0
+        )
+        for date in dates
+    ]
@@ -0,0 +1,133 @@
+"""
+Buffered ingestion of InteractionEvent rows.
+
+The ingestion endpoint only validates events and appends them to the
+process-wide buffer; a daemon thread writes them with bulk_create every
+INTERACTION_FLUSH_INTERVAL seconds, or sooner once INTERACTION_FLUSH_SIZE
+events are waiting. Requests never wait for the database. If writes fall
+behind, the buffer keeps at most INTERACTION_BUFFER_LIMIT events and drops
+the oldest.
+
+Events older than the interaction rollup checkpoint (see ml/rollups.py),
+e.g. written after a slow flush, are moved up to it, so they land in the
+next day to be compacted rather than behind it where nothing reads them.
+Every event also records when it was written (ingested_at), which jobs that
+page through new events use instead of the client-supplied time.
+"""
+import atexit
+import logging
+import threading
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .conf import ml_setting
+from .models import InteractionEvent, PipelineCheckpoint
+
+
+logger = logging.getLogger(__name__)
+
+# PipelineCheckpoint of the interaction rollups
+ROLLUP_CHECKPOINT = 'interaction_rollups'
+
+# API names -> stored integer codes
+EVENT_TYPE_CODES = {
+    'VIEW': InteractionEvent.VIEW,
+    'SEARCH': InteractionEvent.SEARCH,
+    'BOOKMARK': InteractionEvent.BOOKMARK,
+}
+TARGET_TYPE_CODES = {
+    'service': InteractionEvent.SERVICE,
+    'professional': InteractionEvent.PROFESSIONAL,
+    'category': InteractionEvent.CATEGORY,
+}
+
+
+class InteractionBuffer:
+    """Thread-safe queue of unsaved InteractionEvent instances."""
+
+    def __init__(self):
+        self._events = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, events):
+        """Queue events for the next flush."""
+        with self._lock:
+            self._events.extend(events)
+            overflow = len(self._events) - ml_setting('INTERACTION_BUFFER_LIMIT')
+            if overflow > 0:
+                del self._events[:overflow]
+                self.dropped += overflow
+            full = len(self._events) >= ml_setting('INTERACTION_FLUSH_SIZE')
+
+        if overflow > 0:
+            logger.warning("Interaction buffer full, dropped %d events", overflow)
+
+        if not ml_setting('INTERACTION_BACKGROUND_FLUSH'):
+            if full:
+                self.flush()
+            return
+
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write every queued event. Returns the number written."""
+        with self._lock:
+            events, self._events = self._events, []
+
+        if events:
+            with transaction.atomic():
+                # Locked so compaction can't move past these events mid-write
+                checkpoint = PipelineCheckpoint.objects.select_for_update().filter(
+                    name=ROLLUP_CHECKPOINT
+                ).first()
+                ingested_at = timezone.now()
+                for event in events:
+                    event.ingested_at = ingested_at
+                    if checkpoint is not None:
+                        event.created_at = max(event.created_at, checkpoint.position)
+                InteractionEvent.objects.bulk_create(
+                    events, batch_size=ml_setting('INTERACTION_FLUSH_SIZE')
+                )
+        return len(events)
+
+    def _ensure_thread(self):
+        # Also restarts the thread in a forked worker, where it isn't running
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='interaction-buffer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(ml_setting('INTERACTION_FLUSH_INTERVAL'))
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush interaction events")
+            finally:
+                close_old_connections()
+
+
+interaction_buffer = InteractionBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        interaction_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush interaction events on exit")
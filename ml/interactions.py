@@ -0,0 +1,257 @@
+"""
+Sparse customer x service interaction matrix for collaborative filtering.
+
+The matrix is built from completed bookings and customers' service
+interactions (daily rollups plus not yet compacted raw events, see
+ml/rollups.py), kept in CSR (by customer) and CSC (by service) form, and
+scored with item-item cosine similarity:
+
+    score_j = sum_i u_i * cos(i, j)
+            = (1 / |j|) * sum_c X[c, j] * sum_i X[c, i] * u_i / |i|
+
+so recommending for one customer only touches the customers and items
+that share an interaction with them.
+"""
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from booking.models import Booking
+from .artifacts import get_artifact, publish_artifact
+from .conf import ml_setting
+from .rollups import service_interactions
+from .similarity import gather_ranges
+
+
+ARTIFACT_NAME = 'interaction_matrix'
+PUBLISH_LOCK_KEY = 'ml:interaction_matrix:publishing'
+
+# Interaction strength per event; duplicates keep the strongest one
+COMPLETED_BOOKING_WEIGHT = 1.0
+INTERACTION_WEIGHTS = {
+    'VIEW': 0.1,
+    'BOOKMARK': 0.5,
+    'BOOK': 0.7,
+    'COMPLETE': 1.0,
+    'REVIEW': 1.0,
+}
+
+
+class InteractionMatrix:
+    """Customer x service matrix stored as CSR and CSC arrays."""
+
+    def __init__(self, customer_ids, service_ids, rows, cols, data):
+        self.customer_ids = customer_ids
+        self.service_ids = service_ids
+
+        n_customers, n_services = len(customer_ids), len(service_ids)
+
+        # CSR: rows/cols arrive sorted by (row, col)
+        self.indptr = np.zeros(n_customers + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_customers), out=self.indptr[1:])
+        self.indices = cols.astype(np.int32)
+        self.data = data.astype(np.float32)
+
+        # CSC
+        order = np.argsort(cols, kind='stable')
+        self.col_indptr = np.zeros(n_services + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_services), out=self.col_indptr[1:])
+        self.col_indices = rows[order].astype(np.int32)
+        self.col_data = self.data[order]
+
+        self.item_norms = np.sqrt(
+            np.bincount(cols, weights=data ** 2, minlength=n_services)
+        )
+
+    @classmethod
+    def build(cls):
+        """Build the matrix from bookings and interaction rollups."""
+        bookings = np.array(list(
+            Booking.objects.filter(status='COMPLETED').values_list('customer_id', 'service_id')
+        ), dtype=np.int64).reshape(-1, 2)
+
+        events = service_interactions(list(INTERACTION_WEIGHTS))
+        events_array = np.array([e[:2] for e in events], dtype=np.int64).reshape(-1, 2)
+        event_weights = np.array([INTERACTION_WEIGHTS[e[2]] for e in events], dtype=np.float64)
+
+        pairs = np.concatenate([bookings, events_array])
+        weights = np.concatenate([
+            np.full(len(bookings), COMPLETED_BOOKING_WEIGHT), event_weights
+        ])
+        return cls.from_pairs(pairs[:, 0], pairs[:, 1], weights)
+
+    ARRAYS = [
+        'customer_ids', 'service_ids', 'indptr', 'indices', 'data',
+        'col_indptr', 'col_indices', 'col_data', 'item_norms',
+    ]
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Wrap a published artifact's arrays without copying them."""
+        matrix = cls.__new__(cls)
+        for array in cls.ARRAYS:
+            setattr(matrix, array, artifact[array])
+        return matrix
+
+    def to_arrays(self):
+        return {array: getattr(self, array) for array in self.ARRAYS}
+
+    @classmethod
+    def from_pairs(cls, customer_ids, service_ids, weights):
+        """Build from raw (customer, service, weight) triples."""
+        customers, rows = np.unique(customer_ids, return_inverse=True)
+        services, cols = np.unique(service_ids, return_inverse=True)
+
+        # Collapse duplicate pairs, keeping the strongest interaction
+        keys = rows.astype(np.int64) * max(len(services), 1) + cols
+        order = np.lexsort((-weights, keys))
+        keys, weights = keys[order], weights[order]
+        first = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.empty(0, dtype=bool)
+        keys, weights = keys[first], weights[first]
+
+        n_services = max(len(services), 1)
+        return cls(customers, services, keys // n_services, keys % n_services, weights)
+
+    def _row(self, customer_id):
+        """The customer's row, or None."""
+        row = np.searchsorted(self.customer_ids, customer_id)
+        if row >= len(self.customer_ids) or self.customer_ids[row] != customer_id:
+            return None
+        return row
+
+    def has_customer(self, customer_id):
+        return self._row(customer_id) is not None
+
+    def similar_item_scores(self, customer_id, limit=50):
+        """
+        Top `limit` unseen services for the customer, as {service_id: score}.
+        """
+        row = self._row(customer_id)
+        if row is None:
+            return {}
+
+        items = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        weights = self.data[self.indptr[row]:self.indptr[row + 1]] / self.item_norms[items]
+
+        # Customers sharing an item, weighted by the overlap
+        starts, ends = self.col_indptr[items], self.col_indptr[items + 1]
+        idx = gather_ranges(starts, ends)
+        neighbour_weights = np.bincount(
+            self.col_indices[idx],
+            weights=self.col_data[idx] * np.repeat(weights, ends - starts),
+            minlength=len(self.customer_ids)
+        )
+        neighbour_weights[row] = 0
+        neighbours = np.flatnonzero(neighbour_weights)
+        if len(neighbours) == 0:
+            return {}
+
+        # Items of those customers, weighted by neighbour overlap
+        starts, ends = self.indptr[neighbours], self.indptr[neighbours + 1]
+        idx = gather_ranges(starts, ends)
+        scores = np.bincount(
+            self.indices[idx],
+            weights=self.data[idx] * np.repeat(neighbour_weights[neighbours], ends - starts),
+            minlength=len(self.service_ids)
+        )
+        scores = scores / np.where(self.item_norms > 0, self.item_norms, 1)
+        scores[items] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+
+        return {
+            int(self.service_ids[i]): float(scores[i])
+            for i in candidates
+        }
+
+
+# (matrix, artifact version or None, monotonic build time), replaced as a
+# whole so threads never see a matrix paired with another one's version
+_state = (None, None, 0.0)
+_lock = threading.Lock()
+
+
+def _is_fresh(artifact):
+    """Whether the artifact was published within INTERACTION_MATRIX_TTL seconds."""
+    age = timezone.now() - parse_datetime(artifact.metadata['created_at'])
+    return age.total_seconds() <= ml_setting('INTERACTION_MATRIX_TTL')
+
+
+def _republish_if_stale(artifact):
+    """
+    Publish a new version once the artifact is older than
+    INTERACTION_MATRIX_TTL. Only the worker that takes the shared lock
+    (held for the TTL) builds it; the others keep serving the current
+    version until they see the new one.
+    """
+    if _is_fresh(artifact) or not cache.add(
+        PUBLISH_LOCK_KEY, True, timeout=ml_setting('INTERACTION_MATRIX_TTL')
+    ):
+        return artifact
+    publish_interaction_matrix()
+    return get_artifact(ARTIFACT_NAME)
+
+
+def _current(artifact):
+    """The matrix in _state if it is still the one to serve, otherwise None."""
+    matrix, version, built_at = _state
+    if matrix is None:
+        return None
+    if artifact is not None:
+        return matrix if version == artifact.version else None
+    if version is not None or time.monotonic() - built_at > ml_setting('INTERACTION_MATRIX_TTL'):
+        return None
+    return matrix
+
+
+def get_interaction_matrix():
+    """
+    The published matrix artifact, republished by one worker once it is
+    older than INTERACTION_MATRIX_TTL. Before anything is published, a
+    matrix built in this process and rebuilt every INTERACTION_MATRIX_TTL
+    seconds. Only one thread builds at a time.
+    """
+    global _state
+
+    artifact = get_artifact(ARTIFACT_NAME)
+    if artifact is not None:
+        artifact = _republish_if_stale(artifact)
+
+    matrix = _current(artifact)
+    if matrix is not None:
+        return matrix
+
+    with _lock:
+        # Another thread may have built it while this one waited
+        matrix = _current(artifact)
+        if matrix is None:
+            if artifact is not None:
+                matrix = InteractionMatrix.from_artifact(artifact)
+                _state = (matrix, artifact.version, 0.0)
+            else:
+                matrix = InteractionMatrix.build()
+                _state = (matrix, None, time.monotonic())
+
+    return matrix
+
+
+def publish_interaction_matrix():
+    """Build the matrix and publish it for every worker. Returns the version."""
+    matrix = InteractionMatrix.build()
+    return publish_artifact(ARTIFACT_NAME, matrix.to_arrays(), {
+        'customers': len(matrix.customer_ids),
+        'services': len(matrix.service_ids),
+        'interactions': len(matrix.data),
+    })
+
+
+def reset_interaction_matrix():
+    """Drop the process-wide matrix so the next call rebuilds it."""
+    global _state
+    _state = (None, None, 0.0)
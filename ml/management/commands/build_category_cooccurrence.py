@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.cooccurrence import rebuild_category_cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild the category co-booking matrix from completed bookings."
+
+    def handle(self, *args, **options):
+        count = rebuild_category_cooccurrence()
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} category pairs."))
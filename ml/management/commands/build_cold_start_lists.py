@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.cold_start import rebuild_cold_start_lists
+
+
+class Command(BaseCommand):
+    help = "Rebuild the fallback service lists for customers without history."
+
+    def handle(self, *args, **options):
+        count = rebuild_cold_start_lists()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} cold start lists."))
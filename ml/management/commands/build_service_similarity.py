@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from service.models import Service
+from ml.similarity import ServiceSimilarityBuilder
+
+
+class Command(BaseCommand):
+    help = "Compute top-K item-item similarities for services into ServiceSimilarity."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=None,
+            help="Neighbours kept per service (default: ML_SETTINGS['SIMILARITY_TOP_K'])."
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=None,
+            help="Minimum similarity score kept (default: ML_SETTINGS['SIMILARITY_THRESHOLD'])."
+        )
+        parser.add_argument(
+            '--service-ids', type=int, nargs='+',
+            help="Only refresh these services."
+        )
+        parser.add_argument(
+            '--since-hours', type=int,
+            help="Only refresh services created or edited, or whose professional changed, in the last N hours."
+        )
+
+    def handle(self, *args, **options):
+        service_ids = options['service_ids']
+
+        if options['since_hours']:
+            since = timezone.now() - timedelta(hours=options['since_hours'])
+            changed = Service.objects.filter(
+                Q(created_at__gte=since) | Q(updated_at__gte=since) |
+                Q(professional__updated_at__gte=since)
+            ).values_list('id', flat=True)
+            service_ids = set(service_ids or []) | set(changed)
+
+            if not service_ids:
+                self.stdout.write("No changed services.")
+                return
+
+        builder = ServiceSimilarityBuilder(
+            top_k=options['top_k'],
+            threshold=options['threshold']
+        )
+        written = builder.build(service_ids=service_ids)
+
+        scope = f"{len(service_ids)} services" if service_ids is not None else "full catalog"
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} similarity rows ({scope})."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ml.rollups import compact_interactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll finished days of raw interactions into daily rollups, then delete "
+        "expired raw rows and rollups. Meant to run daily."
+    )
+
+    def handle(self, *args, **options):
+        days, raw_deleted, rollups_deleted = compact_interactions()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {days} days; deleted {raw_deleted} raw interactions "
+            f"and {rollups_deleted} expired rollups."
+        ))
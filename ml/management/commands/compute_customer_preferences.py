@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ml.preferences import compute_customer_preferences
+
+
+class Command(BaseCommand):
+    help = "Recompute CustomerPreference from completed bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer-ids', type=int, nargs='+',
+            help="Only recompute these customers."
+        )
+
+    def handle(self, *args, **options):
+        count = compute_customer_preferences(options['customer_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Computed preferences for {count} customers."))
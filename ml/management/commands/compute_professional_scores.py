@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.scoring import compute_professional_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute ProfessionalScore for every professional."
+
+    def handle(self, *args, **options):
+        count = compute_professional_scores()
+        self.stdout.write(self.style.SUCCESS(f"Scored {count} professionals."))
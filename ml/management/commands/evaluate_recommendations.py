@@ -0,0 +1,99 @@
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from ml.evaluation import build_dataset, diff_reports, drop_process_caches, evaluate
+
+
+# Keep the synthetic run away from the shared cache and skip slow password hashing
+EVALUATION_SETTINGS = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ml-evaluation',
+        }
+    },
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate recommendation quality and latency on a synthetic dataset. "
+        "Data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--professionals', type=int, default=40)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--services-per-professional', type=int, default=3)
+        parser.add_argument('--bookings-per-customer', type=int, default=6)
+        parser.add_argument(
+            '--split', type=float, default=0.8,
+            help="Share of bookings (oldest first) used as history; the rest are held out."
+        )
+        parser.add_argument('--k', type=int, default=10, help="Recommendations scored per customer.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the report as JSON to this path.")
+        parser.add_argument('--baseline', help="Compare against a JSON report from an earlier run.")
+
+    def handle(self, *args, **options):
+        config = {
+            name: options[name] for name in (
+                'customers', 'professionals', 'categories', 'services_per_professional',
+                'bookings_per_customer', 'split', 'k', 'seed',
+            )
+        }
+
+        # Published artifacts (the interaction matrix) would otherwise shadow
+        # the synthetic data, and anything published here must not go live
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            ml_settings = {**getattr(settings, 'ML_SETTINGS', {}), 'ARTIFACT_DIR': artifact_dir}
+            drop_process_caches()
+            try:
+                with override_settings(**EVALUATION_SETTINGS, ML_SETTINGS=ml_settings), transaction.atomic():
+                    dataset = build_dataset(**{name: value for name, value in config.items() if name != 'k'})
+                    report = evaluate(dataset, k=config['k'])
+                    transaction.set_rollback(True)
+            finally:
+                # In-memory tables and artifacts came from the rolled-back data
+                drop_process_caches()
+
+        report = {'config': config, **report}
+
+        self.stdout.write(f"Quality (k={config['k']}):")
+        for name, metrics in report['quality'].items():
+            self.stdout.write(
+                f"  {name:36} precision={metrics['precision_at_k']:.4f} "
+                f"recall={metrics['recall_at_k']:.4f} coverage={metrics['coverage']:.4f} "
+                f"customers={metrics['customers']}"
+            )
+        self.stdout.write("Latency:")
+        for name, metrics in report['latency'].items():
+            self.stdout.write(
+                f"  {name:36} p50={metrics['p50_ms']:.2f}ms p95={metrics['p95_ms']:.2f}ms "
+                f"p99={metrics['p99_ms']:.2f}ms queries={metrics['mean_queries']:.1f} "
+                f"(max {metrics['max_queries']})"
+            )
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline.get('config') != config:
+                self.stdout.write(self.style.WARNING("Baseline was run with a different configuration."))
+            self.stdout.write("Change from baseline:")
+            for section, name, metric, before, after, change in diff_reports(report, baseline):
+                if change:
+                    self.stdout.write(
+                        f"  {section}.{name}.{metric}: {before:.4f} -> {after:.4f} ({change:+.4f})"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.forecasting import fit_forecast_models
+
+
+class Command(BaseCommand):
+    help = "Refit the Holt-Winters demand forecast of every category and city series."
+
+    def handle(self, *args, **options):
+        count, seconds = fit_forecast_models()
+        self.stdout.write(self.style.SUCCESS(f"Fitted {count} forecast series in {seconds:.2f}s."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from ml.materialized import materialize_recommendations
+
+
+class Command(BaseCommand):
+    help = "Precompute service, professional and category recommendations for every customer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes.")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Customers per task.")
+        parser.add_argument(
+            '--top-n', type=int, default=None,
+            help="Recommendations stored per list (default: ML_SETTINGS['MATERIALIZED_TOP_N'])."
+        )
+        parser.add_argument(
+            '--customer-ids', type=int, nargs='+',
+            help="Only materialize these customers."
+        )
+
+    def handle(self, *args, **options):
+        customers, seconds = materialize_recommendations(
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            top_n=options['top_n'],
+            customer_ids=options['customer_ids'],
+        )
+        rate = customers / seconds if seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {customers} customers in {seconds:.1f}s ({rate:.1f} customers/s)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.interactions import publish_interaction_matrix
+
+
+class Command(BaseCommand):
+    help = "Build precomputed ML arrays and publish them as new artifact versions."
+
+    def handle(self, *args, **options):
+        version = publish_interaction_matrix()
+        self.stdout.write(self.style.SUCCESS(f"Published interaction_matrix {version}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.cube import rebuild_booking_cube
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily booking cube (per day, category, city and hour) from bookings."
+
+    def handle(self, *args, **options):
+        count = rebuild_booking_cube()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} booking cube rows."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ml.outcomes import rebuild_outcome_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per customer, professional and category booking outcome counters from bookings."
+
+    def handle(self, *args, **options):
+        count = rebuild_outcome_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} outcome counters."))
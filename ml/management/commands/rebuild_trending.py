@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ml.trending import rebuild_trend_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the trending booking buckets inside the trending window from bookings "
+        "and delete older buckets."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_trend_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} trending buckets."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ml.cancellation_model import train_cancellation_model
+
+
+class Command(BaseCommand):
+    help = "Train the cancellation risk model on finished bookings and publish it as an artifact."
+
+    def handle(self, *args, **options):
+        version, metadata = train_cancellation_model()
+        if version is None:
+            self.stdout.write(self.style.WARNING(
+                f"Not trained: {metadata['samples']} finished bookings, "
+                f"{metadata['cancelled']} cancelled. Keeping the current model."
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Published cancellation_model {version}: {metadata['samples']} bookings, "
+            f"{metadata['cancelled']} cancelled, log loss {metadata['log_loss']}"
+        ))
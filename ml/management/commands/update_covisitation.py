@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ml.covisitation import rebuild_covisitation, update_covisitation
+
+
+class Command(BaseCommand):
+    help = "Fold new session views into the service co-visitation lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Drop all pairs and recount the last COVISITATION_WINDOW_DAYS."
+        )
+
+    def handle(self, *args, **options):
+        update = rebuild_covisitation if options['rebuild'] else update_covisitation
+        views, pairs = update()
+        self.stdout.write(self.style.SUCCESS(f"Processed {views} views, updated {pairs} pairs."))
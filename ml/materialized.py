@@ -0,0 +1,120 @@
+"""
+Nightly materialized recommendations.
+
+materialize_recommendations() runs the engine for every customer, split
+into chunks of customer ids across a multiprocessing pool, and stores the
+top MATERIALIZED_TOP_N services, professionals and categories of each in
+MaterializedRecommendation. The endpoints serve from that row when it
+exists and was built by the current ALGORITHM_VERSION, and compute live
+otherwise. Booking and review events delete the customer's row (see
+ml/recievers.py), so they get live results until the next run.
+"""
+import multiprocessing
+import time
+
+from django.db import connections
+
+from customer.models import CustomerProfile
+from professional.models import Professional, ServiceCategory
+from service.models import Service
+from .conf import ml_setting
+from .models import MaterializedRecommendation
+from .recommendation_engine import ALGORITHM_VERSION, RecommendationEngine
+
+
+def materialize_customers(customer_ids, top_n=None):
+    """Compute and store recommendations for these customers. Returns the count."""
+    top_n = top_n or ml_setting('MATERIALIZED_TOP_N')
+    rows = []
+
+    customers = CustomerProfile.objects.filter(id__in=customer_ids).select_related('user')
+    for customer in customers:
+        engine = RecommendationEngine(customer, log=False)
+        rows.append(MaterializedRecommendation(
+            customer=customer,
+            services=[s.id for s in engine.get_recommended_services(limit=top_n)],
+            professionals=[p.id for p in engine.get_recommended_professionals(limit=top_n)],
+            categories=[c.id for c in engine.get_recommended_categories(limit=top_n)],
+            top_n=top_n,
+            algorithm_version=ALGORITHM_VERSION,
+        ))
+
+    MaterializedRecommendation.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=['services', 'professionals', 'categories', 'top_n', 'algorithm_version', 'computed_at'],
+    )
+    return len(rows)
+
+
+def _materialize_chunk(args):
+    customer_ids, top_n = args
+    try:
+        return materialize_customers(customer_ids, top_n)
+    finally:
+        connections.close_all()
+
+
+def materialize_recommendations(workers=1, chunk_size=500, top_n=None, customer_ids=None):
+    """
+    Materialize recommendations for every customer (or `customer_ids`)
+    with `workers` processes. Returns (customers, seconds).
+    """
+    if customer_ids is None:
+        customer_ids = CustomerProfile.objects.order_by('id').values_list('id', flat=True)
+    customer_ids = list(customer_ids)
+    chunks = [
+        (customer_ids[i:i + chunk_size], top_n)
+        for i in range(0, len(customer_ids), chunk_size)
+    ]
+
+    started = time.perf_counter()
+    if workers > 1 and len(chunks) > 1:
+        # Children must open their own connections, not share the parent's
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            done = sum(pool.imap_unordered(_materialize_chunk, chunks))
+    else:
+        done = sum(materialize_customers(ids, top_n) for ids, _ in chunks)
+
+    return done, time.perf_counter() - started
+
+
+def invalidate_materialized(customer_id):
+    """Drop the customer's materialized row; they get live results until the next run."""
+    MaterializedRecommendation.objects.filter(customer_id=customer_id).delete()
+
+
+def materialized_recommendations(customer_id, kind, limit):
+    """
+    The customer's stored recommendations of `kind` ('services',
+    'professionals' or 'categories') as model instances, or None when
+    there is no usable row.
+    """
+    stored = MaterializedRecommendation.objects.filter(
+        customer_id=customer_id, algorithm_version=ALGORITHM_VERSION
+    ).values_list(kind, 'top_n').first()
+    if stored is None:
+        return None
+    row, top_n = stored
+    # A list as long as the run's top_n may have been cut short
+    if limit > len(row) and len(row) >= top_n:
+        return None
+
+    if kind == 'services':
+        queryset = Service.objects.filter(
+            is_active=True,
+            professional__is_active=True,
+            professional__verification_status='VERIFIED'
+        ).select_related('professional__user', 'category')
+    elif kind == 'professionals':
+        queryset = Professional.objects.filter(
+            is_active=True,
+            verification_status='VERIFIED'
+        ).select_related('user').prefetch_related('services')
+    else:
+        queryset = ServiceCategory.objects.all()
+
+    objects = queryset.in_bulk(row)
+    return [objects[pk] for pk in row if pk in objects][:limit]
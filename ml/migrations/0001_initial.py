@@ -0,0 +1,101 @@
+# Generated by Django 5.2 on 2026-10-17 17:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('customer', '0003_alter_customerprofile_user'),
+        ('professional', '0003_alter_servicecategory_options'),
+        ('service', '0004_alter_service_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('preferred_categories', models.JSONField(default=list)),
+                ('preferred_price_range', models.JSONField(default=dict)),
+                ('preferred_times', models.JSONField(default=list)),
+                ('preferred_days', models.JSONField(default=list)),
+                ('avg_booking_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('booking_frequency_days', models.FloatField(blank=True, null=True)),
+                ('last_computed_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ml_preferences', to='customer.customerprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfessionalScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_score', models.FloatField(default=0.5)),
+                ('completion_rate_score', models.FloatField(default=0.5)),
+                ('response_time_score', models.FloatField(default=0.5)),
+                ('experience_score', models.FloatField(default=0.5)),
+                ('consistency_score', models.FloatField(default=0.5)),
+                ('overall_score', models.FloatField(default=0.5)),
+                ('bookings_analyzed', models.IntegerField(default=0)),
+                ('last_computed_at', models.DateTimeField(auto_now=True)),
+                ('professional', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ml_score', to='professional.professional')),
+            ],
+            options={
+                'ordering': ['-overall_score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recommendation_type', models.CharField(max_length=50)),
+                ('recommended_items', models.JSONField()),
+                ('selected_item_id', models.IntegerField(blank=True, null=True)),
+                ('algorithm_version', models.CharField(max_length=50)),
+                ('context', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('clicked_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ServiceSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity_score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('service_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities_as_a', to='service.service')),
+                ('service_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities_as_b', to='service.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['service_a', 'similarity_score'], name='ml_services_service_da7913_idx')],
+                'unique_together': {('service_a', 'service_b')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserInteraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interaction_type', models.CharField(choices=[('VIEW', 'Viewed'), ('SEARCH', 'Searched'), ('BOOKMARK', 'Bookmarked'), ('BOOK', 'Booked'), ('COMPLETE', 'Completed'), ('REVIEW', 'Reviewed'), ('CANCEL', 'Cancelled')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('session_id', models.CharField(blank=True, max_length=100)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'interaction_type'], name='ml_userinte_user_id_8b06cc_idx'), models.Index(fields=['content_type', 'object_id'], name='ml_userinte_content_66da2e_idx'), models.Index(fields=['created_at'], name='ml_userinte_created_732271_idx')],
+            },
+        ),
+    ]
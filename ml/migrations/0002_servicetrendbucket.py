@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 17:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0001_initial'),
+        ('professional', '0003_alter_servicecategory_options'),
+        ('service', '0004_alter_service_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceTrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(blank=True, max_length=100)),
+                ('day', models.DateField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='professional.servicecategory')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='service.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'city_key'], name='ml_servicet_day_18d183_idx')],
+                'unique_together': {('service', 'city_key', 'day')},
+            },
+        ),
+    ]
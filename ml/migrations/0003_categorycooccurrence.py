@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0002_servicetrendbucket'),
+        ('professional', '0003_alter_servicecategory_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryCoOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customers', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences_as_a', to='professional.servicecategory')),
+                ('category_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences_as_b', to='professional.servicecategory')),
+            ],
+            options={
+                'unique_together': {('category_a', 'category_b')},
+            },
+        ),
+    ]
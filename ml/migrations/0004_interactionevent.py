@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 18:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0003_categorycooccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteractionEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event_type', models.PositiveSmallIntegerField(choices=[(1, 'Viewed'), (2, 'Searched'), (3, 'Bookmarked')])),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'Service'), (2, 'Professional'), (3, 'Service category')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('session_id', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interaction_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_type', 'object_id'], name='ml_interact_target__0efc49_idx'), models.Index(fields=['created_at'], name='ml_interact_created_99fa59_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-17 18:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0004_interactionevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='userinteraction',
+            options={},
+        ),
+        migrations.CreateModel(
+            name='ObjectActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('interaction_type', models.CharField(choices=[('VIEW', 'Viewed'), ('SEARCH', 'Searched'), ('BOOKMARK', 'Bookmarked'), ('BOOK', 'Booked'), ('COMPLETE', 'Completed'), ('REVIEW', 'Reviewed'), ('CANCEL', 'Cancelled')], max_length=20)),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'Service'), (2, 'Professional'), (3, 'Service category')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_type', 'object_id', 'day'], name='ml_objectac_target__f51d30_idx')],
+                'unique_together': {('day', 'interaction_type', 'target_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InteractionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('interaction_type', models.CharField(choices=[('VIEW', 'Viewed'), ('SEARCH', 'Searched'), ('BOOKMARK', 'Bookmarked'), ('BOOK', 'Booked'), ('COMPLETE', 'Completed'), ('REVIEW', 'Reviewed'), ('CANCEL', 'Cancelled')], max_length=20)),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'Service'), (2, 'Professional'), (3, 'Service category')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interaction_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_type', 'object_id'], name='ml_interact_target__1dc719_idx')],
+                'unique_together': {('day', 'user', 'interaction_type', 'target_type', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_alter_customerprofile_user'),
+        ('ml', '0005_pipelinecheckpoint_alter_userinteraction_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('services', models.JSONField(default=list)),
+                ('professionals', models.JSONField(default=list)),
+                ('categories', models.JSONField(default=list)),
+                ('algorithm_version', models.CharField(max_length=50)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='materialized_recommendations', to='customer.customerprofile')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-17 18:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0006_materializedrecommendation'),
+        ('service', '0004_alter_service_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoVisitationList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('neighbours', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='covisitation_list', to='service.service')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ServiceCoVisitation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('service_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='covisitations_as_a', to='service.service')),
+                ('service_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='covisitations_as_b', to='service.service')),
+            ],
+            options={
+                'unique_together': {('service_a', 'service_b')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 18:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0007_covisitation'),
+        ('professional', '0003_alter_servicecategory_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColdStartList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(blank=True, max_length=100)),
+                ('language', models.CharField(blank=True, max_length=10)),
+                ('services', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cold_start_lists', to='professional.servicecategory')),
+            ],
+            options={
+                'unique_together': {('city_key', 'language', 'category')},
+            },
+        ),
+    ]
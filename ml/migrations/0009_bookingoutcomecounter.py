@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 18:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0008_coldstartlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingOutcomeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject_type', models.PositiveSmallIntegerField(choices=[(1, 'Customer'), (2, 'Professional'), (3, 'Service category')])),
+                ('subject_id', models.PositiveIntegerField()),
+                ('total', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('subject_type', 'subject_id')},
+            },
+        ),
+    ]
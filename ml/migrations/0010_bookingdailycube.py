@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-17 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0009_bookingoutcomecounter'),
+        ('professional', '0003_alter_servicecategory_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('city_key', models.CharField(blank=True, max_length=100)),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('accepted', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('booked_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_cube', to='professional.servicecategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'city_key'], name='ml_bookingd_day_c8bb17_idx')],
+                'unique_together': {('day', 'category', 'city_key', 'hour')},
+            },
+        ),
+    ]
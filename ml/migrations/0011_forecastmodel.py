@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-17 18:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0010_bookingdailycube'),
+        ('professional', '0003_alter_servicecategory_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(blank=True, max_length=100)),
+                ('level', models.FloatField()),
+                ('trend', models.FloatField()),
+                ('seasonal', models.JSONField()),
+                ('alpha', models.FloatField()),
+                ('beta', models.FloatField()),
+                ('gamma', models.FloatField()),
+                ('rmse', models.FloatField()),
+                ('observations', models.IntegerField()),
+                ('fitted_through', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='forecast_models', to='professional.servicecategory')),
+            ],
+            options={
+                'unique_together': {('category', 'city_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0011_forecastmodel'),
+        ('professional', '0003_alter_servicecategory_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingdailycube',
+            index=models.Index(fields=['city_key', 'day'], name='ml_bookingd_city_ke_99af58_idx'),
+        ),
+    ]
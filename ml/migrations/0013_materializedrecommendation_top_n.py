@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0012_bookingdailycube_city_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materializedrecommendation',
+            name='top_n',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 19:29
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing events were already read by the jobs paging on created_at
+    InteractionEvent = apps.get_model('ml', 'InteractionEvent')
+    InteractionEvent.objects.update(ingested_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0013_materializedrecommendation_top_n'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interactionevent',
+            name='ingested_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='interactionevent',
+            index=models.Index(fields=['ingested_at'], name='ml_interact_ingeste_0512f6_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 19:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0014_interactionevent_ingested_at'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='coldstartlist',
+            unique_together={('city_key', 'language')},
+        ),
+        migrations.RemoveField(
+            model_name='coldstartlist',
+            name='category',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 from core.models import User
 
@@ -39,7 +40,6 @@ class UserInteraction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'interaction_type']),
             models.Index(fields=['content_type', 'object_id']),
@@ -162,3 +162,357 @@ class RecommendationLog(models.Model):
 
     def __str__(self):
         return f"{self.recommendation_type} for {self.user} ({self.algorithm_version})"
+
+
+class ServiceTrendBucket(models.Model):
+    """Daily booking count for a service in a city (see ml/trending.py)"""
+
+    service = models.ForeignKey(
+        'service.Service',
+        on_delete=models.CASCADE,
+        related_name='trend_buckets'
+    )
+    category = models.ForeignKey(
+        'professional.ServiceCategory',
+        on_delete=models.CASCADE,
+        related_name='trend_buckets'
+    )
+    city_key = models.CharField(max_length=100, blank=True)  # normalize_city_key(booking.city)
+    day = models.DateField()
+    bookings = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['service', 'city_key', 'day']
+        indexes = [
+            models.Index(fields=['day', 'city_key']),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id} in {self.city_key or 'any city'} on {self.day}: {self.bookings}"
+
+
+class CategoryCoOccurrence(models.Model):
+    """
+    Number of customers with completed bookings in both categories
+    (see ml/cooccurrence.py). Stored in both directions; the diagonal is the
+    number of customers per category.
+    """
+
+    category_a = models.ForeignKey(
+        'professional.ServiceCategory',
+        on_delete=models.CASCADE,
+        related_name='cooccurrences_as_a'
+    )
+    category_b = models.ForeignKey(
+        'professional.ServiceCategory',
+        on_delete=models.CASCADE,
+        related_name='cooccurrences_as_b'
+    )
+    customers = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['category_a', 'category_b']
+
+    def __str__(self):
+        return f"CoOccurrence({self.category_a_id}, {self.category_b_id}) = {self.customers}"
+
+
+class InteractionEvent(models.Model):
+    """
+    Compact log of high-volume interactions (views, searches, bookmarks),
+    written in batches by ml/ingestion.py. Integer codes replace the
+    ContentType and string columns of UserInteraction.
+    """
+
+    VIEW = 1
+    SEARCH = 2
+    BOOKMARK = 3
+    EVENT_TYPES = [
+        (VIEW, 'Viewed'),
+        (SEARCH, 'Searched'),
+        (BOOKMARK, 'Bookmarked'),
+    ]
+
+    SERVICE = 1
+    PROFESSIONAL = 2
+    CATEGORY = 3
+    TARGET_TYPES = [
+        (SERVICE, 'Service'),
+        (PROFESSIONAL, 'Professional'),
+        (CATEGORY, 'Service category'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='interaction_events'
+    )
+    event_type = models.PositiveSmallIntegerField(choices=EVENT_TYPES)
+    target_type = models.PositiveSmallIntegerField(choices=TARGET_TYPES)
+    object_id = models.PositiveIntegerField()
+    session_id = models.CharField(max_length=64, blank=True)
+    # When the event happened (client supplied), and when it was written
+    created_at = models.DateTimeField()
+    ingested_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['target_type', 'object_id']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['ingested_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.get_event_type_display()} on {self.target_type}:{self.object_id}"
+
+
+class InteractionRollup(models.Model):
+    """
+    Daily count of one user's interactions of one type with one object,
+    compacted from UserInteraction and InteractionEvent (see ml/rollups.py).
+    """
+
+    day = models.DateField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='interaction_rollups'
+    )
+    interaction_type = models.CharField(max_length=20, choices=UserInteraction.INTERACTION_TYPES)
+    target_type = models.PositiveSmallIntegerField(choices=InteractionEvent.TARGET_TYPES)
+    object_id = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['day', 'user', 'interaction_type', 'target_type', 'object_id']
+        indexes = [
+            models.Index(fields=['target_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.interaction_type} on {self.target_type}:{self.object_id} ({self.day}): {self.count}"
+
+
+class ObjectActivityRollup(models.Model):
+    """Daily interactions of one type with one object, across all users"""
+
+    day = models.DateField()
+    interaction_type = models.CharField(max_length=20, choices=UserInteraction.INTERACTION_TYPES)
+    target_type = models.PositiveSmallIntegerField(choices=InteractionEvent.TARGET_TYPES)
+    object_id = models.PositiveIntegerField()
+    events = models.PositiveIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['day', 'interaction_type', 'target_type', 'object_id']
+        indexes = [
+            models.Index(fields=['target_type', 'object_id', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.interaction_type} on {self.target_type}:{self.object_id} ({self.day}): {self.events}"
+
+
+class PipelineCheckpoint(models.Model):
+    """How far an incremental ML job has processed its input"""
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class MaterializedRecommendation(models.Model):
+    """Precomputed recommendations for a customer (see ml/materialized.py)"""
+
+    customer = models.OneToOneField(
+        'customer.CustomerProfile',
+        on_delete=models.CASCADE,
+        related_name='materialized_recommendations'
+    )
+
+    # Ranked ids, best first
+    services = models.JSONField(default=list)
+    professionals = models.JSONField(default=list)
+    categories = models.JSONField(default=list)
+    # Longest list asked for; shorter lists hold every candidate there was
+    top_n = models.PositiveIntegerField(default=0)
+
+    algorithm_version = models.CharField(max_length=50)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Materialized recommendations for {self.customer} ({self.algorithm_version})"
+
+
+class ServiceCoVisitation(models.Model):
+    """
+    Decayed count of sessions that viewed both services (see
+    ml/covisitation.py). Stored in both directions; scores are in the units
+    of the current decay epoch, so only their order per service matters.
+    """
+
+    service_a = models.ForeignKey(
+        'service.Service',
+        on_delete=models.CASCADE,
+        related_name='covisitations_as_a'
+    )
+    service_b = models.ForeignKey(
+        'service.Service',
+        on_delete=models.CASCADE,
+        related_name='covisitations_as_b'
+    )
+    score = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['service_a', 'service_b']
+
+    def __str__(self):
+        return f"CoVisitation({self.service_a_id}, {self.service_b_id}) = {self.score:.2f}"
+
+
+class CoVisitationList(models.Model):
+    """Top-K co-visited services of a service, best first"""
+
+    service = models.OneToOneField(
+        'service.Service',
+        on_delete=models.CASCADE,
+        related_name='covisitation_list'
+    )
+    neighbours = models.JSONField(default=list)  # [[service_id, score], ...], top = 1.0
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Co-visited with {self.service_id}: {len(self.neighbours)} services"
+
+
+class ColdStartList(models.Model):
+    """
+    Precomputed services for customers without history (see
+    ml/cold_start.py). A blank city_key or language means "any".
+    """
+
+    city_key = models.CharField(max_length=100, blank=True)
+    language = models.CharField(max_length=10, blank=True)
+    services = models.JSONField(default=list)  # ranked ids, best first
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['city_key', 'language']
+
+    def __str__(self):
+        return f"Cold start ({self.city_key or '*'}, {self.language or '*'})"
+
+
+class BookingOutcomeCounter(models.Model):
+    """
+    Running booking outcome counts per customer, professional or category
+    (see ml/outcomes.py). `cancelled` only counts cancellations by the
+    customer or professional themselves; for a category it counts all.
+    """
+
+    CUSTOMER = 1
+    PROFESSIONAL = 2
+    CATEGORY = 3
+    SUBJECT_TYPES = [
+        (CUSTOMER, 'Customer'),
+        (PROFESSIONAL, 'Professional'),
+        (CATEGORY, 'Service category'),
+    ]
+
+    subject_type = models.PositiveSmallIntegerField(choices=SUBJECT_TYPES)
+    subject_id = models.PositiveIntegerField()
+
+    total = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['subject_type', 'subject_id']
+
+    def __str__(self):
+        return f"{self.get_subject_type_display()} {self.subject_id}: {self.total} bookings"
+
+
+class BookingDailyCube(models.Model):
+    """
+    Bookings per scheduled day, category, city and hour, with counts by
+    status and value sums (see ml/cube.py).
+    """
+
+    day = models.DateField()  # booking.scheduled_date
+    category = models.ForeignKey(
+        'professional.ServiceCategory',
+        on_delete=models.CASCADE,
+        related_name='booking_cube'
+    )
+    city_key = models.CharField(max_length=100, blank=True)  # normalize_city_key(booking.city)
+    hour = models.PositiveSmallIntegerField()  # booking.scheduled_time.hour
+
+    bookings = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    accepted = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    booked_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # estimated prices
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['day', 'category', 'city_key', 'hour']
+        indexes = [
+            models.Index(fields=['day', 'city_key']),
+            models.Index(fields=['city_key', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} in {self.city_key or 'any city'} on {self.day} at {self.hour:02d}h: {self.bookings}"
+
+
+class ForecastModel(models.Model):
+    """
+    Fitted additive Holt-Winters state for one category and city booking
+    series (see ml/forecasting.py). A null category is every category, an
+    empty city_key every city.
+    """
+
+    category = models.ForeignKey(
+        'professional.ServiceCategory',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='forecast_models'
+    )
+    city_key = models.CharField(max_length=100, blank=True)  # normalize_city_key(city)
+
+    level = models.FloatField()
+    trend = models.FloatField()  # per day
+    seasonal = models.JSONField()  # 7 offsets, Monday first
+    alpha = models.FloatField()
+    beta = models.FloatField()
+    gamma = models.FloatField()
+    rmse = models.FloatField()  # one-step-ahead error over the history
+    observations = models.IntegerField()  # bookings in the history
+    fitted_through = models.DateField()  # last day of the history
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['category', 'city_key']
+
+    def __str__(self):
+        return f"Forecast for {self.category_id or 'any category'} in {self.city_key or 'any city'}"
@@ -0,0 +1,122 @@
+"""
+Booking outcome counters for cancellation risk.
+
+Every booking adds to the BookingOutcomeCounter rows of its customer,
+professional and service category when it is created, and moves its
+outcome (cancelled, rejected, completed) along with status changes (see
+ml/recievers.py). Risk prediction then reads a few counter rows instead of
+counting the bookings table. rebuild_outcome_counters() recreates them
+from bookings.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from booking.models import Booking
+from .models import BookingOutcomeCounter
+
+
+CUSTOMER = BookingOutcomeCounter.CUSTOMER
+PROFESSIONAL = BookingOutcomeCounter.PROFESSIONAL
+CATEGORY = BookingOutcomeCounter.CATEGORY
+
+# Booking status -> counted outcome
+OUTCOME_FIELDS = {
+    'CANCELLED': 'cancelled',
+    'REJECTED': 'rejected',
+    'COMPLETED': 'completed',
+}
+
+
+def _add(subject_type, subject_id, **deltas):
+    counters = BookingOutcomeCounter.objects.filter(subject_type=subject_type, subject_id=subject_id)
+    if counters.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        return
+    try:
+        with transaction.atomic():
+            BookingOutcomeCounter.objects.create(
+                subject_type=subject_type, subject_id=subject_id, **deltas
+            )
+    except IntegrityError:
+        # Created concurrently
+        counters.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def _subjects(booking, status):
+    """[(subject_type, subject_id)] whose counts a booking in `status` adds to."""
+    subjects = [(CATEGORY, booking.service.category_id)]
+    if status != 'CANCELLED':
+        return subjects + [(CUSTOMER, booking.customer_id), (PROFESSIONAL, booking.professional_id)]
+
+    # Cancellations only count against whoever cancelled
+    if booking.cancelled_by_id == booking.customer.user_id:
+        subjects.append((CUSTOMER, booking.customer_id))
+    if booking.cancelled_by_id == booking.professional.user_id:
+        subjects.append((PROFESSIONAL, booking.professional_id))
+    return subjects
+
+
+def record_booking_created(booking):
+    for subject_type, subject_id in (
+        (CUSTOMER, booking.customer_id),
+        (PROFESSIONAL, booking.professional_id),
+        (CATEGORY, booking.service.category_id),
+    ):
+        _add(subject_type, subject_id, total=1)
+
+    if booking.status in OUTCOME_FIELDS:
+        record_status_change(booking, None, booking.status)
+
+
+def record_status_change(booking, old_status, new_status):
+    for status, delta in ((old_status, -1), (new_status, 1)):
+        field = OUTCOME_FIELDS.get(status)
+        if field is None:
+            continue
+        for subject_type, subject_id in _subjects(booking, status):
+            _add(subject_type, subject_id, **{field: delta})
+
+
+def rebuild_outcome_counters():
+    """Recreate every counter from bookings. Returns the number of rows."""
+    counters = {}
+
+    def add_rows(subject_type, key, cancelled_filter):
+        rows = Booking.objects.values(key).annotate(
+            total=Count('id'),
+            cancelled=Count('id', filter=cancelled_filter),
+            rejected=Count('id', filter=Q(status='REJECTED')),
+            completed=Count('id', filter=Q(status='COMPLETED')),
+        ).order_by()
+        for row in rows:
+            counters[(subject_type, row[key])] = BookingOutcomeCounter(
+                subject_type=subject_type, subject_id=row[key],
+                total=row['total'], cancelled=row['cancelled'],
+                rejected=row['rejected'], completed=row['completed'],
+            )
+
+    add_rows(CUSTOMER, 'customer_id', Q(status='CANCELLED', cancelled_by_id=F('customer__user_id')))
+    add_rows(PROFESSIONAL, 'professional_id', Q(status='CANCELLED', cancelled_by_id=F('professional__user_id')))
+    add_rows(CATEGORY, 'service__category_id', Q(status='CANCELLED'))
+
+    with transaction.atomic():
+        BookingOutcomeCounter.objects.all().delete()
+        BookingOutcomeCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+    return len(counters)
+
+
+def get_outcome_counters(customer_ids=(), professional_ids=(), category_ids=()):
+    """{(subject_type, subject_id): BookingOutcomeCounter}, in one query."""
+    subjects = Q(pk__in=[])
+    for subject_type, ids in (
+        (CUSTOMER, customer_ids),
+        (PROFESSIONAL, professional_ids),
+        (CATEGORY, category_ids),
+    ):
+        if ids:
+            subjects |= Q(subject_type=subject_type, subject_id__in=set(ids))
+
+    return {
+        (counter.subject_type, counter.subject_id): counter
+        for counter in BookingOutcomeCounter.objects.filter(subjects)
+    }
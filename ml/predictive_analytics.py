@@ -1,10 +1,16 @@
-from django.db.models import Count, Avg, F, Q
+from django.core.cache import cache
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
-from decimal import Decimal
 
 from booking.models import Booking
-from professional.models import Professional
+from core.utils.location import normalize_city_key
+from service.models import Service
+from .cancellation_model import FEATURES, predict_cancellation, risk_features
+from .conf import ml_setting
+from .forecasting import forecast_days, get_forecast_models, series_key
+from .models import BookingDailyCube, CustomerPreference
+from .outcomes import CATEGORY, CUSTOMER, PROFESSIONAL, get_outcome_counters
 
 
 class CancellationRiskPredictor:
@@ -18,132 +24,82 @@ class CancellationRiskPredictor:
         Calculate cancellation risk score (0.0 to 1.0).
         Higher score = higher risk of cancellation.
         """
-        risk_factors = []
+        return self.predict_risk_many([booking])[booking.id]
 
-        # Factor 1: Customer's historical cancellation rate
-        customer_cancellation_rate = self._get_customer_cancellation_rate(
-            booking.customer
-        )
-        risk_factors.append(('customer_history', customer_cancellation_rate, 0.25))
-
-        # Factor 2: Professional's rejection/cancellation rate
-        professional_issue_rate = self._get_professional_issue_rate(
-            booking.professional
-        )
-        risk_factors.append(('professional_history', professional_issue_rate, 0.20))
-
-        # Factor 3: Booking lead time (very short or very long = higher risk)
-        lead_time_risk = self._calculate_lead_time_risk(booking)
-        risk_factors.append(('lead_time', lead_time_risk, 0.15))
+    def predict_risk_many(self, bookings):
+        """
+        Risk for many bookings at once, as {booking_id: risk}.
 
-        # Factor 4: Price deviation from customer's average
-        price_risk = self._calculate_price_risk(booking)
-        risk_factors.append(('price_deviation', price_risk, 0.15))
+        Reads the booking outcome counters (see ml/outcomes.py), stored
+        customer preferences, completed pairings and service categories:
+        four queries whatever the number of bookings. The factors are then
+        scored together (see ml/cancellation_model.py).
+        """
+        bookings = list(bookings)
+        if not bookings:
+            return {}
 
-        # Factor 5: First-time customer-professional pairing
-        is_first_time = self._is_first_time_pairing(booking)
-        risk_factors.append(('first_time', 0.3 if is_first_time else 0.0, 0.10))
+        customer_ids = {b.customer_id for b in bookings}
+        professional_ids = {b.professional_id for b in bookings}
 
-        # Factor 6: Category cancellation rate
-        category_risk = self._get_category_cancellation_rate(
-            booking.service.category_id
+        service_categories = dict(
+            Service.objects.filter(
+                id__in={b.service_id for b in bookings}
+            ).values_list('id', 'category_id')
         )
-        risk_factors.append(('category_rate', category_risk, 0.15))
-
-        # Calculate weighted risk score
-        total_risk = sum(score * weight for _, score, weight in risk_factors)
-
-        return {
-            'risk_score': round(total_risk, 3),
-            'risk_level': self._get_risk_level(total_risk),
-            'factors': {name: round(score, 3) for name, score, _ in risk_factors}
-        }
-
-    def _get_customer_cancellation_rate(self, customer):
-        """Customer's historical cancellation rate."""
-        bookings = Booking.objects.filter(customer=customer)
-        total = bookings.count()
-
-        if total < 3:  # Not enough history
-            return 0.2  # Assume moderate risk
-
-        cancelled = bookings.filter(
-            status='CANCELLED',
-            cancelled_by=customer.user
-        ).count()
-
-        return cancelled / total
-
-    def _get_professional_issue_rate(self, professional):
-        """Professional's rejection + cancellation rate."""
-        bookings = Booking.objects.filter(professional=professional)
-        total = bookings.count()
-
-        if total < 5:
-            return 0.15
 
-        issues = bookings.filter(
-            Q(status='REJECTED') |
-            Q(status='CANCELLED', cancelled_by=professional.user)
-        ).count()
-
-        return issues / total
-
-    def _calculate_lead_time_risk(self, booking):
-        """Risk based on booking lead time."""
-        now = timezone.now().date()
-        days_until = (booking.scheduled_date - now).days
-
-        if days_until < 1:  # Same day - higher risk
-            return 0.4
-        elif days_until < 3:
-            return 0.2
-        elif days_until > 30:  # Very far out
-            return 0.3
-        else:
-            return 0.1
-
-    def _calculate_price_risk(self, booking):
-        """Risk based on price deviation from customer norm."""
-        customer_avg = Booking.objects.filter(
-            customer=booking.customer,
-            status='COMPLETED'
-        ).aggregate(avg=Avg('estimated_price'))['avg']
-
-        if not customer_avg:
-            return 0.1
-
-        deviation = abs(float(booking.estimated_price) - float(customer_avg))
-        deviation_pct = deviation / float(customer_avg)
-
-        # High deviation = higher risk
-        if deviation_pct > 1.0:  # More than 100% different
-            return 0.4
-        elif deviation_pct > 0.5:
-            return 0.3
-        else:
-            return 0.1
-
-    def _is_first_time_pairing(self, booking):
-        """Check if customer and professional have worked together before."""
-        previous = Booking.objects.filter(
-            customer=booking.customer,
-            professional=booking.professional,
-            status='COMPLETED'
-        ).exists()
+        counters = get_outcome_counters(
+            customer_ids=customer_ids,
+            professional_ids=professional_ids,
+            category_ids=set(service_categories.values())
+        )
 
-        return not previous
+        # Average completed booking value
+        avg_prices = dict(
+            CustomerPreference.objects.filter(
+                customer_id__in=customer_ids
+            ).values_list('customer_id', 'avg_booking_value')
+        )
 
-    def _get_category_cancellation_rate(self, category_id):
-        """Cancellation rate for this service category."""
-        bookings = Booking.objects.filter(service__category_id=category_id)
-        total = bookings.count()
+        # Customer-professional pairs that already completed a booking
+        pairings = set(
+            Booking.objects.filter(
+                customer_id__in=customer_ids,
+                professional_id__in=professional_ids,
+                status='COMPLETED'
+            ).values_list('customer_id', 'professional_id').distinct()
+        )
 
-        if total < 10:
-            return 0.15
+        categories = [service_categories.get(b.service_id) for b in bookings]
+        customer = [counters.get((CUSTOMER, b.customer_id)) for b in bookings]
+        professional = [counters.get((PROFESSIONAL, b.professional_id)) for b in bookings]
+        category = [counters.get((CATEGORY, category_id)) for category_id in categories]
+        today = timezone.now().date()
+
+        features = risk_features(
+            customer_total=[c.total if c else 0 for c in customer],
+            customer_cancelled=[c.cancelled if c else 0 for c in customer],
+            professional_total=[c.total if c else 0 for c in professional],
+            professional_issues=[c.rejected + c.cancelled if c else 0 for c in professional],
+            category_total=[c.total if c else 0 for c in category],
+            category_cancelled=[c.cancelled if c else 0 for c in category],
+            days_until=[(b.scheduled_date - today).days for b in bookings],
+            price=[float(b.estimated_price) for b in bookings],
+            avg_price=[float(avg_prices.get(b.customer_id) or 0) for b in bookings],
+            completed_pairings=[int((b.customer_id, b.professional_id) in pairings) for b in bookings],
+        )
+        # Trained model if one is published, hand-set weights otherwise
+        scores = predict_cancellation(features)
+
+        risks = {}
+        for booking, score, factors in zip(bookings, scores.tolist(), features.round(3).tolist()):
+            risks[booking.id] = {
+                'risk_score': round(score, 3),
+                'risk_level': self._get_risk_level(score),
+                'factors': dict(zip(FEATURES, factors))
+            }
 
-        cancelled = bookings.filter(status='CANCELLED').count()
-        return cancelled / total
+        return risks
 
     def _get_risk_level(self, score):
         """Convert score to human-readable level."""
@@ -165,18 +121,25 @@ class DemandForecaster:
     def get_demand_forecast(self, category_id=None, city=None, days_ahead=7):
         """
         Forecast demand for the next N days.
+
+        Uses the series' fitted Holt-Winters model (see ml/forecasting.py)
+        when there is one. Otherwise the booking history is read once, as
+        weekly counts per weekday (see _get_weekly_counts), whatever the
+        number of days.
         """
+        key = series_key(category_id, city)
+        model = get_forecast_models([key]).get(key)
+        if model is not None:
+            return self._model_forecast(model, days_ahead)
+
+        weekly_counts = self._get_weekly_counts(category_id, city)
         forecasts = []
 
         for day_offset in range(days_ahead):
             target_date = timezone.now().date() + timedelta(days=day_offset)
 
             # Get historical data for this day of week
-            historical = self._get_historical_demand(
-                target_date.weekday(),
-                category_id,
-                city
-            )
+            historical = self._get_historical_demand(weekly_counts[target_date.weekday()])
 
             forecasts.append({
                 'date': target_date.isoformat(),
@@ -188,36 +151,82 @@ class DemandForecaster:
 
         return forecasts
 
-    def _get_historical_demand(self, day_of_week, category_id=None, city=None):
+    def get_demand_forecasts(self, series, days_ahead=7):
         """
-        Analyze historical demand for a specific day of week.
+        Forecasts for many [(category_id, city)] series from their fitted
+        models, as {series_key: forecasts}. Series without a model are left out.
         """
-        # Look at last 12 weeks
-        lookback = timezone.now() - timedelta(weeks=12)
+        models = get_forecast_models(series)
+        return {
+            key: self._model_forecast(model, days_ahead)
+            for key, model in models.items()
+        }
 
-        queryset = Booking.objects.filter(
-            created_at__gte=lookback,
-            scheduled_date__week_day=day_of_week + 2  # Django week_day: 1=Sunday
-        )
+    def _model_forecast(self, model, days_ahead):
+        today = timezone.localdate()
+        dates = [today + timedelta(days=day_offset) for day_offset in range(days_ahead)]
 
-        if category_id:
-            queryset = queryset.filter(service__category_id=category_id)
+        # Compare today's level with four weeks ago, as _get_historical_demand does
+        older = model.level - 28 * model.trend
+        if model.level > older * 1.2:
+            trend = 'INCREASING'
+        elif model.level < older * 0.8:
+            trend = 'DECREASING'
+        else:
+            trend = 'STABLE'
 
-        if city:
-            queryset = queryset.filter(city__icontains=city)
+        if model.observations > 50:
+            confidence = 'HIGH'
+        elif model.observations > 20:
+            confidence = 'MEDIUM'
+        else:
+            confidence = 'LOW'
+
+        return [
+            {
+                'date': date.isoformat(),
+                'day_of_week': date.strftime('%A'),
+                'predicted_bookings': round(predicted, 1),
+                'confidence': confidence,
+                'trend': trend
+            }
+            for date, predicted in zip(dates, forecast_days(model, dates))
+        ]
+
+    def _get_weekly_counts(self, category_id=None, city=None, weeks=12):
+        """
+        Bookings scheduled in each of the last `weeks` weeks, by weekday,
+        as {weekday: [count per week, oldest first]} (weekday 0 = Monday).
+        One query on the daily booking cube (see ml/cube.py).
+        """
+        today = timezone.localdate()
+        start = today - timedelta(weeks=weeks)
+
+        rows = self._cube(category_id, city).filter(
+            day__gte=start,
+            day__lt=today
+        ).values('day').annotate(count=Sum('bookings')).order_by()
+
+        weekly_counts = {weekday: [0] * weeks for weekday in range(7)}
+        for row in rows:
+            week = (row['day'] - start).days // 7
+            weekly_counts[row['day'].weekday()][week] += row['count']
 
-        # Group by week
-        weekly_counts = []
-        for week in range(12):
-            week_start = timezone.now() - timedelta(weeks=12-week)
-            week_end = week_start + timedelta(weeks=1)
+        return weekly_counts
 
-            count = queryset.filter(
-                created_at__gte=week_start,
-                created_at__lt=week_end
-            ).count()
-            weekly_counts.append(count)
+    def _cube(self, category_id=None, city=None):
+        queryset = BookingDailyCube.objects.all()
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+        if city:
+            queryset = queryset.filter(city_key=normalize_city_key(city))
+        return queryset
 
+    def _get_historical_demand(self, weekly_counts):
+        """
+        Analyze historical demand for a specific day of week from its
+        weekly booking counts.
+        """
         if not weekly_counts or sum(weekly_counts) == 0:
             return {
                 'avg_bookings': 0,
@@ -257,20 +266,7 @@ class DemandForecaster:
         """
         Identify peak booking hours.
         """
-        lookback = timezone.now() - timedelta(days=90)
-
-        queryset = Booking.objects.filter(created_at__gte=lookback)
-
-        if category_id:
-            queryset = queryset.filter(service__category_id=category_id)
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-
-        # Group by hour
-        hourly_counts = {}
-        for booking in queryset:
-            hour = booking.scheduled_time.hour
-            hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
+        hourly_counts = self._get_hourly_counts(category_id, city)
 
         if not hourly_counts:
             return []
@@ -293,3 +289,24 @@ class DemandForecaster:
             }
             for hour, count in sorted_hours[:5]
         ]
+
+    def _get_hourly_counts(self, category_id=None, city=None):
+        """
+        Bookings per scheduled hour over the 90 days before today, as
+        {hour: count}, summed in the database from the cube and cached per
+        category and city.
+        """
+        category_id, city_key = series_key(category_id, city)
+        key = f"ml:peak_hours:{city_key.replace(' ', '_')}:{category_id or ''}"
+
+        hourly_counts = cache.get(key)
+        if hourly_counts is None:
+            today = timezone.localdate()
+            rows = self._cube(category_id, city_key).filter(
+                day__gte=today - timedelta(days=90),
+                day__lt=today
+            ).values('hour').annotate(count=Sum('bookings')).order_by()
+            hourly_counts = {row['hour']: row['count'] for row in rows if row['count'] > 0}
+            cache.set(key, hourly_counts, ml_setting('PEAK_HOURS_CACHE_TIMEOUT'))
+
+        return hourly_counts
@@ -0,0 +1,154 @@
+"""
+Learns CustomerPreference rows from completed bookings.
+
+All customers (or a given subset) are processed with four grouped queries:
+totals per customer, bookings per category, per hour and per weekday.
+Shares are computed with NumPy and the rows are upserted in bulk.
+"""
+import numpy as np
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import ExtractHour, ExtractWeekDay
+
+from booking.models import Booking
+from .models import CustomerPreference
+
+
+# A time of day or weekday is "preferred" above this share of bookings
+PREFERRED_TIME_SHARE = 0.25
+PREFERRED_DAY_SHARE = 0.2
+
+# Hour ranges [start, end) for each time of day
+TIMES_OF_DAY = [
+    ('morning', 5, 12),
+    ('afternoon', 12, 17),
+    ('evening', 17, 22),
+]
+NIGHT = 'night'
+
+# Django's ExtractWeekDay: 1 = Sunday ... 7 = Saturday
+WEEKDAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+
+def _time_of_day(hour):
+    for name, start, end in TIMES_OF_DAY:
+        if start <= hour < end:
+            return name
+    return NIGHT
+
+
+def _shares(rows, customer_ids):
+    """
+    Turn grouped (customer_id, key, count) rows into per-customer lists
+    of (key, share), largest share first.
+    """
+    rows = np.array(list(rows), dtype=object).reshape(-1, 3)
+    result = {customer_id: [] for customer_id in customer_ids}
+    if len(rows) == 0:
+        return result
+
+    customers = rows[:, 0].astype(np.int64)
+    counts = rows[:, 2].astype(np.float64)
+    totals = np.bincount(np.searchsorted(customer_ids, customers), weights=counts, minlength=len(customer_ids))
+    shares = counts / totals[np.searchsorted(customer_ids, customers)]
+
+    for i in np.lexsort((-shares, customers)):
+        result[customers[i]].append((rows[i, 1], float(shares[i])))
+    return result
+
+
+def _merge(pairs):
+    """Sum shares of pairs that map to the same key, keeping order by share."""
+    merged = {}
+    for key, share in pairs:
+        merged[key] = merged.get(key, 0) + share
+    return sorted(merged.items(), key=lambda item: item[1], reverse=True)
+
+
+def compute_customer_preferences(customer_ids=None):
+    """
+    Recompute preferences for the given customers (default: everyone with
+    a completed booking). Returns the number of rows written.
+    """
+    completed = Booking.objects.filter(status='COMPLETED').order_by()
+    if customer_ids is not None:
+        completed = completed.filter(customer_id__in=list(customer_ids))
+
+    totals = list(
+        completed.values('customer_id').annotate(
+            count=Count('id'),
+            avg_price=Avg('estimated_price'),
+            min_price=Min('estimated_price'),
+            max_price=Max('estimated_price'),
+            first_date=Min('scheduled_date'),
+            last_date=Max('scheduled_date'),
+        ).order_by('customer_id')
+    )
+    if not totals:
+        return 0
+
+    ids = np.array([row['customer_id'] for row in totals], dtype=np.int64)
+
+    categories = _shares(
+        completed.values('customer_id', 'service__category_id').annotate(
+            count=Count('id')
+        ).values_list('customer_id', 'service__category_id', 'count'),
+        ids
+    )
+    hours = _shares(
+        completed.annotate(hour=ExtractHour('scheduled_time')).values(
+            'customer_id', 'hour'
+        ).annotate(count=Count('id')).values_list('customer_id', 'hour', 'count'),
+        ids
+    )
+    weekdays = _shares(
+        completed.annotate(weekday=ExtractWeekDay('scheduled_date')).values(
+            'customer_id', 'weekday'
+        ).annotate(count=Count('id')).values_list('customer_id', 'weekday', 'count'),
+        ids
+    )
+
+    preferences = []
+    for row in totals:
+        customer_id = row['customer_id']
+
+        times = _merge((_time_of_day(hour), share) for hour, share in hours[customer_id])
+        days = _merge((WEEKDAYS[weekday - 1], share) for weekday, share in weekdays[customer_id])
+
+        frequency = None
+        if row['count'] > 1:
+            frequency = (row['last_date'] - row['first_date']).days / (row['count'] - 1)
+
+        preferences.append(CustomerPreference(
+            customer_id=customer_id,
+            preferred_categories=[
+                {'id': category_id, 'weight': round(share, 3)}
+                for category_id, share in categories[customer_id]
+            ],
+            preferred_price_range={
+                'min': float(row['min_price']),
+                'max': float(row['max_price']),
+            },
+            preferred_times=[name for name, share in times if share >= PREFERRED_TIME_SHARE],
+            preferred_days=[name for name, share in days if share >= PREFERRED_DAY_SHARE],
+            avg_booking_value=round(row['avg_price'], 2),
+            booking_frequency_days=frequency,
+        ))
+
+    CustomerPreference.objects.bulk_create(
+        preferences,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=[
+            'preferred_categories', 'preferred_price_range', 'preferred_times',
+            'preferred_days', 'avg_booking_value', 'booking_frequency_days',
+            'last_computed_at',
+        ]
+    )
+
+    return len(preferences)
+
+
+def refresh_customer_preferences(customer_id):
+    """Recompute one customer's preferences, e.g. after a booking completes."""
+    return compute_customer_preferences([customer_id])
@@ -0,0 +1,46 @@
+"""
+Second stage of service recommendations.
+
+Every strategy returns at most CANDIDATE_LIMIT candidates ({service_id:
+score}). blend() merges them with the strategy weights in one vectorized
+pass, drops excluded services and keeps the top K with a heap, so the cost
+of a request depends on the number of candidates, not the catalog size.
+"""
+import heapq
+
+import numpy as np
+
+
+def top_candidates(ids, scores, limit):
+    """The `limit` highest-scoring (ids, scores), unordered."""
+    if len(ids) > limit:
+        keep = np.argpartition(-scores, limit)[:limit]
+        ids, scores = ids[keep], scores[keep]
+    return ids, scores
+
+
+def blend(candidates, weights, exclude_ids=(), limit=10):
+    """
+    Weighted sum of the strategies' candidate scores.
+
+    `candidates` and `weights` are keyed by strategy name. Returns the top
+    `limit` as [(service_id, score)], best first.
+    """
+    ids = [np.fromiter(candidates[name].keys(), dtype=np.int64, count=len(candidates[name]))
+           for name in candidates]
+    scores = [np.fromiter(candidates[name].values(), dtype=np.float64, count=len(candidates[name]))
+              * weights[name] for name in candidates]
+    if not ids:
+        return []
+
+    ids, scores = np.concatenate(ids), np.concatenate(scores)
+    service_ids, inverse = np.unique(ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=scores, minlength=len(service_ids))
+
+    keep = ~np.isin(service_ids, np.fromiter(exclude_ids, dtype=np.int64))
+    return [
+        (int(service_id), float(score))
+        for score, service_id in heapq.nlargest(
+            limit, zip(totals[keep].tolist(), service_ids[keep].tolist())
+        )
+    ]
@@ -0,0 +1,98 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from booking.models import Booking
+from booking.signals import booking_created, booking_status_changed
+from professional.models import Professional, ServiceCategory
+from review.models import Review
+from service.models import Service
+from .cooccurrence import invalidate_category_cooccurrence, record_completed_booking
+from .cube import add_booking_to_cube, move_booking_in_cube, relocate_booking_in_cube
+from .features import invalidate_service_features
+from .materialized import invalidate_materialized
+from .outcomes import record_booking_created, record_status_change
+from .preferences import refresh_customer_preferences
+from .recommendation_cache import invalidate_recommendations
+from .trending import (
+    COUNTED_STATUSES, move_booking_in_trending, record_booking, relocate_booking_in_trending
+)
+
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Professional)
+def refresh_service_features(sender, **kwargs):
+    invalidate_service_features()
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+def refresh_category_cooccurrence(sender, **kwargs):
+    invalidate_category_cooccurrence()
+
+
+@receiver(booking_created, sender=Booking)
+@receiver(booking_status_changed, sender=Booking)
+def refresh_customer_recommendations(sender, booking, **kwargs):
+    invalidate_recommendations(booking.customer_id)
+    invalidate_materialized(booking.customer_id)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def learn_from_completed_booking(sender, booking, new_status, **kwargs):
+    if new_status == 'COMPLETED':
+        refresh_customer_preferences(booking.customer_id)
+        record_completed_booking(booking)
+
+
+@receiver(booking_created, sender=Booking)
+def count_trending_booking(sender, booking, **kwargs):
+    if booking.status in COUNTED_STATUSES:
+        record_booking(booking)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def update_trending_booking(sender, booking, old_status, new_status, **kwargs):
+    move_booking_in_trending(booking, old_status, new_status)
+
+
+@receiver(booking_created, sender=Booking)
+def count_booking_outcome(sender, booking, **kwargs):
+    record_booking_created(booking)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def update_booking_outcome(sender, booking, old_status, new_status, **kwargs):
+    record_status_change(booking, old_status, new_status)
+
+
+@receiver(booking_created, sender=Booking)
+def count_booking_in_cube(sender, booking, **kwargs):
+    add_booking_to_cube(booking)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def update_booking_cube(sender, booking, old_status, new_status, **kwargs):
+    move_booking_in_cube(booking, old_status, new_status)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_stored_booking(sender, instance, **kwargs):
+    # The values the booking was counted under, for edits below
+    instance._stored = (
+        Booking.objects.select_related('service').filter(pk=instance.pk).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Booking)
+def relocate_edited_booking(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored', None)
+    if not created and stored is not None:
+        relocate_booking_in_cube(stored, instance)
+        relocate_booking_in_trending(stored, instance)
+
+
+@receiver(post_save, sender=Review)
+def refresh_recommendations_after_review(sender, instance, created, **kwargs):
+    if created:
+        invalidate_recommendations(instance.booking.customer_id)
+        invalidate_materialized(instance.booking.customer_id)
@@ -0,0 +1,84 @@
+"""
+Per-customer cache of serialized recommendation responses.
+
+Keys combine the customer, endpoint, request parameters, algorithm version
+and a per-customer generation token. Booking and review events replace the
+token (see ml/recievers.py), which orphans every cached entry for that
+customer at once.
+
+Stampedes are avoided with a short lock (cache.add): only one request
+computes a missing entry while the others wait for it, and entries are
+refreshed slightly before they expire while the stale value keeps being
+served.
+"""
+import random
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from .conf import ml_setting
+from .recommendation_engine import ALGORITHM_VERSION
+
+
+LOCK_TIMEOUT = 30  # seconds
+WAIT_INTERVAL = 0.05  # seconds
+WAIT_ATTEMPTS = 20
+
+
+def _generation_key(customer_id):
+    return f'ml:recs:{customer_id}:generation'
+
+
+def _generation(customer_id):
+    key = _generation_key(customer_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_recommendations(customer_id):
+    """Drop every cached recommendation for the customer."""
+    cache.set(_generation_key(customer_id), uuid4().hex, timeout=None)
+
+
+def cached_recommendations(customer_id, endpoint, params, compute):
+    """
+    Return compute()'s result for the customer, cached.
+    compute() must return something picklable (e.g. serializer data).
+    """
+    params = ':'.join(f'{name}={params[name]}' for name in sorted(params))
+    key = f'ml:recs:{customer_id}:{endpoint}:{params}:{ALGORITHM_VERSION}:{_generation(customer_id)}'
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, refresh_at = entry
+        if time.time() < refresh_at:
+            return value
+        # Stale: one caller refreshes, the others keep serving it
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            return value
+    else:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            for _ in range(WAIT_ATTEMPTS):
+                time.sleep(WAIT_INTERVAL)
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+
+    try:
+        value = compute()
+        timeout = ml_setting('RECOMMENDATION_CACHE_TIMEOUT')
+        # Refresh a little before the hard expiry, at a random point
+        refresh_at = time.time() + timeout * random.uniform(0.8, 0.9)
+        cache.set(key, (value, refresh_at), timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+    return value
@@ -1,14 +1,83 @@
-from django.db.models import Count, Avg, Q, F
-from django.contrib.contenttypes.models import ContentType
-from decimal import Decimal
-import math
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+from django.db import connections
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+import numpy as np
 
 from service.models import Service
 from professional.models import Professional, ServiceCategory
 from booking.models import Booking
-from customer.models import CustomerProfile
-from .models import UserInteraction, ServiceSimilarity, CustomerPreference
+from core.utils.spatial_index import get_professional_index
+from .models import (
+    ServiceSimilarity, CustomerPreference, RecommendationLog, CoVisitationList
+)
+from .artifacts import loaded_versions
+from .conf import DEFAULTS, ml_setting
+from .interactions import get_interaction_matrix
+from .features import get_service_features
+from .cooccurrence import get_category_cooccurrence
+from .scoring import NEUTRAL_SCORE
+from .trending import get_trending_services
+from .ranking import blend, top_candidates
+from .cold_start import cold_start_services
+
+
+# Bump when scoring changes so cached and logged results can be told apart
+ALGORITHM_VERSION = 'hybrid-v1'
+
+# Share of the professional ranking given to live distance
+DISTANCE_WEIGHT = 0.15
+
+# (name, method, weight) of the blended service strategies
+STRATEGIES = [
+    ('collaborative', '_collaborative_filtering_services', 0.4),
+    ('content', '_content_based_services', 0.3),
+    ('location', '_location_based_services', 0.2),
+    ('popularity', '_popularity_based_services', 0.1),
+]
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Strategies submitted to the pool and not finished yet
+_in_flight = 0
+
+
+def _strategy_executor():
+    """Process-wide pool shared by every request running strategies in threads."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ml_setting('STRATEGY_WORKERS'),
+                    thread_name_prefix='recommendation-strategy'
+                )
+    return _executor
+
+
+def _claim_strategy_slot():
+    """
+    Reserve a pool thread for one strategy. Returns False when every thread
+    is still busy, e.g. with strategies that timed out, so nothing queues.
+    """
+    global _in_flight
+    with _executor_lock:
+        if _in_flight >= ml_setting('STRATEGY_WORKERS'):
+            return False
+        _in_flight += 1
+        return True
+
 
+def _release_strategy_slot(future):
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
 
 
 class RecommendationEngine:
@@ -23,55 +92,116 @@ class RecommendationEngine:
     5. Hybrid - Combination of above strategies
     """
 
-    def __init__(self, customer_profile):
+    def __init__(self, customer_profile, log=True):
         self.customer = customer_profile
         self.user = customer_profile.user
+        # Batch jobs pass log=False to skip RecommendationLog rows
+        self.log = log
+        self.strategy_results = {}
+        self.strategy_timings = {}
+
+    def _run_strategies(self):
+        """Fill strategy_results and strategy_timings for every strategy."""
+        if ml_setting('STRATEGY_EXECUTION') == 'threads':
+            started = time.monotonic()
+            timeouts = {**DEFAULTS['STRATEGY_TIMEOUTS'], **ml_setting('STRATEGY_TIMEOUTS')}
+            futures = {}
+            for name, method, weight in STRATEGIES:
+                if _claim_strategy_slot():
+                    futures[name] = _strategy_executor().submit(self._call_strategy_in_thread, method)
+                    futures[name].add_done_callback(_release_strategy_slot)
+                else:
+                    futures[name] = None
+
+            for name, future in futures.items():
+                if future is None:
+                    logger.warning("Recommendation strategy %s skipped: all strategy threads are busy", name)
+                    self._record_strategy(name, {}, 'busy', 0)
+                    continue
+                remaining = started + timeouts[name] - time.monotonic()
+                try:
+                    results, status, elapsed = future.result(timeout=max(remaining, 0))
+                except TimeoutError:
+                    future.cancel()
+                    results, status, elapsed = {}, 'timeout', (time.monotonic() - started) * 1000
+                    logger.warning(
+                        "Recommendation strategy %s timed out; %d strategy threads still running",
+                        name, _in_flight
+                    )
+                self._record_strategy(name, results, status, elapsed)
+        else:
+            for name, method, weight in STRATEGIES:
+                self._record_strategy(name, *self._call_strategy(method))
+
+    def _call_strategy(self, method):
+        started = time.perf_counter()
+        try:
+            results, status = getattr(self, method)(), 'ok'
+        except Exception:
+            logger.exception("Recommendation strategy %s failed", method)
+            results, status = {}, 'error'
+        return results, status, (time.perf_counter() - started) * 1000
+
+    def _call_strategy_in_thread(self, method):
+        try:
+            return self._call_strategy(method)
+        finally:
+            # Pool threads are long-lived; don't leave a connection open
+            connections.close_all()
+
+    def _record_strategy(self, name, results, status, elapsed_ms):
+        self.strategy_results[name] = results
+        self.strategy_timings[name] = {
+            'status': status,
+            'ms': round(elapsed_ms, 2),
+            'candidates': len(results),
+        }
 
     def get_recommended_services(self, limit=10):
         """
         Get personalized service recommendations for the customer.
         Uses a hybrid approach combining multiple strategies.
+
+        Strategies run one after another, or in a shared thread pool when
+        ML_SETTINGS['STRATEGY_EXECUTION'] is 'threads'. A strategy that
+        fails, exceeds its timeout or finds no free pool thread contributes
+        nothing; see self.strategy_timings.
+
+        Each strategy returns at most CANDIDATE_LIMIT candidates, which are
+        blended and cut to `limit` by ml/ranking.py.
+
+        Customers without history get a precomputed cold start list instead,
+        when one has been built (see ml/cold_start.py).
         """
-        scores = {}
-
-        # Strategy 1: Collaborative filtering (40% weight)
-        collab_services = self._collaborative_filtering_services()
-        for service_id, score in collab_services.items():
-            scores[service_id] = scores.get(service_id, 0) + (score * 0.4)
-
-        # Strategy 2: Content-based from booking history (30% weight)
-        content_services = self._content_based_services()
-        for service_id, score in content_services.items():
-            scores[service_id] = scores.get(service_id, 0) + (score * 0.3)
-
-        # Strategy 3: Location-based (20% weight)
-        location_services = self._location_based_services()
-        for service_id, score in location_services.items():
-            scores[service_id] = scores.get(service_id, 0) + (score * 0.2)
-
-        # Strategy 4: Popularity/trending (10% weight)
-        popular_services = self._popularity_based_services()
-        for service_id, score in popular_services.items():
-            scores[service_id] = scores.get(service_id, 0) + (score * 0.1)
-
-        # Remove already booked services
-        booked_service_ids = Booking.objects.filter(
+        # Already booked services are excluded
+        booked_service_ids = set(Booking.objects.filter(
             customer=self.customer
-        ).values_list('service_id', flat=True)
+        ).values_list('service_id', flat=True).distinct())
+
+        if not booked_service_ids and self._is_cold_start():
+            recommended = self._cold_start_services(limit)
+            if recommended is not None:
+                return recommended
+
+        self._run_strategies()
+
+        # Blend the strategies: collaborative 40%, content-based 30%,
+        # location 20%, popularity 10%. Ask for a few spare rows in case
+        # some services were deactivated since the candidates were built.
+        ranked = blend(
+            self.strategy_results,
+            {name: weight for name, method, weight in STRATEGIES},
+            exclude_ids=booked_service_ids,
+            limit=limit * 2
+        )
 
-        for service_id in booked_service_ids:
-            scores.pop(service_id, None)
+        recommended = self._fetch_services([s[0] for s in ranked], limit)
 
-        # Sort by score and return top N
-        sorted_services = sorted(
-            scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        self._log('services', recommended, limit=limit)
+        return recommended
 
-        service_ids = [s[0] for s in sorted_services]
-
-        # Fetch services preserving order
+    def _fetch_services(self, service_ids, limit):
+        """The first `limit` available services of service_ids, in order."""
         services = Service.objects.filter(
             id__in=service_ids,
             is_active=True,
@@ -81,176 +211,151 @@ class RecommendationEngine:
 
         # Preserve recommendation order
         service_dict = {s.id: s for s in services}
-        return [service_dict[sid] for sid in service_ids if sid in service_dict]
+        return [service_dict[sid] for sid in service_ids if sid in service_dict][:limit]
+
+    def _is_cold_start(self):
+        """
+        Whether no strategy but popularity could find anything: no
+        coordinates, no preferences and no tracked interactions. The caller
+        checks bookings.
+        """
+        if self.customer.latitude and self.customer.longitude:
+            return False
+        if CustomerPreference.objects.filter(customer=self.customer).exists():
+            return False
+        return not get_interaction_matrix().has_customer(self.customer.id)
+
+    def _cold_start_services(self, limit):
+        """
+        The cold start list for the customer, or None if none was built or
+        none of its services is still available.
+        """
+        started = time.perf_counter()
+        service_ids = cold_start_services(
+            city=self.customer.city,
+            language=self.customer.preferred_language
+        )
+        if not service_ids:
+            return None
+
+        recommended = self._fetch_services(service_ids, limit)
+        if not recommended:
+            return None
+
+        self.strategy_timings['cold_start'] = {
+            'status': 'ok',
+            'ms': round((time.perf_counter() - started) * 1000, 2),
+            'candidates': len(service_ids),
+        }
+        self._log('services', recommended, limit=limit, cold_start=True)
+        return recommended
     
     def _collaborative_filtering_services(self):
         """
         Find services booked by users with similar booking patterns.
         "Customers who booked X also booked Y"
-        """
-        scores = {}
 
-        # Get categories the customer has booked
-        customer_categories = Booking.objects.filter(
-            customer=self.customer,
-            status='COMPLETED'
-        ).values_list('service__category_id', flat=True).distinct()
+        Item-item cosine over the sparse customer x service matrix.
+        """
+        scores = get_interaction_matrix().similar_item_scores(
+            self.customer.id, limit=ml_setting('CANDIDATE_LIMIT')
+        )
 
-        if not customer_categories:
+        if not scores:
             return scores
 
-        # Find other customers who booked same categories
-        similar_customers = CustomerProfile.objects.filter(
-            bookings__service__category_id__in=customer_categories,
-            bookings__status='COMPLETED'
-        ).exclude(id=self.customer.id).distinct()[:100]
-
-        # Get services those customers booked
-        similar_bookings = Booking.objects.filter(
-            customer__in=similar_customers,
-            status='COMPLETED'
-        ).exclude(
-            service__category_id__in=customer_categories
-        ).values('service_id').annotate(
-            count=Count('id')
-        ).order_by('-count')[:50]
-
-        max_count = similar_bookings[0]['count'] if similar_bookings else 1
-
-        for booking in similar_bookings:
-            # Normalize score to 0-1
-            scores[booking['service_id']] = booking['count'] / max_count
-
-        return scores
+        # Normalize score to 0-1
+        max_score = max(scores.values())
+        return {service_id: score / max_score for service_id, score in scores.items()}
     
     def _content_based_services(self):
         """
         Recommend services similar to what customer has booked.
         Based on category, price range, professional rating.
-        """
-        scores = {}
-
-        # Get customer's booking history
-        past_bookings = Booking.objects.filter(
-            customer=self.customer,
-            status='COMPLETED'
-        ).select_related('service', 'service__category')
-
-        if not past_bookings:
-            return scores
-
-        # Calculate customer's preferences
-        booked_categories = set()
-        avg_price = Decimal('0')
-        total_price = Decimal('0')
-
-        for booking in past_bookings:
-            booked_categories.add(booking.service.category_id)
-            total_price += booking.estimated_price
 
-        avg_price = total_price / len(past_bookings) if past_bookings else Decimal('0')
-        price_tolerance = avg_price * Decimal('0.5')  # 50% tolerance
-
-        # Find similar services
-        similar_services = Service.objects.filter(
-            is_active=True,
-            professional__is_active=True,
-            professional__verification_status='VERIFIED'
-        ).exclude(
-            bookings__customer=self.customer
+        Scored with array operations over the cached service feature table,
+        using the customer's stored preferences (see ml/preferences.py).
+        Already booked services are dropped by the caller.
+        """
+        try:
+            preferences = self.customer.ml_preferences
+        except CustomerPreference.DoesNotExist:
+            return {}
+
+        category_weights = {
+            category['id']: category['weight']
+            for category in preferences.preferred_categories
+        }
+        if not category_weights:
+            return {}
+
+        return get_service_features().content_scores(
+            category_weights,
+            float(preferences.avg_booking_value or 0),
+            limit=ml_setting('CANDIDATE_LIMIT')
         )
-
-        for service in similar_services:
-            score = 0.0
-
-            # Category match (high weight)
-            if service.category_id in booked_categories:
-                score += 0.5
-
-            # Price similarity
-            price_diff = abs(service.price_per_unit - avg_price)
-            if price_diff <= price_tolerance:
-                price_score = 1 - (float(price_diff) / float(price_tolerance))
-                score += 0.3 * price_score
-
-            # Professional rating boost
-            if service.professional.avg_rating:
-                rating_score = service.professional.avg_rating / 5.0
-                score += 0.2 * rating_score
-
-            if score > 0:
-                scores[service.id] = score
-
-        return scores
     
     def _location_based_services(self):
         """
         Recommend services from professionals near the customer.
         """
-        scores = {}
-
         if not self.customer.latitude or not self.customer.longitude:
-            return scores
-
-        customer_lat = float(self.customer.latitude)
-        customer_lon = float(self.customer.longitude)
-
-        # Get nearby professionals (within ~50km)
-        professionals = Professional.objects.filter(
-            is_active=True,
-            verification_status='VERIFIED',
-            latitude__isnull=False,
-            longitude__isnull=False
+            return {}
+
+        # Get nearby professionals (within 50km)
+        professional_ids, distances = get_professional_index().within_radius(
+            float(self.customer.latitude),
+            float(self.customer.longitude),
+            50,
+            active_only=True
         )
 
-        for professional in professionals:
-            distance = self._haversine_distance(
-                customer_lat, customer_lon,
-                float(professional.latitude), float(professional.longitude)
-            )
+        if not len(professional_ids):
+            return {}
 
-            # Score inversely proportional to distance (max 50km)
-            if distance <= 50:
-                distance_score = 1 - (distance / 50)
+        # Score inversely proportional to distance, per professional
+        order = np.argsort(professional_ids)
+        professional_ids = professional_ids[order]
+        distance_scores = 1 - (distances[order] / 50)
 
-                # Get services from this professional
-                for service in professional.services_offered.filter(is_active=True):
-                    scores[service.id] = max(
-                        scores.get(service.id, 0),
-                        distance_score
-                    )
+        # Map their active services onto those scores
+        table = get_service_features()
+        services = np.flatnonzero(table.active & np.isin(table.professionals, professional_ids))
+        scores = distance_scores[np.searchsorted(professional_ids, table.professionals[services])]
+        services, scores = top_candidates(services, scores, ml_setting('CANDIDATE_LIMIT'))
 
-        return scores
+        return {
+            int(service_id): float(score)
+            for service_id, score in zip(table.ids[services], scores)
+        }
     
     def _popularity_based_services(self):
         """
         Recommend trending/popular services based on recent bookings.
-        """
-        from django.utils import timezone
-        from datetime import timedelta
 
-        scores = {}
-
-        # Get services with most bookings in last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        Reads the cached trending list for the customer's city (falling back
+        to all cities), see ml/trending.py.
+        """
+        limit = ml_setting('CANDIDATE_LIMIT')
+        trending = (
+            get_trending_services(city=self.customer.city, limit=limit) or
+            get_trending_services(limit=limit)
+        )
+        if not trending:
+            return {}
 
-        popular = Booking.objects.filter(
-            created_at__gte=thirty_days_ago,
-            status__in=['COMPLETED', 'ACCEPTED', 'IN_PROGRESS']
-        ).values('service_id').annotate(
-            booking_count=Count('id'),
-            avg_rating=Avg('professional__avg_rating')
-        ).order_by('-booking_count')[:50]
+        service_ids = np.array([item[0] for item in trending], dtype=np.int64)
+        counts = np.array([item[1] for item in trending], dtype=np.float64)
 
-        max_count = popular[0]['booking_count'] if popular else 1
+        table = get_service_features()
+        positions = table.positions(service_ids)
+        ratings = np.full(len(service_ids), 3.0)
+        ratings[positions >= 0] = table.ratings[positions[positions >= 0]]
 
-        for item in popular:
-            # Combine booking count and rating
-            count_score = item['booking_count'] / max_count
-            rating_score = (item['avg_rating'] or 3.0) / 5.0
-            scores[item['service_id']] = (count_score * 0.7) + (rating_score * 0.3)
+        # Combine decayed booking count and rating
+        scores = (counts / counts.max()) * 0.7 + (ratings / 5.0) * 0.3
 
-        return scores
+        return dict(zip(service_ids.tolist(), scores.tolist()))
     
     # PROFESSIONAL RECOMMENDATIONS
 
@@ -258,9 +363,11 @@ class RecommendationEngine:
         """
         Get recommended professionals for the customer.
         Optionally filter by category.
-        """
-        scores = {}
 
+        Ranks by the stored ProfessionalScore (see compute_professional_scores)
+        plus a live distance term, over the top `limit` stored scores and
+        the nearest CANDIDATE_LIMIT professionals.
+        """
         queryset = Professional.objects.filter(
             is_active=True,
             verification_status='VERIFIED'
@@ -269,11 +376,35 @@ class RecommendationEngine:
         if category_id:
             queryset = queryset.filter(services__id=category_id)
 
-        queryset = queryset.select_related('user').prefetch_related('services')
+        queryset = queryset.annotate(
+            quality=Coalesce('ml_score__overall_score', Value(NEUTRAL_SCORE))
+        )
+
+        # Best stored scores; everyone else can only climb via distance
+        scores = {
+            professional_id: quality * (1 - DISTANCE_WEIGHT)
+            for professional_id, quality in queryset.order_by('-quality').values_list('id', 'quality')[:limit]
+        }
+
+        # Location proximity component (within 50km)
+        if self.customer.latitude and self.customer.longitude:
+            nearby_ids, distances = get_professional_index().within_radius(
+                float(self.customer.latitude),
+                float(self.customer.longitude),
+                50,
+                active_only=True
+            )
+            nearby_ids, distance_scores = top_candidates(
+                nearby_ids, 1 - distances / 50, ml_setting('CANDIDATE_LIMIT')
+            )
+            distance_scores = dict(zip(nearby_ids.tolist(), distance_scores.tolist()))
 
-        for professional in queryset:
-            score = self._calculate_professional_score(professional)
-            scores[professional.id] = score
+            nearby = queryset.filter(id__in=distance_scores).values_list('id', 'quality')
+            for professional_id, quality in nearby:
+                scores[professional_id] = (
+                    quality * (1 - DISTANCE_WEIGHT) +
+                    distance_scores[professional_id] * DISTANCE_WEIGHT
+                )
 
         # Sort by score
         sorted_professionals = sorted(
@@ -285,51 +416,14 @@ class RecommendationEngine:
         professional_ids = [p[0] for p in sorted_professionals]
 
         # Fetch and preserve order
-        professional_dict = {p.id: p for p in queryset.filter(id__in=professional_ids)}
-        return [professional_dict[pid] for pid in professional_ids if pid in professional_dict]
-    
-    def _calculate_professional_score(self, professional):
-        """
-        Calculate a composite score for a professional.
-        """
-        score = 0.0
-
-        # Rating component (30%)
-        if professional.avg_rating:
-            score += (professional.avg_rating / 5.0) * 0.3
-
-        # Experience component (15%)
-        exp_years = professional.years_of_experience or 0
-        exp_score = min(exp_years / 10, 1.0)  # Cap at 10 years
-        score += exp_score * 0.15
-
-        # Review count component (15%)
-        reviews = professional.total_reviews or 0
-        review_score = min(reviews / 50, 1.0)  # Cap at 50 reviews
-        score += review_score * 0.15
-
-        # Completion rate component (25%)
-        total_bookings = Booking.objects.filter(professional=professional).count()
-        completed_bookings = Booking.objects.filter(
-            professional=professional,
-            status='COMPLETED'
-        ).count()
-
-        if total_bookings > 0:
-            completion_rate = completed_bookings / total_bookings
-            score += completion_rate * 0.25
-
-        # Location proximity component (15%)
-        if self.customer.latitude and professional.latitude:
-            distance = self._haversine_distance(
-                float(self.customer.latitude), float(self.customer.longitude),
-                float(professional.latitude), float(professional.longitude)
-            )
-            if distance <= 50:
-                distance_score = 1 - (distance / 50)
-                score += distance_score * 0.15
-
-        return score
+        professionals = queryset.filter(id__in=professional_ids).select_related(
+            'user'
+        ).prefetch_related('services')
+        professional_dict = {p.id: p for p in professionals}
+        recommended = [professional_dict[pid] for pid in professional_ids if pid in professional_dict]
+
+        self._log('professionals', recommended, limit=limit, category_id=category_id)
+        return recommended
     
     # "SIMILAR SERVICES" RECOMMENDATIONS
 
@@ -337,125 +431,87 @@ class RecommendationEngine:
         """
         Get services similar to a given service.
         Useful for "You may also like" sections.
+
+        Reads the neighbours precomputed by `manage.py build_service_similarity`.
         """
-        try:
-            service = Service.objects.get(id=service_id)
-        except Service.DoesNotExist:
-            return []
+        neighbours = ServiceSimilarity.objects.filter(
+            service_a_id=service_id,
+            service_b__is_active=True,
+            service_b__professional__is_active=True,
+            service_b__professional__verification_status='VERIFIED'
+        ).select_related(
+            'service_b__professional__user', 'service_b__category'
+        ).order_by('-similarity_score')[:limit]
+
+        return [neighbour.service_b for neighbour in neighbours]
+
+    def get_also_viewed_services(self, service_id, limit=5):
+        """
+        Get services viewed in the same sessions as a given service.
+        "Customers who viewed this also viewed"
 
-        scores = {}
+        Reads the neighbour list kept by `manage.py update_covisitation`.
+        """
+        neighbours = CoVisitationList.objects.filter(
+            service_id=service_id
+        ).values_list('neighbours', flat=True).first() or []
 
-        # Same category services
-        same_category = Service.objects.filter(
-            category=service.category,
+        service_ids = [service_id for service_id, _ in neighbours]
+        services = Service.objects.filter(
+            id__in=service_ids,
             is_active=True,
             professional__is_active=True,
             professional__verification_status='VERIFIED'
-        ).exclude(id=service_id)
-
-        for similar in same_category:
-            score = 0.5  # Base score for same category
-
-            # Price similarity
-            price_diff = abs(similar.price_per_unit - service.price_per_unit)
-            max_price = max(similar.price_per_unit, service.price_per_unit)
-            if max_price > 0:
-                price_similarity = 1 - (float(price_diff) / float(max_price))
-                score += price_similarity * 0.3
-
-            # Professional rating
-            if similar.professional.avg_rating:
-                score += (similar.professional.avg_rating / 5.0) * 0.2
-
-            scores[similar.id] = score
-
-        # Sort and return
-        sorted_services = sorted(
-            scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        ).select_related('professional__user', 'category').in_bulk()
 
-        service_ids = [s[0] for s in sorted_services]
-        services = Service.objects.filter(id__in=service_ids).select_related(
-            'professional__user', 'category'
-        )
-
-        service_dict = {s.id: s for s in services}
-        return [service_dict[sid] for sid in service_ids if sid in service_dict]
+        return [services[sid] for sid in service_ids if sid in services][:limit]
     
     # CATEGORY RECOMMENDATIONS
     def get_recommended_categories(self, limit=5):
         """
         Recommend service categories the customer might be interested in.
-        """
-        scores = {}
 
+        Sums the precomputed co-booking rows (see ml/cooccurrence.py) of the
+        categories the customer has booked.
+        """
         # Get customer's booked categories
         booked_categories = set(
             Booking.objects.filter(
                 customer=self.customer
-            ).values_list('service__category_id', flat=True)
+            ).values_list('service__category_id', flat=True).distinct()
         )
 
-        # All categories except booked ones
-        all_categories = ServiceCategory.objects.exclude(id__in=booked_categories)
-
         # Find categories often booked together
-        for booked_cat_id in booked_categories:
-            # Customers who booked this category also booked...
-            co_booked = Booking.objects.filter(
-                customer__bookings__service__category_id=booked_cat_id,
-                status='COMPLETED'
-            ).exclude(
-                service__category_id=booked_cat_id
-            ).values('service__category_id').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
-
-            for item in co_booked:
-                cat_id = item['service__category_id']
-                if cat_id not in booked_categories:
-                    scores[cat_id] = scores.get(cat_id, 0) + item['count']
-
-        # Normalize scores
-        max_score = max(scores.values()) if scores else 1
-        for cat_id in scores:
-            scores[cat_id] = scores[cat_id] / max_score
-
-        # Sort and return
-        sorted_categories = sorted(
-            scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        scores = get_category_cooccurrence().recommend(booked_categories, limit=limit)
 
-        category_ids = [c[0] for c in sorted_categories]
+        category_ids = [c[0] for c in scores]
         categories = ServiceCategory.objects.filter(id__in=category_ids)
 
         cat_dict = {c.id: c for c in categories}
-        return [cat_dict[cid] for cid in category_ids if cid in cat_dict]
+        recommended = [cat_dict[cid] for cid in category_ids if cid in cat_dict]
+
+        self._log('categories', recommended, limit=limit)
+        return recommended
 
     # UTILITY METHODS
 
-    def _haversine_distance(self, lat1, lon1, lat2, lon2):
+    def _log(self, recommendation_type, items, **context):
         """
-        Calculate distance between two points in kilometers.
+        Record what was recommended, with the algorithm and artifact
+        versions that produced it.
         """
-        R = 6371  # Earth's radius in kilometers
-
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+        if not self.log:
+            return
+
+        RecommendationLog.objects.create(
+            user_id=self.customer.user_id,
+            recommendation_type=recommendation_type,
+            recommended_items=[item.id for item in items],
+            algorithm_version=ALGORITHM_VERSION,
+            context={**context, 'artifacts': loaded_versions()}
+        )
 
-        a = (math.sin(delta_lat / 2) ** 2 +
-             math.cos(lat1_rad) * math.cos(lat2_rad) *
-             math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
-        return R * c
-    
 class ProfessionalRecommendationEngine:
     """
     Recommendations for professionals.
@@ -0,0 +1,230 @@
+"""
+Daily rollups, compaction and retention for the raw interaction logs.
+
+compact_interactions() rolls every finished day of UserInteraction and
+InteractionEvent rows into InteractionRollup (per user, object, type and
+day) and ObjectActivityRollup (per object, type and day), one transaction
+per day, and records how far it got in a PipelineCheckpoint. It then
+deletes raw rows past INTERACTION_RAW_RETENTION_DAYS that are already
+rolled up, and rollups past INTERACTION_ROLLUP_RETENTION_DAYS, in small
+chunks so no delete holds locks for long.
+
+Readers combine the rollups with the raw rows after the checkpoint, so
+nothing is missed between compaction runs. The ingestion buffer never
+writes events behind the checkpoint (see ml/ingestion.py), so events that
+arrive late are still read and rolled up with the next day.
+"""
+from datetime import datetime, time, timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from professional.models import Professional, ServiceCategory
+from service.models import Service
+from .conf import ml_setting
+from .ingestion import EVENT_TYPE_CODES, ROLLUP_CHECKPOINT
+from .models import (
+    InteractionEvent,
+    InteractionRollup,
+    ObjectActivityRollup,
+    PipelineCheckpoint,
+    UserInteraction,
+)
+
+
+CHECKPOINT_NAME = ROLLUP_CHECKPOINT
+DELETE_CHUNK_SIZE = 1000
+
+# Rolled-up targets; UserInteraction rows on other models are not kept
+TARGET_MODELS = {
+    InteractionEvent.SERVICE: Service,
+    InteractionEvent.PROFESSIONAL: Professional,
+    InteractionEvent.CATEGORY: ServiceCategory,
+}
+EVENT_TYPE_NAMES = {code: name for name, code in EVENT_TYPE_CODES.items()}
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _checkpoint():
+    """End of the last compacted day, or None."""
+    checkpoint = PipelineCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    return checkpoint.position if checkpoint else None
+
+
+def _target_types():
+    """{content_type_id: target_type} for the rolled-up models."""
+    return {
+        ContentType.objects.get_for_model(model).id: target_type
+        for target_type, model in TARGET_MODELS.items()
+    }
+
+
+def _raw_counts(start, end):
+    """
+    {(user_id, interaction_type, target_type, object_id): count} for raw
+    rows created in [start, end).
+    """
+    target_types = _target_types()
+    counts = {}
+
+    interactions = UserInteraction.objects.filter(
+        created_at__gte=start, created_at__lt=end, content_type_id__in=target_types
+    ).values(
+        'user_id', 'interaction_type', 'content_type_id', 'object_id'
+    ).annotate(count=Count('id')).order_by()
+    for row in interactions:
+        key = (row['user_id'], row['interaction_type'], target_types[row['content_type_id']], row['object_id'])
+        counts[key] = counts.get(key, 0) + row['count']
+
+    events = InteractionEvent.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).values(
+        'user_id', 'event_type', 'target_type', 'object_id'
+    ).annotate(count=Count('id')).order_by()
+    for row in events:
+        key = (row['user_id'], EVENT_TYPE_NAMES[row['event_type']], row['target_type'], row['object_id'])
+        counts[key] = counts.get(key, 0) + row['count']
+
+    return counts
+
+
+def _compact_day(day):
+    with transaction.atomic():
+        # Wait for a buffer flush writing behind the checkpoint (see ml/ingestion.py)
+        PipelineCheckpoint.objects.select_for_update().filter(name=CHECKPOINT_NAME).first()
+
+        counts = _raw_counts(_start_of(day), _start_of(day + timedelta(days=1)))
+
+        objects = {}
+        for (user_id, interaction_type, target_type, object_id), count in counts.items():
+            totals = objects.setdefault((interaction_type, target_type, object_id), [0, 0])
+            totals[0] += count
+            totals[1] += 1
+
+        # Replace anything left by an interrupted run
+        InteractionRollup.objects.filter(day=day).delete()
+        ObjectActivityRollup.objects.filter(day=day).delete()
+
+        InteractionRollup.objects.bulk_create([
+            InteractionRollup(
+                day=day, user_id=user_id, interaction_type=interaction_type,
+                target_type=target_type, object_id=object_id, count=count
+            )
+            for (user_id, interaction_type, target_type, object_id), count in counts.items()
+        ], batch_size=1000)
+        ObjectActivityRollup.objects.bulk_create([
+            ObjectActivityRollup(
+                day=day, interaction_type=interaction_type, target_type=target_type,
+                object_id=object_id, events=events, users=users
+            )
+            for (interaction_type, target_type, object_id), (events, users) in objects.items()
+        ], batch_size=1000)
+
+        PipelineCheckpoint.objects.update_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={'position': _start_of(day + timedelta(days=1))}
+        )
+
+
+def _delete_in_chunks(queryset):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:DELETE_CHUNK_SIZE])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def compact_interactions():
+    """
+    Roll up every finished day not compacted yet, then apply retention.
+    Returns (days compacted, raw rows deleted, rollups deleted).
+    """
+    today = timezone.localdate()
+    checkpoint = _checkpoint()
+
+    if checkpoint is not None:
+        day = timezone.localdate(checkpoint)
+    else:
+        earliest = [
+            value for value in (
+                UserInteraction.objects.aggregate(first=Min('created_at'))['first'],
+                InteractionEvent.objects.aggregate(first=Min('created_at'))['first'],
+            ) if value is not None
+        ]
+        day = timezone.localdate(min(earliest)) if earliest else today
+
+    days = 0
+    while day < today:
+        _compact_day(day)
+        day += timedelta(days=1)
+        days += 1
+
+    # Raw rows are only deleted once they are rolled up
+    checkpoint = _checkpoint()
+    raw_deleted = 0
+    if checkpoint is not None:
+        cutoff = min(
+            checkpoint,
+            _start_of(today - timedelta(days=ml_setting('INTERACTION_RAW_RETENTION_DAYS')))
+        )
+        raw_deleted += _delete_in_chunks(UserInteraction.objects.filter(created_at__lt=cutoff))
+        raw_deleted += _delete_in_chunks(InteractionEvent.objects.filter(created_at__lt=cutoff))
+
+    rollup_cutoff = today - timedelta(days=ml_setting('INTERACTION_ROLLUP_RETENTION_DAYS'))
+    rollups_deleted = _delete_in_chunks(InteractionRollup.objects.filter(day__lt=rollup_cutoff))
+    rollups_deleted += _delete_in_chunks(ObjectActivityRollup.objects.filter(day__lt=rollup_cutoff))
+
+    return days, raw_deleted, rollups_deleted
+
+
+def service_interactions(interaction_types):
+    """
+    Distinct (customer_id, service_id, interaction_type) of customers'
+    service interactions of the given types, from the rollups plus raw rows
+    newer than the last compaction.
+    """
+    checkpoint = _checkpoint()
+
+    rows = set(
+        InteractionRollup.objects.filter(
+            target_type=InteractionEvent.SERVICE,
+            interaction_type__in=interaction_types,
+            user__customer_profile__isnull=False
+        ).values_list(
+            'user__customer_profile__id', 'object_id', 'interaction_type'
+        ).distinct()
+    )
+
+    interactions = UserInteraction.objects.filter(
+        content_type=ContentType.objects.get_for_model(Service),
+        interaction_type__in=interaction_types,
+        user__customer_profile__isnull=False
+    )
+    events = InteractionEvent.objects.filter(
+        target_type=InteractionEvent.SERVICE,
+        event_type__in=[EVENT_TYPE_CODES[t] for t in interaction_types if t in EVENT_TYPE_CODES],
+        user__customer_profile__isnull=False
+    )
+    if checkpoint is not None:
+        interactions = interactions.filter(created_at__gte=checkpoint)
+        events = events.filter(created_at__gte=checkpoint)
+
+    rows.update(
+        interactions.values_list(
+            'user__customer_profile__id', 'object_id', 'interaction_type'
+        ).distinct()
+    )
+    rows.update(
+        (customer_id, object_id, EVENT_TYPE_NAMES[event_type])
+        for customer_id, object_id, event_type in events.values_list(
+            'user__customer_profile__id', 'object_id', 'event_type'
+        ).distinct()
+    )
+
+    return list(rows)
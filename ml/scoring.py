@@ -0,0 +1,138 @@
+"""
+Batch computation of ProfessionalScore.
+
+Every professional is scored from three grouped aggregate queries
+(professionals, bookings per professional, reviews per professional),
+combined with NumPy and upserted in bulk.
+"""
+import numpy as np
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, FloatField, Q
+
+from booking.models import Booking
+from professional.models import Professional
+from review.models import Review
+from .conf import ml_setting
+from .models import ProfessionalScore
+
+
+# Score used for a component when there is no data for it
+NEUTRAL_SCORE = 0.5
+
+EXPERIENCE_CAP_YEARS = 10
+RESPONSE_TIME_SCALE_HOURS = 24  # e^-1 after a day
+MAX_RATING_VARIANCE = 4.0  # ratings are 1-5
+
+
+def _number(value):
+    if value is None:
+        return np.nan
+    if hasattr(value, 'total_seconds'):
+        return value.total_seconds()
+    return value
+
+
+def compute_professional_scores():
+    """Recompute and store scores for all professionals. Returns the count."""
+    professionals = np.array(list(
+        Professional.objects.order_by('id').values_list(
+            'id', 'avg_rating', 'years_of_experience'
+        )
+    ), dtype=np.float64).reshape(-1, 3)
+
+    ids = professionals[:, 0].astype(np.int64)
+    if len(ids) == 0:
+        return 0
+
+    def column(rows, fields, default):
+        """Align grouped rows (professional_id, *fields) with `ids`."""
+        values = np.full((len(ids), len(fields)), default, dtype=np.float64)
+        present = np.zeros(len(ids), dtype=bool)
+        rows = list(rows)
+        if rows:
+            pos = np.searchsorted(ids, [row['professional_id'] for row in rows])
+            for i, field in enumerate(fields):
+                values[pos, i] = [_number(row[field]) for row in rows]
+            present[pos] = True
+        return values, present
+
+    bookings, has_bookings = column(
+        Booking.objects.values('professional_id').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='COMPLETED')),
+            response_time=Avg(
+                ExpressionWrapper(F('accepted_at') - F('created_at'), output_field=DurationField()),
+                filter=Q(accepted_at__isnull=False)
+            ),
+        ).order_by().values('professional_id', 'total', 'completed', 'response_time'),
+        ['total', 'completed', 'response_time'],
+        0
+    )
+
+    reviews, _ = column(
+        Review.objects.filter(is_approved=True).values('professional_id').annotate(
+            count=Count('id'),
+            mean=Avg('rating', output_field=FloatField()),
+            mean_square=Avg(F('rating') * F('rating'), output_field=FloatField()),
+        ).order_by().values('professional_id', 'count', 'mean', 'mean_square'),
+        ['count', 'mean', 'mean_square'],
+        0
+    )
+
+    total, completed = bookings[:, 0], bookings[:, 1]
+
+    rating_score = np.clip(professionals[:, 1] / 5.0, 0, 1)
+
+    completion_rate_score = np.where(
+        total > 0, completed / np.maximum(total, 1), NEUTRAL_SCORE
+    )
+
+    response_hours = bookings[:, 2] / 3600
+    response_time_score = np.where(
+        np.isnan(response_hours) | ~has_bookings,
+        NEUTRAL_SCORE,
+        np.exp(-np.nan_to_num(response_hours) / RESPONSE_TIME_SCALE_HOURS)
+    )
+
+    experience_score = np.minimum(professionals[:, 2] / EXPERIENCE_CAP_YEARS, 1.0)
+
+    variance = np.maximum(reviews[:, 2] - reviews[:, 1] ** 2, 0)
+    consistency_score = np.where(
+        reviews[:, 0] >= 2, 1 - variance / MAX_RATING_VARIANCE, NEUTRAL_SCORE
+    )
+
+    weights = ml_setting('PROFESSIONAL_SCORE_WEIGHTS')
+    overall_score = (
+        weights['rating'] * rating_score +
+        weights['completion_rate'] * completion_rate_score +
+        weights['response_time'] * response_time_score +
+        weights['experience'] * experience_score +
+        weights['consistency'] * consistency_score
+    )
+
+    scores = [
+        ProfessionalScore(
+            professional_id=int(ids[i]),
+            rating_score=float(rating_score[i]),
+            completion_rate_score=float(completion_rate_score[i]),
+            response_time_score=float(response_time_score[i]),
+            experience_score=float(experience_score[i]),
+            consistency_score=float(consistency_score[i]),
+            overall_score=float(overall_score[i]),
+            bookings_analyzed=int(total[i]),
+        )
+        for i in range(len(ids))
+    ]
+
+    ProfessionalScore.objects.bulk_create(
+        scores,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['professional'],
+        update_fields=[
+            'rating_score', 'completion_rate_score', 'response_time_score',
+            'experience_score', 'consistency_score', 'overall_score',
+            'bookings_analyzed', 'last_computed_at',
+        ]
+    )
+
+    return len(scores)
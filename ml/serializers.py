@@ -1,6 +1,10 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from service.serializers import CustomerServiceSerializer
-from professional.serializers import ProfessionalSerializer
+
+from .conf import ml_setting
+from .ingestion import EVENT_TYPE_CODES, TARGET_TYPE_CODES
 
 
 class ServiceRecommendationSerializer(serializers.Serializer):
@@ -55,6 +59,26 @@ class CancellationRiskSerializer(serializers.Serializer):
     factors = serializers.DictField()
 
 
+class BookingCancellationRiskSerializer(CancellationRiskSerializer):
+    """Serializer for one booking's risk in a batch"""
+    booking_id = serializers.IntegerField()
+
+
+class CancellationRiskBatchSerializer(serializers.Serializer):
+    """Serializer for a batch cancellation risk request"""
+    booking_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False
+    )
+
+    def validate_booking_ids(self, value):
+        limit = ml_setting('RISK_BATCH_MAX')
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} bookings per request.")
+        return value
+
+
 
 class DemandForecastSerializer(serializers.Serializer):
     """Serializer for demand forecast"""
@@ -65,6 +89,24 @@ class DemandForecastSerializer(serializers.Serializer):
     trend = serializers.CharField()
 
 
+class DemandForecastSeriesSerializer(serializers.Serializer):
+    """Serializer for one series of a batch demand forecast request"""
+    category_id = serializers.IntegerField(min_value=1, required=False, allow_null=True, default=None)
+    city = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+
+class DemandForecastBatchSerializer(serializers.Serializer):
+    """Serializer for a batch demand forecast request"""
+    series = DemandForecastSeriesSerializer(many=True, allow_empty=False)
+    days = serializers.IntegerField(min_value=1, max_value=90, default=7)
+
+    def validate_series(self, value):
+        limit = ml_setting('FORECAST_BATCH_MAX')
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} series per request.")
+        return value
+
+
 class PeakHoursSerializer(serializers.Serializer):
     """Serializer for peak hours"""
     hour = serializers.IntegerField()
@@ -80,3 +122,34 @@ class PricingSuggestionSerializer(serializers.Serializer):
     suggested_price = serializers.FloatField()
     min_market = serializers.FloatField()
     max_market = serializers.FloatField()
+
+
+class InteractionEventSerializer(serializers.Serializer):
+    """Serializer for one ingested interaction event"""
+    type = serializers.ChoiceField(choices=list(EVENT_TYPE_CODES))
+    target = serializers.ChoiceField(choices=list(TARGET_TYPE_CODES))
+    object_id = serializers.IntegerField(min_value=1)
+    session_id = serializers.CharField(max_length=64, required=False, allow_blank=True, default='')
+    occurred_at = serializers.DateTimeField(required=False)
+
+    def validate_occurred_at(self, value):
+        # Later times are moved to the time of the request
+        max_lag = ml_setting('INTERACTION_MAX_LAG')
+        if value < timezone.now() - timedelta(seconds=max_lag):
+            raise serializers.ValidationError(f"Events older than {max_lag} seconds are not accepted.")
+        return value
+
+
+class InteractionBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of interaction events"""
+    events = InteractionEventSerializer(many=True, allow_empty=False)
+
+    def to_internal_value(self, data):
+        # Reject oversized batches before validating every event
+        limit = ml_setting('INTERACTION_BATCH_MAX')
+        events = data.get('events') if hasattr(data, 'get') else None
+        if isinstance(events, list) and len(events) > limit:
+            raise serializers.ValidationError(
+                {'events': [f"At most {limit} events per request."]}
+            )
+        return super().to_internal_value(data)
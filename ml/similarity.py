@@ -0,0 +1,257 @@
+"""
+Offline item-item similarity for services.
+
+Scores every eligible service against its candidates (same category or
+co-booked) in vectorized blocks and stores the top-K neighbours of each
+service in ServiceSimilarity, in both directions, so that
+"similar services" is a single indexed read on (service_a, similarity_score).
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q
+
+from booking.models import Booking
+from .conf import ml_setting
+from .features import ServiceFeatureTable
+from .models import ServiceSimilarity
+
+
+# Component weights (sum to 1.0)
+CATEGORY_WEIGHT = 0.4
+PRICE_WEIGHT = 0.25
+RATING_WEIGHT = 0.15
+CO_BOOKING_WEIGHT = 0.2
+
+# Max number of candidate pairs scored at once
+BLOCK_SIZE = 1_000_000
+
+
+def gather_ranges(starts, ends):
+    """Indices of the concatenated ranges [starts[i], ends[i])."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+def top_k_per_row(rows, cols, scores, top_k):
+    """Keep the top_k highest scores for each row."""
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+
+    if len(rows) == 0:
+        return rows, cols, scores
+
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    lengths = np.diff(np.r_[starts, len(rows)])
+    rank = np.arange(len(rows)) - np.repeat(starts, lengths)
+
+    keep = rank < top_k
+    return rows[keep], cols[keep], scores[keep]
+
+
+class ServiceSimilarityBuilder:
+    """
+    Computes and stores top-K service similarities.
+
+    Signals: same category, price closeness, professional rating and
+    co-booking (cosine over customers who completed both services).
+    """
+
+    def __init__(self, top_k=None, threshold=None):
+        self.top_k = top_k or ml_setting('SIMILARITY_TOP_K')
+        self.threshold = threshold if threshold is not None else ml_setting('SIMILARITY_THRESHOLD')
+
+    def build(self, service_ids=None):
+        """
+        Rebuild similarities for the given services, or the whole catalog.
+        Services that listed one of the given services as a neighbour are
+        rescored too, so their lists refill. Every pair involving a rescored
+        service is rewritten, kept when either side has the other in its
+        top-K. Returns the number of rows written.
+        """
+        self._load_features()
+
+        if service_ids is None:
+            targets = np.arange(len(self.ids))
+        else:
+            service_ids = np.unique(np.asarray(list(service_ids), dtype=np.int64))
+            neighbours = ServiceSimilarity.objects.filter(
+                service_b_id__in=service_ids.tolist()
+            ).values_list('service_a_id', flat=True)
+            rescored = np.union1d(service_ids, np.array(list(neighbours), dtype=np.int64))
+            # Their other neighbours may hold a pair with them in their own top-K
+            linked = ServiceSimilarity.objects.filter(
+                service_a_id__in=rescored.tolist()
+            ).values_list('service_b_id', flat=True)
+            linked = np.setdiff1d(np.array(list(linked), dtype=np.int64), rescored)
+            targets = np.flatnonzero(np.isin(self.ids, np.union1d(rescored, linked)))
+
+        self._load_co_bookings(None if service_ids is None else self.ids[targets])
+
+        rows, cols, scores = self._score(targets)
+        if service_ids is not None:
+            # The linked services' other pairs are left as stored
+            keep = np.isin(self.ids[rows], rescored) | np.isin(self.ids[cols], rescored)
+            rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        # Store both directions so every service sees its neighbours
+        a = np.concatenate([self.ids[rows], self.ids[cols]])
+        b = np.concatenate([self.ids[cols], self.ids[rows]])
+        s = np.concatenate([scores, scores])
+        unique_idx = []
+        if len(a):
+            _, unique_idx = np.unique(a * (int(self.ids.max()) + 1) + b, return_index=True)
+
+        objs = [
+            ServiceSimilarity(
+                service_a_id=int(a[i]),
+                service_b_id=int(b[i]),
+                similarity_score=round(float(s[i]), 4)
+            )
+            for i in unique_idx
+        ]
+
+        with transaction.atomic():
+            if service_ids is None:
+                ServiceSimilarity.objects.all().delete()
+                ServiceSimilarity.objects.bulk_create(objs, batch_size=1000)
+            else:
+                ServiceSimilarity.objects.filter(
+                    Q(service_a_id__in=rescored.tolist()) | Q(service_b_id__in=rescored.tolist())
+                ).delete()
+                ServiceSimilarity.objects.bulk_create(objs, batch_size=1000)
+
+        return len(objs)
+
+    def _load_features(self):
+        table = ServiceFeatureTable.build()
+        active = table.active
+
+        self.ids = table.ids[active]
+        self.categories = table.categories[active]
+        self.prices = table.prices[active]
+        self.ratings = table.ratings[active]
+
+    def _load_co_bookings(self, target_ids=None):
+        """
+        Cosine co-booking scores as (row, col, score) arrays sorted by row.
+        """
+        completed = Booking.objects.filter(status='COMPLETED')
+
+        # Number of distinct customers per service
+        counts = completed.values('service_id').annotate(
+            customers=Count('customer_id', distinct=True)
+        ).values_list('service_id', 'customers')
+        counts = np.array(list(counts), dtype=np.int64).reshape(-1, 2)
+
+        customer_counts = np.zeros(len(self.ids), dtype=np.float64)
+        pos = self._positions(counts[:, 0])
+        customer_counts[pos[pos >= 0]] = counts[pos >= 0, 1]
+
+        # Number of distinct customers per service pair
+        pairs = completed.filter(customer__bookings__status='COMPLETED')
+        if target_ids is not None:
+            pairs = pairs.filter(service_id__in=target_ids.tolist())
+        pairs = pairs.values(
+            'service_id', 'customer__bookings__service_id'
+        ).annotate(
+            customers=Count('customer_id', distinct=True)
+        ).values_list('service_id', 'customer__bookings__service_id', 'customers')
+
+        pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 3)
+        rows = self._positions(pairs[:, 0])
+        cols = self._positions(pairs[:, 1])
+        keep = (rows >= 0) & (cols >= 0) & (rows != cols)
+        rows, cols, shared = rows[keep], cols[keep], pairs[keep, 2]
+
+        norm = np.sqrt(customer_counts[rows] * customer_counts[cols])
+        score = np.where(norm > 0, shared / np.maximum(norm, 1), 0.0)
+
+        order = np.argsort(rows, kind='stable')
+        self.co_rows = rows[order]
+        self.co_cols = cols[order]
+        self.co_scores = score[order]
+
+    def _positions(self, service_ids):
+        """Positions of service_ids in self.ids, -1 where missing."""
+        if len(self.ids) == 0:
+            return np.full(len(service_ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self.ids, service_ids)
+        pos = np.minimum(pos, len(self.ids) - 1)
+        return np.where(self.ids[pos] == service_ids, pos, -1)
+
+    def _score(self, targets):
+        kept_rows, kept_cols, kept_scores = [], [], []
+
+        by_category = np.argsort(self.categories, kind='stable')
+        sorted_categories = self.categories[by_category]
+
+        for category in np.unique(self.categories[targets]):
+            lo, hi = np.searchsorted(sorted_categories, [category, category + 1])
+            members = by_category[lo:hi]
+            category_targets = targets[self.categories[targets] == category]
+
+            chunk_size = max(1, BLOCK_SIZE // max(len(members), 1))
+            for start in range(0, len(category_targets), chunk_size):
+                chunk = category_targets[start:start + chunk_size]
+                rows, cols, scores = self._score_chunk(chunk, members)
+                rows, cols, scores = top_k_per_row(rows, cols, scores, self.top_k)
+                kept_rows.append(rows)
+                kept_cols.append(cols)
+                kept_scores.append(scores)
+
+        if not kept_rows:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64)
+
+        return (
+            np.concatenate(kept_rows),
+            np.concatenate(kept_cols),
+            np.concatenate(kept_scores)
+        )
+
+    def _score_chunk(self, chunk, members):
+        n = len(self.ids)
+
+        # Candidates: same category, plus anything co-booked
+        same_rows = np.repeat(chunk, len(members))
+        same_cols = np.tile(members, len(chunk))
+
+        co_idx = gather_ranges(
+            np.searchsorted(self.co_rows, chunk, side='left'),
+            np.searchsorted(self.co_rows, chunk, side='right')
+        )
+        co_keys = self.co_rows[co_idx] * n + self.co_cols[co_idx]
+
+        keys = np.unique(np.concatenate([same_rows * n + same_cols, co_keys]))
+        rows, cols = keys // n, keys % n
+        keep = rows != cols
+        keys, rows, cols = keys[keep], rows[keep], cols[keep]
+
+        co_booking = np.zeros(len(keys), dtype=np.float64)
+        co_booking[np.searchsorted(keys, co_keys)] = self.co_scores[co_idx]
+
+        same_category = (self.categories[rows] == self.categories[cols]).astype(np.float64)
+
+        price_a, price_b = self.prices[rows], self.prices[cols]
+        max_price = np.maximum(price_a, price_b)
+        price_similarity = np.where(
+            max_price > 0,
+            1 - np.abs(price_a - price_b) / np.where(max_price > 0, max_price, 1),
+            1.0
+        )
+
+        rating = (self.ratings[rows] + self.ratings[cols]) / 10.0
+
+        scores = (
+            CATEGORY_WEIGHT * same_category +
+            PRICE_WEIGHT * price_similarity +
+            RATING_WEIGHT * rating +
+            CO_BOOKING_WEIGHT * co_booking
+        )
+
+        keep = scores >= self.threshold
+        return rows[keep], cols[keep], scores[keep]
@@ -0,0 +1,117 @@
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.utils import timezone
+
+from booking.models import Booking
+from ml.artifacts import get_artifact, loaded_versions, publish_artifact, reset_artifacts
+from ml.interactions import InteractionMatrix, get_interaction_matrix, publish_interaction_matrix, reset_interaction_matrix
+from ml.models import RecommendationLog
+from ml.recommendation_engine import RecommendationEngine
+
+
+@pytest.fixture(autouse=True)
+def artifact_dir(settings, tmp_path):
+    settings.ML_SETTINGS = {
+        'ARTIFACT_DIR': str(tmp_path),
+        'ARTIFACT_CHECK_INTERVAL': 0,
+        'ARTIFACT_KEEP_VERSIONS': 2,
+    }
+    reset_artifacts()
+    reset_interaction_matrix()
+    yield tmp_path
+    reset_artifacts()
+    reset_interaction_matrix()
+
+
+def test_publish_and_hot_swap(artifact_dir):
+    assert get_artifact('example') is None
+
+    first = publish_artifact('example', {'values': np.arange(3)}, {'source': 'test'})
+    artifact = get_artifact('example')
+    assert artifact.version == first
+    assert artifact.metadata['source'] == 'test'
+    assert isinstance(artifact['values'], np.memmap)
+    assert list(artifact['values']) == [0, 1, 2]
+
+    second = publish_artifact('example', {'values': np.arange(5)})
+    third = publish_artifact('example', {'values': np.arange(7)})
+    assert get_artifact('example').version == third
+    assert len(get_artifact('example')['values']) == 7
+    assert loaded_versions() == {'example': third}
+
+    # Older versions beyond ARTIFACT_KEEP_VERSIONS are pruned
+    versions = sorted(p.name for p in (artifact_dir / 'example').iterdir() if p.is_dir())
+    assert versions == [second, third]
+    # ...but arrays already mapped from them stay readable
+    assert list(artifact['values']) == [0, 1, 2]
+
+
+@pytest.mark.django_db
+def test_engine_serves_published_matrix(booking, service):
+    Booking.objects.filter(id=booking.id).update(status='COMPLETED')
+    version = publish_interaction_matrix()
+
+    matrix = get_interaction_matrix()
+    assert isinstance(matrix.data, np.memmap)
+    assert list(matrix.customer_ids) == [booking.customer_id]
+
+    engine = RecommendationEngine(booking.customer)
+    engine.get_recommended_services()
+
+    log = RecommendationLog.objects.get()
+    assert log.recommendation_type == 'services'
+    assert log.context['artifacts'] == {'interaction_matrix': version}
+
+
+@pytest.mark.django_db
+def test_stale_published_matrix_is_republished_once(booking, settings, monkeypatch):
+    Booking.objects.filter(id=booking.id).update(status='COMPLETED')
+    first = publish_interaction_matrix()
+    assert get_artifact('interaction_matrix').version == first
+
+    # The publish job stopped running
+    later = timezone.now() + timedelta(seconds=settings.ML_SETTINGS.get('INTERACTION_MATRIX_TTL', 900) + 1)
+    monkeypatch.setattr('ml.interactions.timezone.now', lambda: later)
+    builds = []
+    build = InteractionMatrix.build
+    monkeypatch.setattr(InteractionMatrix, 'build', lambda: builds.append(1) or build())
+
+    matrix = get_interaction_matrix()
+    second = get_artifact('interaction_matrix').version
+    assert second != first
+    assert isinstance(matrix.data, np.memmap)
+    assert list(matrix.customer_ids) == [booking.customer_id]
+
+    # Workers that miss the lock keep serving the published version
+    reset_interaction_matrix()
+    monkeypatch.setattr('ml.interactions.timezone.now', lambda: later + timedelta(days=1))
+    assert isinstance(get_interaction_matrix().data, np.memmap)
+    assert get_artifact('interaction_matrix').version == second
+    assert builds == [1]
+
+
+def test_concurrent_requests_build_the_matrix_once(monkeypatch):
+    builds = []
+
+    def slow_build():
+        builds.append(1)
+        time.sleep(0.1)
+        return InteractionMatrix.from_pairs(np.array([1]), np.array([2]), np.array([1.0]))
+
+    monkeypatch.setattr(InteractionMatrix, 'build', slow_build)
+    matrices = []
+    threads = [
+        threading.Thread(target=lambda: matrices.append(get_interaction_matrix()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(matrix) for matrix in matrices}) == 1
@@ -0,0 +1,260 @@
+import pytest
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+import numpy as np
+from django.core.management import call_command
+
+from booking.models import Booking, BookingStatusHistory
+from ml.artifacts import get_artifact, reset_artifacts
+from ml.cancellation_model import (
+    FEATURES,
+    fit_logistic_regression,
+    predict_cancellation,
+    risk_features,
+    train_cancellation_model,
+    training_data,
+)
+from ml.models import BookingOutcomeCounter
+from ml.outcomes import rebuild_outcome_counters
+from ml.predictive_analytics import CancellationRiskPredictor
+from ml.preferences import compute_customer_preferences
+
+
+def _booking(booking, **fields):
+    return Booking.objects.create(**{
+        'customer': booking.customer,
+        'professional': booking.professional,
+        'service': booking.service,
+        'scheduled_date': date(2026, 2, 1),
+        'scheduled_time': time(10, 0),
+        'address': '123 Test Street',
+        'city': 'Kabul',
+        'estimated_price': Decimal('500.00'),
+        'status': 'PENDING',
+        **fields,
+    })
+
+
+@pytest.fixture(autouse=True)
+def artifact_dir(settings, tmp_path):
+    settings.ML_SETTINGS = {'ARTIFACT_DIR': str(tmp_path), 'ARTIFACT_CHECK_INTERVAL': 0}
+    reset_artifacts()
+    yield tmp_path
+    reset_artifacts()
+
+
+@pytest.fixture
+def history(booking, user, professional_user):
+    """booking's customer: 2 of 5 cancelled by them; professional: 1 rejection."""
+    _booking(booking, status='CANCELLED', cancelled_by=user)
+    _booking(booking, status='CANCELLED', cancelled_by=user)
+    _booking(booking, status='REJECTED')
+    _booking(booking, status='COMPLETED', estimated_price=Decimal('200.00'))
+    # Created without the booking signals
+    rebuild_outcome_counters()
+    compute_customer_preferences()
+    return booking
+
+
+@pytest.mark.django_db
+def test_predict_risk_factors(history):
+    history.scheduled_date = timezone.localdate() + timedelta(days=5)
+
+    risk = CancellationRiskPredictor().predict_risk(history)
+
+    assert risk['factors'] == {
+        'customer_history': 0.4,
+        'professional_history': 0.2,
+        'lead_time': 0.1,
+        'price_deviation': 0.4,
+        'first_time': 0.0,
+        'category_rate': 0.15,
+    }
+    assert risk['risk_score'] == pytest.approx(0.4 * 0.25 + 0.2 * 0.2 + 0.1 * 0.15 + 0.4 * 0.15 + 0.15 * 0.15, abs=1e-3)
+    assert risk['risk_level'] == 'MODERATE'
+
+
+@pytest.mark.django_db
+def test_predict_risk_many_uses_fixed_number_of_queries(history):
+    predictor = CancellationRiskPredictor()
+    pending = [_booking(history) for _ in range(5)]
+
+    with CaptureQueriesContext(connection) as one:
+        single = predictor.predict_risk_many([history])
+    with CaptureQueriesContext(connection) as many:
+        batch = predictor.predict_risk_many([history] + pending)
+
+    assert len(one) == len(many) == 4
+    assert batch[history.id] == single[history.id]
+    assert set(batch) == {history.id} | {b.id for b in pending}
+    assert predictor.predict_risk_many([]) == {}
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_scores_pending_queue(professional_client, history):
+    response = professional_client.post(reverse('cancellation-risk-batch'), {}, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    pending = Booking.objects.filter(status='PENDING').values_list('id', flat=True)
+    assert [r['booking_id'] for r in response.data['results']] == list(pending)
+    assert set(response.data['results'][0]['factors']) == {
+        'customer_history', 'professional_history', 'lead_time',
+        'price_deviation', 'first_time', 'category_rate',
+    }
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_only_returns_own_bookings(authenticated_client, admin_client, history):
+    other = history.id + 100
+
+    response = authenticated_client.post(
+        reverse('cancellation-risk-batch'), {'booking_ids': [history.id, other]}, format='json'
+    )
+    assert [r['booking_id'] for r in response.data['results']] == [history.id]
+    assert response.data['not_found'] == [other]
+
+    response = admin_client.post(reverse('cancellation-risk-batch'), {}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_batch_endpoint_limits_batch_size(authenticated_client, settings):
+    settings.ML_SETTINGS = {'RISK_BATCH_MAX': 2}
+
+    response = authenticated_client.post(
+        reverse('cancellation-risk-batch'), {'booking_ids': [1, 2, 3]}, format='json'
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def _counts(subject_type, subject_id):
+    counter = BookingOutcomeCounter.objects.get(subject_type=subject_type, subject_id=subject_id)
+    return counter.total, counter.cancelled, counter.rejected, counter.completed
+
+
+@pytest.mark.django_db
+def test_booking_events_update_outcome_counters(api_client, user, professional_user, customer_profile, service):
+    def create():
+        response = api_client.post(reverse('booking-list'), {
+            'service_id': service.id,
+            'scheduled_date': '2030-02-01',
+            'scheduled_time': '10:00:00',
+            'address': '123 Main St',
+            'city': 'Kabul',
+        }, format='json')
+        return response.data['id']
+
+    api_client.force_authenticate(user=user)
+    cancelled, rejected = create(), create()
+    api_client.post(reverse('booking-cancel', args=[cancelled]), {'cancellation_reason': 'No longer needed'})
+    api_client.force_authenticate(user=professional_user)
+    api_client.post(reverse('booking-reject', args=[rejected]), {'rejection_reason': 'Busy'})
+
+    assert _counts(BookingOutcomeCounter.CUSTOMER, customer_profile.id) == (2, 1, 1, 0)
+    assert _counts(BookingOutcomeCounter.PROFESSIONAL, service.professional_id) == (2, 0, 1, 0)
+    assert _counts(BookingOutcomeCounter.CATEGORY, service.category_id) == (2, 1, 1, 0)
+
+    # The rebuild agrees with the incremental counts
+    before = list(BookingOutcomeCounter.objects.order_by('subject_type', 'subject_id').values_list(
+        'subject_type', 'subject_id', 'total', 'cancelled', 'rejected', 'completed'
+    ))
+    rebuild_outcome_counters()
+    after = list(BookingOutcomeCounter.objects.order_by('subject_type', 'subject_id').values_list(
+        'subject_type', 'subject_id', 'total', 'cancelled', 'rejected', 'completed'
+    ))
+    assert after == before
+
+
+def test_risk_features_fall_back_without_history():
+    features = risk_features(
+        customer_total=[0, 10], customer_cancelled=[0, 5],
+        professional_total=[4, 10], professional_issues=[4, 1],
+        category_total=[9, 20], category_cancelled=[9, 2],
+        days_until=[0, 40], price=[500, 500], avg_price=[0, 200],
+        completed_pairings=[0, 2],
+    )
+
+    assert features.shape == (2, len(FEATURES))
+    assert features[0].tolist() == [0.2, 0.15, 0.4, 0.1, 0.3, 0.15]
+    assert features[1].tolist() == pytest.approx([0.5, 0.1, 0.3, 0.4, 0.0, 0.1])
+
+
+def test_fit_logistic_regression_recovers_weights():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(20000, 3))
+    labels = rng.random(20000) < 1 / (1 + np.exp(-(features @ [2.0, -1.0, 0.0] - 0.5)))
+
+    weights, intercept = fit_logistic_regression(features, labels, l2=0.0)
+
+    assert weights == pytest.approx([2.0, -1.0, 0.0], abs=0.1)
+    assert intercept == pytest.approx(-0.5, abs=0.1)
+
+
+@pytest.mark.django_db
+def test_training_data_only_counts_earlier_bookings(history):
+    features, labels = training_data()
+
+    # The two cancellations, the rejection and the completion; not the pending booking
+    assert labels.tolist() == [1, 1, 0, 0]
+    customer = features[:, FEATURES.index('customer_history')]
+    # The default rate until three earlier bookings, then 2 of 3 and 2 of 4
+    assert customer.tolist() == pytest.approx([0.2, 0.2, 2 / 3, 0.5])
+    # The only completed booking doesn't count as an earlier pairing for itself
+    assert features[3, FEATURES.index('first_time')] == 0.3
+
+
+@pytest.mark.django_db
+def test_later_cancellation_does_not_change_earlier_rows(history, user):
+    before, _ = training_data()
+
+    later = _booking(history)
+    later.status = 'CANCELLED'
+    later.cancelled_by = user
+    later.save()
+    after, labels = training_data()
+
+    assert labels.tolist() == [1, 1, 0, 0, 1]
+    assert after[:4].tolist() == before.tolist()
+
+
+@pytest.mark.django_db
+def test_outcomes_resolved_after_a_booking_are_not_in_its_history(history, user):
+    before, _ = training_data()
+
+    # Created before the others, but only cancelled now
+    history.status = 'CANCELLED'
+    history.cancelled_by = user
+    history.save()
+    BookingStatusHistory.objects.create(
+        booking=history, from_status='PENDING', to_status='CANCELLED', changed_by=user
+    )
+    after, labels = training_data()
+
+    assert labels.tolist() == [1, 1, 1, 0, 0]
+    assert after[1:].tolist() == before.tolist()
+
+
+@pytest.mark.django_db
+def test_trained_model_scores_with_the_same_response(history, settings):
+    assert train_cancellation_model()[0] is None  # Too few bookings
+
+    settings.ML_SETTINGS = {**settings.ML_SETTINGS, 'CANCELLATION_MODEL_MIN_SAMPLES': 4}
+    call_command('train_cancellation_model')
+    model = get_artifact('cancellation_model')
+    assert model.metadata['samples'] == 4
+    assert model.metadata['cancelled'] == 2
+
+    risk = CancellationRiskPredictor().predict_risk(history)
+    features = np.array([[risk['factors'][name] for name in FEATURES]])
+    expected = 1 / (1 + np.exp(-(features @ model['weights'] + model['intercept'][0])))
+    assert risk['risk_score'] == pytest.approx(expected[0], abs=1e-3)
+    assert set(risk) == {'risk_score', 'risk_level', 'factors'}
+    assert predict_cancellation(np.tile(features, (5000, 1))).shape == (5000,)
@@ -0,0 +1,89 @@
+import pytest
+from django.utils import timezone
+
+from professional.factories import ProfessionalFactory
+from service.factories import ServiceFactory
+from ml.cold_start import cold_start_services, rebuild_cold_start_lists
+from ml.interactions import get_interaction_matrix, reset_interaction_matrix
+from ml.models import ColdStartList, ServiceTrendBucket
+from ml.recommendation_engine import RecommendationEngine
+
+
+@pytest.fixture
+def catalog(service):
+    """service (Kabul, fa) plus a busier Kabul service in English and a Herat one."""
+    english = ServiceFactory(
+        professional=ProfessionalFactory(city='Kabul', preferred_language='en', user__phone='+93799990001'),
+        category=service.category
+    )
+    herat = ServiceFactory(
+        professional=ProfessionalFactory(city='Herat', preferred_language='fa', user__phone='+93799990002'),
+        category=service.category
+    )
+    ServiceTrendBucket.objects.create(
+        service=english, category=service.category, city_key='kabul',
+        day=timezone.localdate(), bookings=3
+    )
+    return service, english, herat
+
+
+@pytest.mark.django_db
+def test_lists_per_city_and_language(catalog):
+    service, english, herat = catalog
+
+    written = rebuild_cold_start_lists()
+
+    # cities (any, herat, kabul) x languages (any, en, fa), minus the
+    # empty (herat, en) list
+    assert written == ColdStartList.objects.count() == 8
+    assert cold_start_services('Kabul ', 'fa') == [service.id]
+    assert cold_start_services('kabul', 'en') == [english.id]
+    assert cold_start_services('kabul', None) == [english.id, service.id]
+    # Unknown city: language list, then everything
+    assert cold_start_services('Mazar', 'fa')[0] in {service.id, herat.id}
+    assert cold_start_services('Mazar', 'ps') == cold_start_services()
+
+
+@pytest.mark.django_db
+def test_new_customer_gets_cold_start_list(customer_profile, catalog, django_assert_max_num_queries):
+    service, english, herat = catalog
+    customer_profile.preferred_language = 'en'
+    customer_profile.save()
+    rebuild_cold_start_lists()
+    # Built once per worker, not per request
+    reset_interaction_matrix()
+    get_interaction_matrix()
+
+    engine = RecommendationEngine(customer_profile)
+    with django_assert_max_num_queries(5):
+        services = engine.get_recommended_services()
+
+    assert services == [english]
+    assert list(engine.strategy_timings) == ['cold_start']
+
+
+@pytest.mark.django_db
+def test_unavailable_cold_start_list_runs_strategies(customer_profile, catalog):
+    service, english, herat = catalog
+    customer_profile.preferred_language = 'en'
+    customer_profile.save()
+    rebuild_cold_start_lists()
+    english.is_active = False
+    english.save()
+
+    engine = RecommendationEngine(customer_profile)
+    engine.get_recommended_services()
+
+    assert 'cold_start' not in engine.strategy_timings
+    assert 'popularity' in engine.strategy_timings
+
+
+@pytest.mark.django_db
+def test_customer_with_history_runs_strategies(customer_profile, booking, catalog):
+    rebuild_cold_start_lists()
+
+    engine = RecommendationEngine(customer_profile)
+    engine.get_recommended_services()
+
+    assert 'cold_start' not in engine.strategy_timings
+    assert set(engine.strategy_timings) == {'collaborative', 'content', 'location', 'popularity'}
@@ -0,0 +1,103 @@
+import pytest
+from datetime import date, time
+from decimal import Decimal
+
+from django.urls import reverse
+
+from booking.models import Booking
+from customer.models import CustomerProfile
+from core.models import User
+from professional.models import ServiceCategory
+from service.models import Service
+from ml.cooccurrence import get_category_cooccurrence, rebuild_category_cooccurrence
+from ml.models import CategoryCoOccurrence
+from ml.recommendation_engine import RecommendationEngine
+
+
+def _book(customer, service, status='COMPLETED'):
+    return Booking.objects.create(
+        customer=customer,
+        professional=service.professional,
+        service=service,
+        scheduled_date=date(2026, 2, 1),
+        scheduled_time=time(10, 0),
+        address='123 Test Street',
+        city='Kabul',
+        estimated_price=Decimal('500.00'),
+        status=status
+    )
+
+
+@pytest.fixture
+def services(service):
+    def make(name):
+        return Service.objects.create(
+            professional=service.professional,
+            category=ServiceCategory.objects.create(name=name),
+            title=name,
+            pricing_type='FIXED',
+            price_per_unit=Decimal('100.00'),
+        )
+    return service, make('Gardening'), make('Painting')
+
+
+@pytest.fixture
+def other_customer(db):
+    user = User.objects.create_user(
+        username='othercustomer',
+        email='other@gmail.com',
+        password='TestPass123',
+        phone='+93700000011',
+        role='customer',
+        is_verified=True
+    )
+    return CustomerProfile.objects.create(user=user)
+
+
+@pytest.mark.django_db
+def test_rebuild_and_recommend(customer_profile, other_customer, services):
+    plumbing, gardening, painting = services
+    _book(customer_profile, plumbing)
+    _book(other_customer, plumbing)
+    _book(other_customer, plumbing)
+    _book(other_customer, gardening)
+    _book(other_customer, painting, status='CANCELLED')
+
+    assert rebuild_category_cooccurrence() == 4  # two diagonals + the pair both ways
+
+    pair = CategoryCoOccurrence.objects.get(
+        category_a=plumbing.category, category_b=gardening.category
+    )
+    assert pair.customers == 1
+    assert CategoryCoOccurrence.objects.get(
+        category_a=plumbing.category, category_b=plumbing.category
+    ).customers == 2
+
+    matrix = get_category_cooccurrence()
+    assert matrix.recommend({plumbing.category_id}) == [(gardening.category_id, 1.0)]
+
+    engine = RecommendationEngine(customer_profile)
+    assert engine.get_recommended_categories() == [gardening.category]
+
+
+@pytest.mark.django_db
+def test_completion_updates_matrix(professional_client, customer_profile, services):
+    plumbing, gardening, painting = services
+    _book(customer_profile, gardening)
+    rebuild_category_cooccurrence()
+    before = get_category_cooccurrence()
+
+    booking = _book(customer_profile, plumbing, status='IN_PROGRESS')
+    response = professional_client.post(reverse('booking-complete', args=[booking.id]))
+    assert response.status_code == 200
+
+    matrix = get_category_cooccurrence()
+    assert matrix is not before
+    assert matrix.recommend({gardening.category_id}) == [(plumbing.category_id, 1.0)]
+
+    # A second completion in the same category does not count the customer twice
+    booking = _book(customer_profile, plumbing, status='IN_PROGRESS')
+    professional_client.post(reverse('booking-complete', args=[booking.id]))
+    assert CategoryCoOccurrence.objects.get(
+        category_a=gardening.category, category_b=plumbing.category
+    ).customers == 1
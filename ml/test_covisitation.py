@@ -0,0 +1,174 @@
+import pytest
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from django.utils import timezone
+
+from service.factories import ServiceFactory
+from service.models import Service
+from ml.covisitation import rebuild_covisitation, update_covisitation
+from ml.ingestion import interaction_buffer
+from ml.models import (
+    CoVisitationList, InteractionEvent, PipelineCheckpoint, ServiceCoVisitation, UserInteraction
+)
+
+
+def _event_view(user, service, session_id, minutes_ago):
+    at = timezone.now() - timedelta(minutes=minutes_ago)
+    InteractionEvent.objects.create(
+        user=user, event_type=InteractionEvent.VIEW, target_type=InteractionEvent.SERVICE,
+        object_id=service.id, session_id=session_id, created_at=at, ingested_at=at
+    )
+
+
+def _interaction_view(user, service, session_id, minutes_ago):
+    interaction = UserInteraction.objects.create(
+        user=user, interaction_type='VIEW', session_id=session_id,
+        content_type=ContentType.objects.get_for_model(Service), object_id=service.id,
+    )
+    UserInteraction.objects.filter(id=interaction.id).update(
+        created_at=timezone.now() - timedelta(minutes=minutes_ago)
+    )
+
+
+@pytest.fixture
+def services(service):
+    return [service] + [
+        ServiceFactory(professional=service.professional, category=service.category)
+        for _ in range(3)
+    ]
+
+
+def _neighbours(service):
+    return [b for b, _ in CoVisitationList.objects.get(service=service).neighbours]
+
+
+@pytest.mark.django_db
+def test_session_views_become_pairs(user, professional_user, services):
+    a, b, c, d = services
+    # Repeat views count once per session; sessions without an id are ignored
+    for service in (a, b, a, b, c):
+        _event_view(user, service, 's1', 30)
+    _interaction_view(professional_user, a, 's2', 20)
+    _interaction_view(professional_user, c, 's2', 19)
+    _event_view(user, d, '', 10)
+    _event_view(user, a, '', 10)
+
+    views, pairs = update_covisitation()
+
+    assert views == 7
+    assert pairs == 6
+    assert not ServiceCoVisitation.objects.filter(service_a=d).exists()
+    assert _neighbours(a) == [c.id, b.id]
+    assert CoVisitationList.objects.get(service=a).neighbours[0][1] == 1.0
+
+
+@pytest.mark.django_db
+def test_incremental_update_pairs_with_earlier_session_views(user, services):
+    a, b, c, d = services
+    _event_view(user, a, 's1', 30)
+    _event_view(user, b, 's1', 29)
+    _event_view(user, c, 's1', 5)
+    _event_view(user, a, 's1', 4)
+
+    update_covisitation(now=timezone.now() - timedelta(minutes=20))
+    ab = ServiceCoVisitation.objects.get(service_a=a, service_b=b).score
+    # Nothing new
+    assert update_covisitation(now=timezone.now() - timedelta(minutes=15)) == (0, 0)
+
+    views, pairs = update_covisitation()
+
+    assert views == 2
+    assert pairs == 4
+    assert ServiceCoVisitation.objects.get(service_a=a, service_b=b).score == ab
+    assert set(_neighbours(c)) == {a.id, b.id}
+
+
+@pytest.mark.django_db
+def test_recent_sessions_rank_higher(user, professional_user, services):
+    a, b, c, d = services
+    _event_view(user, a, 'old', 3 * 24 * 60)
+    _event_view(user, b, 'old', 3 * 24 * 60 - 1)
+    _event_view(professional_user, a, 'new', 30)
+    _event_view(professional_user, c, 'new', 29)
+
+    rebuild_covisitation()
+
+    assert _neighbours(a) == [c.id, b.id]
+
+
+@pytest.mark.django_db
+def test_also_viewed_endpoint(authenticated_client, user, services):
+    a, b, c, d = services
+    _event_view(user, a, 's1', 30)
+    _event_view(user, b, 's1', 29)
+    update_covisitation()
+
+    response = authenticated_client.get(reverse('also-viewed-services', args=[a.id]))
+
+    assert response.data['count'] == 1
+    assert response.data['also_viewed'][0]['id'] == b.id
+    assert authenticated_client.get(reverse('also-viewed-services', args=[d.id])).data['count'] == 0
+
+
+@pytest.mark.django_db
+def test_scores_are_rescaled_when_the_epoch_moves(user, services, settings):
+    a, b, c, d = services
+    settings.ML_SETTINGS = {'COVISITATION_HALF_LIFE_DAYS': 1}
+    _event_view(user, a, 's1', 30)
+    _event_view(user, b, 's1', 29)
+    update_covisitation()
+    recent = ServiceCoVisitation.objects.create(service_a=c, service_b=d, score=2.0 ** 45)
+
+    # 45 half-lives later scores are brought back to the new epoch, and
+    # pairs that have decayed away are dropped
+    later = timezone.now() + timedelta(days=45)
+    update_covisitation(now=later)
+
+    recent.refresh_from_db()
+    assert recent.score == pytest.approx(1.0, rel=1e-3)
+    assert not ServiceCoVisitation.objects.filter(service_a=a).exists()
+    assert not CoVisitationList.objects.filter(service=a).exists()
+    assert _neighbours(c) == [d.id]
+    assert PipelineCheckpoint.objects.get(name='covisitation_epoch').position == later
+
+
+@pytest.mark.django_db
+def test_views_of_missing_services_are_skipped(user, services):
+    a, b, c, d = services
+    _event_view(user, a, 's1', 30)
+    _event_view(user, b, 's1', 29)
+    InteractionEvent.objects.create(
+        user=user, event_type=InteractionEvent.VIEW, target_type=InteractionEvent.SERVICE,
+        object_id=999999, session_id='s1', created_at=timezone.now() - timedelta(minutes=28),
+        ingested_at=timezone.now() - timedelta(minutes=28)
+    )
+
+    views, pairs = update_covisitation()
+
+    assert (views, pairs) == (2, 2)
+    assert not ServiceCoVisitation.objects.filter(service_b_id=999999).exists()
+    assert PipelineCheckpoint.objects.filter(name='covisitation').exists()
+    # The checkpoint moved on, the same rows aren't read again
+    assert update_covisitation() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_late_views_are_paired_by_the_next_run(authenticated_client, user, services, settings):
+    settings.ML_SETTINGS = {'INTERACTION_BACKGROUND_FLUSH': False}
+    a, b, c, d = services
+    _event_view(user, a, 's1', 30)
+    update_covisitation()
+    assert not ServiceCoVisitation.objects.exists()
+
+    # Viewed 10 minutes ago, i.e. before the checkpoint, but only sent now
+    response = authenticated_client.post(reverse('interactions'), {'events': [{
+        'type': 'VIEW', 'target': 'service', 'object_id': b.id, 'session_id': 's1',
+        'occurred_at': (timezone.now() - timedelta(minutes=10)).isoformat(),
+    }]}, format='json')
+    assert response.status_code == 202
+    interaction_buffer.flush()
+
+    assert update_covisitation(now=timezone.now() + timedelta(minutes=2)) == (1, 2)
+    assert _neighbours(a) == [b.id]
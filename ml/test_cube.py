@@ -0,0 +1,76 @@
+import pytest
+from decimal import Decimal
+
+from django.urls import reverse
+
+from ml.cube import rebuild_booking_cube
+from ml.models import BookingDailyCube
+
+
+def _cells():
+    return list(BookingDailyCube.objects.order_by('day', 'category_id', 'city_key', 'hour').values_list(
+        'day', 'category_id', 'city_key', 'hour', 'bookings', 'pending', 'accepted', 'rejected',
+        'in_progress', 'completed', 'cancelled', 'booked_value', 'completed_revenue'
+    ))
+
+
+@pytest.mark.django_db
+def test_booking_events_update_cube(api_client, user, professional_user, customer_profile, service):
+    def create(city='Kabul', time='10:00:00'):
+        response = api_client.post(reverse('booking-list'), {
+            'service_id': service.id,
+            'scheduled_date': '2030-02-01',
+            'scheduled_time': time,
+            'address': '123 Main St',
+            'city': city,
+        }, format='json')
+        return response.data['id']
+
+    api_client.force_authenticate(user=user)
+    completed, cancelled = create(), create(' kabul')
+    create(time='10:45:00')
+    create(time='15:00:00')
+    api_client.post(reverse('booking-cancel', args=[cancelled]), {'cancellation_reason': 'No longer needed'})
+    api_client.force_authenticate(user=professional_user)
+    api_client.post(reverse('booking-accept', args=[completed]))
+    api_client.post(reverse('booking-start', args=[completed]))
+    api_client.post(reverse('booking-complete', args=[completed]), {'final_price': '650.00'})
+
+    cell = BookingDailyCube.objects.get(city_key='kabul', hour=10)
+    assert (cell.bookings, cell.pending, cell.accepted, cell.in_progress) == (3, 1, 0, 0)
+    assert (cell.completed, cell.cancelled) == (1, 1)
+    assert cell.booked_value == Decimal('1500.00')
+    assert cell.completed_revenue == Decimal('650.00')
+    assert BookingDailyCube.objects.get(hour=15).pending == 1
+
+    # The rebuild agrees with the incremental counts
+    before = _cells()
+    assert rebuild_booking_cube() == 2
+    assert _cells() == before
+
+
+@pytest.mark.django_db
+def test_edited_booking_moves_between_cells(api_client, user, customer_profile, service):
+    api_client.force_authenticate(user=user)
+    booking_id = api_client.post(reverse('booking-list'), {
+        'service_id': service.id,
+        'scheduled_date': '2030-02-01',
+        'scheduled_time': '10:00:00',
+        'address': '123 Main St',
+        'city': 'Kabul',
+    }, format='json').data['id']
+
+    response = api_client.patch(reverse('booking-detail', args=[booking_id]), {
+        'scheduled_date': '2030-02-03', 'scheduled_time': '15:30:00', 'city': 'Herat',
+    }, format='json')
+    assert response.status_code == 200
+    api_client.post(reverse('booking-cancel', args=[booking_id]), {'cancellation_reason': 'No longer needed'})
+
+    old = BookingDailyCube.objects.get(city_key='kabul')
+    assert (old.bookings, old.pending, old.cancelled, old.booked_value) == (0, 0, 0, 0)
+    new = BookingDailyCube.objects.get(city_key='herat')
+    assert (str(new.day), new.hour, new.bookings, new.pending, new.cancelled) == ('2030-02-03', 15, 1, 0, 1)
+
+    before = [cell for cell in _cells() if cell[4]]
+    rebuild_booking_cube()
+    assert _cells() == before
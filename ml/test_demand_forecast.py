@@ -0,0 +1,116 @@
+import pytest
+from datetime import time, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from booking.models import Booking
+from ml.cube import rebuild_booking_cube
+from ml.predictive_analytics import DemandForecaster
+
+
+def _copy(booking, scheduled_date, city='Kabul', hour=10):
+    Booking.objects.create(
+        customer=booking.customer, professional=booking.professional, service=booking.service,
+        scheduled_date=scheduled_date, scheduled_time=time(hour),
+        address=booking.address, city=city, estimated_price=booking.estimated_price,
+    )
+
+
+@pytest.fixture
+def history(booking):
+    start = timezone.localdate() - timedelta(weeks=12)
+    monday = start + timedelta(days=-start.weekday() % 7)
+    Booking.objects.filter(id=booking.id).update(scheduled_date=start - timedelta(weeks=8))
+
+    # Mondays: one booking a week in the oldest four weeks, three a week in the latest four
+    for week in range(4):
+        _copy(booking, monday + timedelta(weeks=week))
+    for week in range(8, 12):
+        for _ in range(3):
+            _copy(booking, monday + timedelta(weeks=week), hour=14)
+    # Sundays, in another city
+    for week in range(12):
+        sunday = start + timedelta(days=(6 - start.weekday()) % 7, weeks=week)
+        _copy(booking, sunday, city=' herat ')
+
+    rebuild_booking_cube()
+    return monday
+
+
+@pytest.mark.django_db
+def test_weekly_counts_by_scheduled_weekday(history):
+    counts = DemandForecaster()._get_weekly_counts()
+
+    assert counts[0] == [1, 1, 1, 1, 0, 0, 0, 0, 3, 3, 3, 3]
+    assert counts[6] == [1] * 12
+    assert sum(map(sum, counts.values())) == 28
+    assert DemandForecaster()._get_weekly_counts(city='Herat')[0] == [0] * 12
+    assert DemandForecaster()._get_weekly_counts(city='Herat')[6] == [1] * 12
+
+
+@pytest.mark.django_db
+def test_forecast_without_model_reads_history_once(history):
+    forecaster = DemandForecaster()
+
+    for days in (7, 30):
+        with CaptureQueriesContext(connection) as context:
+            forecast = forecaster.get_demand_forecast(days_ahead=days)
+        # No fitted model, then the weekly counts
+        assert len(context) == 2
+        assert len(forecast) == days
+
+    monday = next(day for day in forecast if day['day_of_week'] == 'Monday')
+    assert monday['predicted_bookings'] == 1.3
+    assert monday['trend'] == 'INCREASING'
+    assert monday['confidence'] == 'LOW'
+    sunday = next(day for day in forecast if day['day_of_week'] == 'Sunday')
+    assert sunday['predicted_bookings'] == 1.0
+    assert sunday['trend'] == 'STABLE'
+
+
+@pytest.mark.django_db
+def test_demand_forecast_endpoint(authenticated_client, history):
+    response = authenticated_client.get(reverse('demand-forecast'), {'days': 3, 'city': 'Herat'})
+
+    assert response.status_code == 200
+    assert len(response.data['forecasts']) == 3
+
+
+@pytest.mark.django_db
+def test_peak_hours_from_cube(history):
+    with CaptureQueriesContext(connection) as context:
+        peak_hours = DemandForecaster().get_peak_hours()
+
+    assert len(context) == 1
+    assert [(hour['hour'], hour['bookings']) for hour in peak_hours] == [(10, 16), (14, 12)]
+    assert peak_hours[1]['intensity'] == 0.75
+    assert DemandForecaster().get_peak_hours(city='Herat')[0]['bookings'] == 12
+
+
+@pytest.mark.django_db
+def test_peak_hours_leave_out_upcoming_bookings(history, booking):
+    for days in (0, 1, 30):
+        _copy(booking, timezone.localdate() + timedelta(days=days), hour=18)
+    rebuild_booking_cube()
+
+    peak_hours = DemandForecaster().get_peak_hours()
+
+    assert [(hour['hour'], hour['bookings']) for hour in peak_hours] == [(10, 16), (14, 12)]
+
+
+@pytest.mark.django_db
+def test_peak_hours_are_cached_per_category_and_city(history, booking):
+    forecaster = DemandForecaster()
+    forecaster.get_peak_hours(category_id=str(booking.service.category_id), city='Kabul')
+
+    with CaptureQueriesContext(connection) as context:
+        peak_hours = forecaster.get_peak_hours(category_id=booking.service.category_id, city=' KABUL')
+    assert len(context) == 0
+    assert [hour['bookings'] for hour in peak_hours] == [12, 4]
+
+    with CaptureQueriesContext(connection) as context:
+        forecaster.get_peak_hours(category_id=booking.service.category_id, city='Herat')
+    assert len(context) == 1
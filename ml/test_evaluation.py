@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from core.models import User
+from ml.artifacts import current_version, get_artifact, publish_artifact, reset_artifacts
+
+
+@pytest.mark.django_db
+def test_evaluate_recommendations(tmp_path, capsys):
+    output = tmp_path / 'baseline.json'
+
+    call_command(
+        'evaluate_recommendations', customers=12, professionals=4, categories=3,
+        output=str(output)
+    )
+
+    report = json.loads(output.read_text())
+    assert report['config']['customers'] == 12
+    assert set(report['quality']) >= {'_collaborative_filtering_services', 'get_recommended_services'}
+    latency = report['latency']['get_recommended_services']
+    assert latency['p50_ms'] <= latency['p95_ms'] <= latency['p99_ms']
+    assert not User.objects.filter(username__startswith='mleval').exists()
+
+    call_command(
+        'evaluate_recommendations', customers=12, professionals=4, categories=3,
+        baseline=str(output)
+    )
+    assert 'Change from baseline' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_evaluation_uses_its_own_artifact_dir(tmp_path, settings):
+    live = tmp_path / 'artifacts'
+    settings.ML_SETTINGS = {'ARTIFACT_DIR': str(live), 'ARTIFACT_CHECK_INTERVAL': 0}
+    reset_artifacts()
+    version = publish_artifact('interaction_matrix', {'sentinel': np.zeros(1)})
+    files = sorted(path.relative_to(live) for path in live.rglob('*'))
+
+    call_command('evaluate_recommendations', customers=6, professionals=2, categories=2)
+
+    assert sorted(path.relative_to(live) for path in live.rglob('*')) == files
+    assert current_version('interaction_matrix') == version
+    assert 'sentinel' in get_artifact('interaction_matrix').arrays
+    reset_artifacts()
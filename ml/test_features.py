@@ -0,0 +1,74 @@
+import pytest
+from decimal import Decimal
+
+from professional.models import ServiceCategory
+from service.models import Service
+from ml.features import ServiceFeatureTable, get_service_features
+from ml.preferences import compute_customer_preferences
+from ml.recommendation_engine import RecommendationEngine
+
+
+@pytest.fixture
+def candidates(service):
+    same_category = Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Unblock drain',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('550.00'),
+    )
+    inactive = Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Old listing',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('500.00'),
+        is_active=False,
+    )
+    other_category = Service.objects.create(
+        professional=service.professional,
+        category=ServiceCategory.objects.create(name='Gardening'),
+        title='Mow lawn',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('3000.00'),
+    )
+    return same_category, inactive, other_category
+
+
+@pytest.mark.django_db
+def test_content_scores(service, candidates):
+    same_category, inactive, other_category = candidates
+    table = ServiceFeatureTable.build()
+
+    scores = table.content_scores({service.category_id: 1.0}, 500.0, exclude_ids={service.id})
+
+    assert set(scores) == {same_category.id}
+    assert scores[same_category.id] == pytest.approx(0.5 + 0.3 * 0.8)
+
+
+@pytest.mark.django_db
+def test_feature_table_is_rebuilt_after_changes(service):
+    table = get_service_features()
+    assert get_service_features() is table
+
+    service.price_per_unit = Decimal('750.00')
+    service.save()
+
+    table = get_service_features()
+    assert table.prices[table.positions([service.id])[0]] == 750.0
+
+
+@pytest.mark.django_db
+def test_content_based_services(booking, candidates, django_assert_num_queries):
+    same_category, inactive, other_category = candidates
+    booking.status = 'COMPLETED'
+    booking.save()
+    compute_customer_preferences()
+
+    engine = RecommendationEngine(booking.customer)
+    get_service_features()
+
+    with django_assert_num_queries(1):
+        scores = engine._content_based_services()
+
+    assert set(scores) == {booking.service_id, same_category.id}
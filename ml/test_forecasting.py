@@ -0,0 +1,128 @@
+import pytest
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ml.forecasting import fit_forecast_models, fit_holt_winters, forecast_days
+from ml.models import BookingDailyCube, ForecastModel
+from ml.predictive_analytics import DemandForecaster
+from service.factories import ServiceCategoryFactory
+
+
+WEEKLY = np.array([2.0, 3.0, 3.0, 4.0, 6.0, 9.0, 1.0])  # Monday first
+
+
+def _series(days, start_weekday, base=10.0, slope=0.1):
+    t = np.arange(days)
+    return base + slope * t + WEEKLY[(start_weekday + t) % 7]
+
+
+def test_fit_recovers_trend_and_weekly_season():
+    # Starts on a Wednesday
+    series = np.vstack([_series(112, 2), _series(112, 2, base=3.0, slope=0.0)])
+    fitted = fit_holt_winters(series, start_weekday=2)
+
+    assert fitted['level'].shape == (2,)
+    assert fitted['seasonal'].shape == (2, 7)
+    assert fitted['rmse'][1] < 0.05
+    assert fitted['trend'][0] == pytest.approx(0.1, abs=0.02)
+    assert fitted['trend'][1] == pytest.approx(0.0, abs=0.02)
+    # Saturday is the busiest day of both series
+    assert fitted['seasonal'].argmax(axis=1).tolist() == [5, 5]
+
+
+@pytest.fixture
+def cube(db):
+    today = date(2026, 10, 17)
+    start = today - timedelta(days=112)
+    plumbing, cleaning = ServiceCategoryFactory(), ServiceCategoryFactory()
+    cells = []
+    for day_index, value in enumerate(_series(112, start.weekday(), slope=0.0)):
+        day = start + timedelta(days=day_index)
+        cells.append(BookingDailyCube(
+            day=day, category=plumbing, city_key='kabul', hour=10, bookings=int(value)
+        ))
+        cells.append(BookingDailyCube(
+            day=day, category=cleaning, city_key='herat', hour=9, bookings=1
+        ))
+    BookingDailyCube.objects.bulk_create(cells)
+    return today, plumbing, cleaning
+
+
+@pytest.mark.django_db
+def test_fit_forecast_models_fits_every_series(cube):
+    today, plumbing, cleaning = cube
+
+    count, seconds = fit_forecast_models(today)
+
+    # Each category in its city, each category anywhere, each city and everything
+    assert count == 7
+    assert set(ForecastModel.objects.values_list('category_id', 'city_key')) == {
+        (plumbing.id, 'kabul'), (plumbing.id, ''), (None, 'kabul'),
+        (cleaning.id, 'herat'), (cleaning.id, ''), (None, 'herat'),
+        (None, ''),
+    }
+    model = ForecastModel.objects.get(category=plumbing, city_key='kabul')
+    assert model.fitted_through == today - timedelta(days=1)
+    assert model.observations == sum(BookingDailyCube.objects.filter(
+        category=plumbing).values_list('bookings', flat=True))
+
+    saturday = today  # 2026-10-17
+    assert forecast_days(model, [saturday])[0] == pytest.approx(19.0, abs=0.5)
+    overall = ForecastModel.objects.get(category=None, city_key='')
+    assert forecast_days(overall, [saturday])[0] == pytest.approx(20.0, abs=0.5)
+
+
+@pytest.mark.django_db
+def test_demand_forecast_uses_fitted_model(cube, monkeypatch):
+    today, plumbing, _ = cube
+    fit_forecast_models(today)
+    monkeypatch.setattr('django.utils.timezone.localdate', lambda *args: today)
+
+    with CaptureQueriesContext(connection) as context:
+        forecast = DemandForecaster().get_demand_forecast(category_id=plumbing.id, city=' Kabul', days_ahead=7)
+
+    assert len(context) == 1
+    assert forecast[0]['day_of_week'] == 'Saturday'
+    assert forecast[0]['predicted_bookings'] == pytest.approx(19.0, abs=0.5)
+    assert forecast[0]['confidence'] == 'HIGH'
+    assert forecast[0]['trend'] == 'STABLE'
+
+
+@pytest.mark.django_db
+def test_demand_forecast_batch_endpoint(authenticated_client, cube):
+    today, plumbing, cleaning = cube
+    fit_forecast_models(today)
+
+    with CaptureQueriesContext(connection) as context:
+        response = authenticated_client.post(reverse('demand-forecast-batch'), {
+            'days': 3,
+            'series': [
+                {'category_id': plumbing.id, 'city': 'Kabul'},
+                {'category_id': cleaning.id},
+                {},
+                {'category_id': cleaning.id, 'city': 'Kabul'},
+            ],
+        }, format='json')
+
+    assert response.status_code == 200
+    assert response.data['count'] == 3
+    assert [len(result['forecasts']) for result in response.data['results']] == [3, 3, 3]
+    assert response.data['results'][1]['forecasts'][0]['predicted_bookings'] == pytest.approx(1.0)
+    assert response.data['not_found'] == [{'category_id': cleaning.id, 'city': 'Kabul'}]
+    # One forecast model query, whatever the number of series
+    assert len([q for q in context.captured_queries if 'ml_forecastmodel' in q['sql']]) == 1
+
+
+@pytest.mark.django_db
+def test_demand_forecast_batch_limit(authenticated_client, settings):
+    settings.ML_SETTINGS = {'FORECAST_BATCH_MAX': 2}
+
+    response = authenticated_client.post(
+        reverse('demand-forecast-batch'), {'series': [{}, {}, {}]}, format='json'
+    )
+
+    assert response.status_code == 400
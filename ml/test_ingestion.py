@@ -0,0 +1,128 @@
+import pytest
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from ml.ingestion import interaction_buffer
+from ml.interactions import InteractionMatrix
+from ml.models import InteractionEvent
+
+
+@pytest.fixture(autouse=True)
+def synchronous_buffer(settings):
+    settings.ML_SETTINGS = {'INTERACTION_BACKGROUND_FLUSH': False}
+    yield
+    interaction_buffer.flush()
+
+
+@pytest.mark.django_db
+def test_ingest_batch(authenticated_client, user, service):
+    response = authenticated_client.post(reverse('interactions'), {
+        'events': [
+            {'type': 'VIEW', 'target': 'service', 'object_id': service.id, 'session_id': 'abc'},
+            {'type': 'SEARCH', 'target': 'category', 'object_id': service.category_id},
+        ]
+    }, format='json')
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data == {'accepted': 2}
+    assert not InteractionEvent.objects.exists()
+
+    assert interaction_buffer.flush() == 2
+    view = InteractionEvent.objects.get(event_type=InteractionEvent.VIEW)
+    assert (view.user, view.target_type, view.object_id, view.session_id) == (
+        user, InteractionEvent.SERVICE, service.id, 'abc'
+    )
+    assert view.created_at <= timezone.now()
+
+
+@pytest.mark.django_db
+def test_ingest_rejects_invalid_batches(authenticated_client, settings):
+    url = reverse('interactions')
+    event = {'type': 'VIEW', 'target': 'service', 'object_id': 1}
+
+    response = authenticated_client.post(url, {'events': [{**event, 'type': 'CLICK'}]}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    settings.ML_SETTINGS = {'INTERACTION_BACKGROUND_FLUSH': False, 'INTERACTION_BATCH_MAX': 2}
+    response = authenticated_client.post(url, {'events': [event] * 3}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert len(interaction_buffer) == 0
+
+
+@pytest.mark.django_db
+def test_ingest_rejects_backdated_events(authenticated_client, service):
+    event = {'type': 'VIEW', 'target': 'service', 'object_id': service.id}
+
+    response = authenticated_client.post(reverse('interactions'), {
+        'events': [{**event, 'occurred_at': '1901-01-01T00:00:00Z'}]
+    }, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert len(interaction_buffer) == 0
+
+    recent = timezone.now() - timedelta(minutes=10)
+    response = authenticated_client.post(reverse('interactions'), {
+        'events': [{**event, 'occurred_at': recent.isoformat()}]
+    }, format='json')
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    interaction_buffer.flush()
+    assert InteractionEvent.objects.get().created_at == recent
+
+
+@pytest.mark.django_db
+def test_ingest_moves_future_events_to_now(authenticated_client, service):
+    before = timezone.now()
+    response = authenticated_client.post(reverse('interactions'), {
+        'events': [{
+            'type': 'VIEW', 'target': 'service', 'object_id': service.id,
+            'occurred_at': (before + timedelta(days=365)).isoformat(),
+        }]
+    }, format='json')
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    interaction_buffer.flush()
+    assert before <= InteractionEvent.objects.get().created_at <= timezone.now()
+
+
+@pytest.mark.django_db
+def test_buffer_flushes_by_size_and_drops_oldest(user, settings):
+    def events(count, object_id=1):
+        return [
+            InteractionEvent(
+                user=user, event_type=InteractionEvent.VIEW, target_type=InteractionEvent.SERVICE,
+                object_id=object_id, created_at=timezone.now()
+            )
+            for _ in range(count)
+        ]
+
+    settings.ML_SETTINGS = {
+        'INTERACTION_BACKGROUND_FLUSH': False,
+        'INTERACTION_FLUSH_SIZE': 3,
+        'INTERACTION_BUFFER_LIMIT': 4,
+    }
+    interaction_buffer.add(events(2))
+    assert InteractionEvent.objects.count() == 0
+    interaction_buffer.add(events(1))
+    assert InteractionEvent.objects.count() == 3
+
+    settings.ML_SETTINGS['INTERACTION_FLUSH_SIZE'] = 10
+    dropped = interaction_buffer.dropped
+    interaction_buffer.add(events(3, object_id=1) + events(3, object_id=2))
+    assert interaction_buffer.dropped - dropped == 2
+    assert interaction_buffer.flush() == 4
+    assert InteractionEvent.objects.filter(object_id=2).count() == 3
+
+
+@pytest.mark.django_db
+def test_matrix_reads_interaction_events(customer_profile, service):
+    InteractionEvent.objects.create(
+        user=customer_profile.user, event_type=InteractionEvent.BOOKMARK,
+        target_type=InteractionEvent.SERVICE, object_id=service.id, created_at=timezone.now()
+    )
+
+    matrix = InteractionMatrix.build()
+
+    assert list(matrix.customer_ids) == [customer_profile.id]
+    assert list(matrix.data) == [pytest.approx(0.5)]
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+
+from core.models import User
+from customer.models import CustomerProfile
+from booking.models import Booking
+from service.models import Service
+from ml.models import UserInteraction
+from ml.interactions import InteractionMatrix, reset_interaction_matrix
+from ml.recommendation_engine import RecommendationEngine
+
+
+def test_similar_item_scores_from_pairs():
+    # customer 1: services 10, 20 / customer 2: service 10
+    matrix = InteractionMatrix.from_pairs(
+        np.array([1, 1, 2, 2]),
+        np.array([10, 20, 10, 10]),
+        np.array([1.0, 1.0, 0.1, 1.0])
+    )
+
+    scores = matrix.similar_item_scores(2)
+
+    assert list(scores) == [20]
+    assert scores[20] == pytest.approx(1 / np.sqrt(2))
+    assert matrix.similar_item_scores(99) == {}
+
+
+@pytest.fixture
+def second_service(service):
+    return Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Install water heater',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('900.00'),
+    )
+
+
+@pytest.fixture
+def other_customer(db):
+    user = User.objects.create_user(
+        username='othercustomer',
+        email='other@gmail.com',
+        password='TestPass123',
+        phone='+93700000009',
+        role='customer',
+        is_verified=True
+    )
+    return CustomerProfile.objects.create(user=user, city='kabul')
+
+
+def _complete(customer, service):
+    return Booking.objects.create(
+        customer=customer,
+        professional=service.professional,
+        service=service,
+        scheduled_date='2026-02-01',
+        scheduled_time='10:00',
+        address='123 Test Street',
+        city='Kabul',
+        estimated_price=service.price_per_unit,
+        status='COMPLETED'
+    )
+
+
+@pytest.mark.django_db
+def test_build_combines_bookings_and_interactions(customer_profile, other_customer, service, second_service):
+    _complete(other_customer, service)
+    _complete(other_customer, second_service)
+    UserInteraction.objects.create(
+        user=customer_profile.user,
+        interaction_type='BOOKMARK',
+        content_type=ContentType.objects.get_for_model(Service),
+        object_id=service.id
+    )
+
+    matrix = InteractionMatrix.build()
+
+    assert list(matrix.similar_item_scores(customer_profile.id)) == [second_service.id]
+
+
+@pytest.mark.django_db
+def test_collaborative_filtering_uses_matrix(customer_profile, other_customer, service, second_service, django_assert_num_queries):
+    _complete(other_customer, service)
+    _complete(other_customer, second_service)
+    _complete(customer_profile, service)
+    reset_interaction_matrix()
+
+    engine = RecommendationEngine(customer_profile)
+    assert engine._collaborative_filtering_services() == {second_service.id: 1.0}
+
+    # Once built, scoring does not touch the database
+    with django_assert_num_queries(0):
+        engine._collaborative_filtering_services()
+
+    reset_interaction_matrix()
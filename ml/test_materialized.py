@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from ml.materialized import materialize_recommendations, materialized_recommendations
+from ml.models import MaterializedRecommendation, RecommendationLog
+from ml.recommendation_engine import RecommendationEngine
+
+
+def _no_live_engine(*args, **kwargs):
+    raise AssertionError("computed live")
+
+
+@pytest.mark.django_db
+def test_materialize_stores_rows_without_logging(customer_profile, service):
+    customers, seconds = materialize_recommendations(chunk_size=1)
+
+    assert customers == 1
+    row = MaterializedRecommendation.objects.get(customer=customer_profile)
+    assert row.services == []
+    assert row.professionals == [service.professional_id]
+    assert not RecommendationLog.objects.exists()
+
+    assert materialized_recommendations(customer_profile.id, 'professionals', 10) == [service.professional]
+
+
+@pytest.mark.django_db
+def test_endpoints_serve_materialized_rows(authenticated_client, customer_profile, service, monkeypatch):
+    MaterializedRecommendation.objects.create(
+        customer=customer_profile,
+        services=[service.id],
+        professionals=[service.professional_id],
+        categories=[service.category_id],
+        top_n=20,
+        algorithm_version='hybrid-v1'
+    )
+    monkeypatch.setattr(RecommendationEngine, '__init__', _no_live_engine)
+
+    services = authenticated_client.get(reverse('recommended-services'))
+    professionals = authenticated_client.get(reverse('recommended-professionals'))
+    categories = authenticated_client.get(reverse('recommended-categories'))
+
+    assert [s['id'] for s in services.data['recommendations']] == [service.id]
+    assert [p['id'] for p in professionals.data['recommendations']] == [service.professional_id]
+    assert [c['id'] for c in categories.data['recommendations']] == [service.category_id]
+
+
+@pytest.mark.django_db
+def test_stale_algorithm_version_is_not_served(customer_profile, service):
+    MaterializedRecommendation.objects.create(
+        customer=customer_profile, services=[service.id], algorithm_version='old'
+    )
+
+    assert materialized_recommendations(customer_profile.id, 'services', 10) is None
+
+
+@pytest.mark.django_db
+def test_booking_event_drops_materialized_row(authenticated_client, customer_profile, service):
+    materialize_recommendations()
+
+    response = authenticated_client.post(reverse('booking-list'), {
+        'service_id': service.id,
+        'scheduled_date': '2030-02-01',
+        'scheduled_time': '10:00:00',
+        'address': '123 Main St',
+        'city': 'Kabul',
+    }, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert not MaterializedRecommendation.objects.filter(customer=customer_profile).exists()
+
+
+@pytest.mark.django_db
+def test_materialize_command_reports_throughput(customer_profile, capsys):
+    call_command('materialize_recommendations')
+
+    assert "Materialized 1 customers" in capsys.readouterr().out
+    assert MaterializedRecommendation.objects.filter(customer=customer_profile).exists()
+
+
+@pytest.mark.django_db
+def test_short_lists_are_complete_up_to_the_run_top_n(customer_profile, service):
+    materialize_recommendations(top_n=30)
+    professionals = materialized_recommendations(customer_profile.id, 'professionals', 25)
+    assert professionals == [service.professional]
+
+    # A full list may have been cut short
+    materialize_recommendations(top_n=1)
+    assert MaterializedRecommendation.objects.get().top_n == 1
+    assert materialized_recommendations(customer_profile.id, 'professionals', 25) is None
+    assert materialized_recommendations(customer_profile.id, 'professionals', 1) == [service.professional]
@@ -0,0 +1,63 @@
+import pytest
+from datetime import date, time
+from decimal import Decimal
+
+from django.urls import reverse
+
+from booking.models import Booking
+from professional.models import ServiceCategory
+from service.models import Service
+from ml.models import CustomerPreference
+from ml.preferences import compute_customer_preferences
+
+
+@pytest.mark.django_db
+def test_compute_customer_preferences(booking, django_assert_num_queries):
+    other_service = Service.objects.create(
+        professional=booking.professional,
+        category=ServiceCategory.objects.create(name='Gardening'),
+        title='Mow lawn',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('300.00'),
+    )
+    Booking.objects.filter(id=booking.id).update(status='COMPLETED')
+    for service, day, price in [
+        (booking.service, date(2026, 2, 8), '700.00'),   # Sunday
+        (other_service, date(2026, 2, 11), '300.00'),    # Wednesday
+    ]:
+        Booking.objects.create(
+            customer=booking.customer,
+            professional=booking.professional,
+            service=service,
+            scheduled_date=day,
+            scheduled_time=time(19, 0) if service == other_service else time(9, 0),
+            address='123 Test Street',
+            city='Kabul',
+            estimated_price=Decimal(price),
+            status='COMPLETED'
+        )
+
+    with django_assert_num_queries(5):  # 4 reads + 1 upsert
+        assert compute_customer_preferences() == 1
+
+    prefs = CustomerPreference.objects.get(customer=booking.customer)
+    assert prefs.preferred_categories == [
+        {'id': booking.service.category_id, 'weight': 0.667},
+        {'id': other_service.category_id, 'weight': 0.333},
+    ]
+    assert prefs.preferred_price_range == {'min': 300.0, 'max': 700.0}
+    assert prefs.preferred_times == ['morning', 'evening']
+    assert prefs.preferred_days == ['sunday', 'wednesday']
+    assert prefs.avg_booking_value == Decimal('500.00')
+    assert prefs.booking_frequency_days == 5.0
+
+
+@pytest.mark.django_db
+def test_completing_a_booking_refreshes_preferences(professional_client, booking):
+    Booking.objects.filter(id=booking.id).update(status='IN_PROGRESS')
+
+    response = professional_client.post(reverse('booking-complete', args=[booking.id]))
+    assert response.status_code == 200
+
+    prefs = CustomerPreference.objects.get(customer=booking.customer)
+    assert prefs.preferred_categories == [{'id': booking.service.category_id, 'weight': 1.0}]
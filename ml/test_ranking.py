@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from ml.ranking import blend, top_candidates
+from ml.recommendation_engine import RecommendationEngine
+
+
+def test_top_candidates_keeps_highest_scores():
+    ids, scores = top_candidates(np.array([1, 2, 3, 4]), np.array([0.1, 0.9, 0.5, 0.7]), 2)
+
+    assert sorted(ids.tolist()) == [2, 4]
+    assert sorted(scores.tolist()) == [0.7, 0.9]
+
+
+def test_blend_weights_excludes_and_ranks():
+    ranked = blend(
+        {'a': {1: 1.0, 2: 0.5, 3: 0.2}, 'b': {2: 1.0, 4: 1.0}},
+        {'a': 0.6, 'b': 0.4},
+        exclude_ids={4},
+        limit=2
+    )
+
+    assert ranked == [(2, pytest.approx(0.7)), (1, pytest.approx(0.6))]
+    assert blend({}, {}) == []
+
+
+@pytest.mark.django_db
+def test_strategies_return_bounded_candidates(customer_profile, settings, monkeypatch):
+    settings.ML_SETTINGS = {'CANDIDATE_LIMIT': 3}
+    monkeypatch.setattr(
+        'ml.recommendation_engine.get_trending_services',
+        lambda city=None, category_id=None, limit=None: [(i, 10 - i) for i in range(1, 10)][:limit]
+    )
+
+    engine = RecommendationEngine(customer_profile)
+    engine.get_recommended_services()
+
+    assert engine.strategy_timings['popularity']['candidates'] == 3
+    assert set(engine.strategy_results['popularity']) == {1, 2, 3}
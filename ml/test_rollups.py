@@ -0,0 +1,94 @@
+import pytest
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from service.models import Service
+from ml.ingestion import interaction_buffer
+from ml.interactions import InteractionMatrix
+from ml.models import (
+    InteractionEvent,
+    InteractionRollup,
+    ObjectActivityRollup,
+    PipelineCheckpoint,
+    UserInteraction,
+)
+from ml.rollups import compact_interactions, service_interactions
+
+
+def _view(user, service, days_ago):
+    interaction = UserInteraction.objects.create(
+        user=user,
+        interaction_type='VIEW',
+        content_type=ContentType.objects.get_for_model(Service),
+        object_id=service.id,
+    )
+    # created_at is auto_now_add
+    UserInteraction.objects.filter(id=interaction.id).update(
+        created_at=timezone.now() - timedelta(days=days_ago)
+    )
+
+
+def _bookmark(user, service, days_ago):
+    InteractionEvent.objects.create(
+        user=user, event_type=InteractionEvent.BOOKMARK, target_type=InteractionEvent.SERVICE,
+        object_id=service.id, created_at=timezone.now() - timedelta(days=days_ago)
+    )
+
+
+@pytest.mark.django_db
+def test_compact_interactions(customer_profile, user, service, settings):
+    settings.ML_SETTINGS = {'INTERACTION_RAW_RETENTION_DAYS': 30}
+    for days_ago in (40, 2, 2):
+        _view(user, service, days_ago)
+    _bookmark(user, service, 2)
+    _view(user, service, 0)
+
+    days, raw_deleted, _ = compact_interactions()
+
+    assert days == 40
+    assert raw_deleted == 1  # the 40-day-old view; today's is not compacted yet
+    two_days_ago = timezone.localdate() - timedelta(days=2)
+    assert InteractionRollup.objects.get(day=two_days_ago, interaction_type='VIEW').count == 2
+    assert InteractionRollup.objects.filter(day=two_days_ago, interaction_type='BOOKMARK').count() == 1
+    activity = ObjectActivityRollup.objects.get(day=two_days_ago, interaction_type='VIEW')
+    assert (activity.object_id, activity.events, activity.users) == (service.id, 2, 1)
+    assert UserInteraction.objects.count() == 3
+
+    # Already compacted days are not rolled up twice
+    assert compact_interactions() == (0, 0, 0)
+    assert InteractionRollup.objects.get(day=two_days_ago, interaction_type='VIEW').count == 2
+    assert PipelineCheckpoint.objects.get().position.date() == timezone.localdate()
+
+
+@pytest.mark.django_db
+def test_matrix_combines_rollups_and_recent_events(customer_profile, user, service):
+    _bookmark(user, service, 3)
+    compact_interactions()
+    InteractionEvent.objects.all().delete()
+    _view(user, service, 0)
+
+    matrix = InteractionMatrix.build()
+
+    # The bookmark only survives in the rollups and outweighs today's view
+    assert list(matrix.customer_ids) == [customer_profile.id]
+    assert list(matrix.data) == [pytest.approx(0.5)]
+
+
+@pytest.mark.django_db
+def test_late_events_land_after_the_checkpoint(customer_profile, user, service, settings):
+    settings.ML_SETTINGS = {'INTERACTION_BACKGROUND_FLUSH': False}
+    _bookmark(user, service, 3)
+    compact_interactions()
+    checkpoint = PipelineCheckpoint.objects.get().position
+
+    # Queued before the compaction, written after it
+    interaction_buffer.add([InteractionEvent(
+        user=user, event_type=InteractionEvent.VIEW, target_type=InteractionEvent.SERVICE,
+        object_id=service.id, created_at=timezone.now() - timedelta(days=1)
+    )])
+    interaction_buffer.flush()
+
+    assert InteractionEvent.objects.get(event_type=InteractionEvent.VIEW).created_at == checkpoint
+    assert (customer_profile.id, service.id, 'VIEW') in service_interactions(['VIEW'])
@@ -0,0 +1,78 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+
+from booking.models import Booking
+from core.models import User
+from professional.models import Professional
+from review.models import Review
+from ml.models import ProfessionalScore
+from ml.recommendation_engine import RecommendationEngine
+from ml.scoring import compute_professional_scores
+
+
+@pytest.mark.django_db
+def test_compute_professional_scores(booking, django_assert_num_queries):
+    Booking.objects.filter(id=booking.id).update(
+        status='COMPLETED',
+        accepted_at=F('created_at') + timedelta(hours=24)
+    )
+    for rating in (3, 5):
+        Review.objects.create(
+            booking=Booking.objects.create(
+                customer=booking.customer,
+                professional=booking.professional,
+                service=booking.service,
+                scheduled_date=booking.scheduled_date,
+                scheduled_time=booking.scheduled_time,
+                address='123 Test Street',
+                city='Kabul',
+                estimated_price=Decimal('500.00'),
+                status='CANCELLED'
+            ),
+            customer=booking.customer.user,
+            professional=booking.professional,
+            rating=rating
+        )
+
+    with django_assert_num_queries(4):  # 3 reads + 1 upsert
+        assert compute_professional_scores() == 1
+
+    score = ProfessionalScore.objects.get(professional=booking.professional)
+    assert score.bookings_analyzed == 3
+    assert score.completion_rate_score == pytest.approx(1 / 3)
+    assert score.response_time_score == pytest.approx(0.3679, abs=1e-3)
+    assert score.experience_score == pytest.approx(0.5)
+    assert score.consistency_score == pytest.approx(0.75)  # variance of (3, 5) is 1
+
+    # Rerunning updates in place
+    compute_professional_scores()
+    assert ProfessionalScore.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_recommended_professionals_rank_by_stored_score(customer_profile, professional):
+    user = User.objects.create_user(
+        username='secondpro',
+        email='second@gmail.com',
+        password='TestPass123',
+        phone='+93700000010',
+        role='professional',
+        is_verified=True
+    )
+    other = Professional.objects.create(user=user, verification_status='VERIFIED')
+    ProfessionalScore.objects.create(professional=professional, overall_score=0.4)
+    ProfessionalScore.objects.create(professional=other, overall_score=0.9)
+
+    engine = RecommendationEngine(customer_profile)
+    assert engine.get_recommended_professionals() == [other, professional]
+
+    # Being next door outweighs a modest score gap
+    ProfessionalScore.objects.filter(professional=other).update(overall_score=0.5)
+    customer_profile.latitude, customer_profile.longitude = Decimal('34.55'), Decimal('69.20')
+    professional.latitude, professional.longitude = Decimal('34.55'), Decimal('69.20')
+    professional.save()
+
+    assert engine.get_recommended_professionals() == [professional, other]
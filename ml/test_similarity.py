@@ -0,0 +1,177 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from booking.models import Booking
+from professional.models import Professional, ServiceCategory
+from service.models import Service
+from ml.models import ServiceSimilarity
+from ml.recommendation_engine import RecommendationEngine
+from ml.similarity import ServiceSimilarityBuilder
+
+
+@pytest.fixture
+def catalog(service):
+    """The conftest service plus a close match and an unrelated service."""
+    similar = Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Replace kitchen tap',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('450.00'),
+    )
+    other = Service.objects.create(
+        professional=service.professional,
+        category=ServiceCategory.objects.create(name='Painting'),
+        title='Paint a room',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('5000.00'),
+    )
+    return service, similar, other
+
+
+@pytest.mark.django_db
+def test_build_stores_symmetric_pairs(catalog):
+    service, similar, other = catalog
+
+    written = ServiceSimilarityBuilder().build()
+
+    assert written == 2
+    forward = ServiceSimilarity.objects.get(service_a=service, service_b=similar)
+    backward = ServiceSimilarity.objects.get(service_a=similar, service_b=service)
+    assert forward.similarity_score == backward.similarity_score
+    assert not ServiceSimilarity.objects.filter(service_a=other).exists()
+
+
+@pytest.mark.django_db
+def test_build_prunes_to_top_k(catalog, service):
+    for price in ('480.00', '490.00'):
+        Service.objects.create(
+            professional=service.professional,
+            category=service.category,
+            title='Pipe repair',
+            pricing_type='FIXED',
+            price_per_unit=Decimal(price),
+        )
+
+    ServiceSimilarityBuilder(top_k=1).build()
+
+    # Each service keeps its best neighbour, plus reverse links from others
+    assert ServiceSimilarity.objects.filter(service_a=service).count() <= 2
+    best = ServiceSimilarity.objects.filter(service_a=service).order_by('-similarity_score').first()
+    assert best.service_b.price_per_unit == Decimal('490.00')
+
+
+@pytest.mark.django_db
+def test_incremental_refresh_only_touches_changed_services(catalog):
+    service, similar, other = catalog
+    ServiceSimilarityBuilder().build()
+
+    similar.is_active = False
+    similar.save()
+    ServiceSimilarityBuilder().build(service_ids=[similar.id])
+
+    assert not ServiceSimilarity.objects.filter(service_a=similar).exists()
+    assert not ServiceSimilarity.objects.filter(service_b=similar).exists()
+
+
+@pytest.mark.django_db
+def test_incremental_refresh_rescores_former_neighbours(catalog, service):
+    _, similar, _ = catalog
+    cheap = Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Fix a leak',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('300.00'),
+    )
+    ServiceSimilarityBuilder(top_k=1).build()
+    assert not ServiceSimilarity.objects.filter(service_a=service, service_b=cheap).exists()
+
+    similar.is_active = False
+    similar.save()
+    ServiceSimilarityBuilder(top_k=1).build(service_ids=[similar.id])
+
+    # Both had `similar` as their only neighbour and now list each other
+    assert ServiceSimilarity.objects.filter(service_a=service, service_b=cheap).exists()
+    assert ServiceSimilarity.objects.filter(service_a=cheap, service_b=service).exists()
+    assert not ServiceSimilarity.objects.filter(service_b=similar).exists()
+
+
+@pytest.mark.django_db
+def test_incremental_refresh_keeps_pairs_held_by_the_other_side(catalog, service):
+    _, similar, _ = catalog
+    pricey = Service.objects.create(
+        professional=service.professional,
+        category=service.category,
+        title='Install a sink',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('700.00'),
+    )
+    ServiceSimilarityBuilder(top_k=1).build()
+
+    # Now closer to `service` than `similar` is, but `similar` still prefers `service`
+    pricey.price_per_unit = Decimal('505.00')
+    pricey.save()
+    ServiceSimilarityBuilder(top_k=1).build(service_ids=[pricey.id])
+
+    pairs = set(ServiceSimilarity.objects.values_list('service_a_id', 'service_b_id', 'similarity_score'))
+    assert (service.id, similar.id) in {(a, b) for a, b, score in pairs}
+    ServiceSimilarityBuilder(top_k=1).build()
+    assert pairs == set(ServiceSimilarity.objects.values_list('service_a_id', 'service_b_id', 'similarity_score'))
+
+
+@pytest.mark.django_db
+def test_since_hours_picks_up_edited_services(catalog):
+    service, similar, other = catalog
+    long_ago = timezone.now() - timedelta(days=2)
+    Service.objects.update(created_at=long_ago, updated_at=long_ago)
+    Professional.objects.update(updated_at=long_ago)
+
+    call_command('build_service_similarity', since_hours=1, stdout=StringIO())
+    assert not ServiceSimilarity.objects.exists()
+
+    similar.price_per_unit = Decimal('490.00')
+    similar.save()
+    call_command('build_service_similarity', since_hours=1, stdout=StringIO())
+
+    assert ServiceSimilarity.objects.filter(service_a=service, service_b=similar).exists()
+
+
+@pytest.mark.django_db
+def test_get_similar_services_reads_precomputed_rows(catalog, customer_profile, django_assert_num_queries):
+    service, similar, other = catalog
+    ServiceSimilarityBuilder().build()
+
+    engine = RecommendationEngine(customer_profile)
+    with django_assert_num_queries(1):
+        result = engine.get_similar_services(service.id)
+
+    assert result == [similar]
+
+
+@pytest.mark.django_db
+def test_co_booked_services_become_neighbours(catalog, booking):
+    service, similar, other = catalog
+    booking.status = 'COMPLETED'
+    booking.save()
+    Booking.objects.create(
+        customer=booking.customer,
+        professional=other.professional,
+        service=other,
+        scheduled_date=booking.scheduled_date,
+        scheduled_time=booking.scheduled_time,
+        address='123 Test Street',
+        city='Kabul',
+        estimated_price=Decimal('5000.00'),
+        status='COMPLETED'
+    )
+
+    ServiceSimilarityBuilder(threshold=0.2).build()
+
+    assert ServiceSimilarity.objects.filter(service_a=service, service_b=other).exists()
+    assert ServiceSimilarity.objects.filter(service_a=other, service_b=service).exists()
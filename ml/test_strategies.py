@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from django.urls import reverse
+
+from ml.models import MaterializedRecommendation
+from ml.recommendation_engine import ALGORITHM_VERSION, RecommendationEngine
+
+
+def _slow(self):
+    time.sleep(0.3)
+    return {1: 1.0}
+
+
+def _broken(self):
+    raise RuntimeError("boom")
+
+
+@pytest.mark.django_db
+def test_failing_strategy_is_skipped(customer_profile, service, monkeypatch):
+    monkeypatch.setattr(RecommendationEngine, '_location_based_services', _broken)
+    monkeypatch.setattr(RecommendationEngine, '_popularity_based_services', lambda self: {service.id: 1.0})
+
+    engine = RecommendationEngine(customer_profile)
+
+    assert engine.get_recommended_services() == [service]
+    assert engine.strategy_timings['location']['status'] == 'error'
+    assert engine.strategy_timings['popularity'] == {
+        'status': 'ok', 'ms': engine.strategy_timings['popularity']['ms'], 'candidates': 1
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_threaded_strategies_time_out(customer_profile, service, settings, monkeypatch):
+    settings.ML_SETTINGS = {
+        'STRATEGY_EXECUTION': 'threads',
+        'STRATEGY_TIMEOUTS': {'collaborative': 0.05},
+    }
+    monkeypatch.setattr(RecommendationEngine, '_collaborative_filtering_services', _slow)
+    monkeypatch.setattr(RecommendationEngine, '_popularity_based_services', lambda self: {service.id: 1.0})
+
+    engine = RecommendationEngine(customer_profile)
+    started = time.monotonic()
+    services = engine.get_recommended_services()
+
+    assert time.monotonic() - started < 0.3
+    assert services == [service]
+    assert engine.strategy_timings['collaborative']['status'] == 'timeout'
+    assert engine.strategy_results['collaborative'] == {}
+    assert {t['status'] for name, t in engine.strategy_timings.items() if name != 'collaborative'} == {'ok'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_busy_strategy_threads_skip_strategies(customer_profile, service, settings, monkeypatch):
+    settings.ML_SETTINGS = {
+        'STRATEGY_EXECUTION': 'threads',
+        'STRATEGY_WORKERS': 1,
+        'STRATEGY_TIMEOUTS': {'collaborative': 0.05},
+    }
+    monkeypatch.setattr(RecommendationEngine, '_collaborative_filtering_services', _slow)
+
+    engine = RecommendationEngine(customer_profile)
+    engine.get_recommended_services()
+
+    assert engine.strategy_timings['collaborative']['status'] == 'timeout'
+    assert {t['status'] for name, t in engine.strategy_timings.items() if name != 'collaborative'} == {'busy'}
+
+    # The thread is free again once the slow strategy returns
+    time.sleep(0.35)
+    settings.ML_SETTINGS = {**settings.ML_SETTINGS, 'STRATEGY_TIMEOUTS': {}}
+    engine = RecommendationEngine(customer_profile)
+    engine.get_recommended_services()
+
+    assert engine.strategy_timings['collaborative']['status'] == 'ok'
+
+
+@pytest.mark.django_db
+def test_strategy_timings_in_debug_meta(authenticated_client, settings):
+    url = reverse('recommended-services')
+
+    # The toolbar's URLs are only routed when DEBUG is set at startup
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('debug_toolbar')]
+    settings.DEBUG = True
+    response = authenticated_client.get(url)
+    assert set(response.data['meta']['strategies']) == {'collaborative', 'content', 'location', 'popularity'}
+    assert authenticated_client.get(url).data['meta'] == {'cached': True, 'materialized': False, 'strategies': {}}
+
+    settings.DEBUG = False
+    assert 'meta' not in authenticated_client.get(url).data
+
+
+@pytest.mark.django_db
+def test_debug_meta_reports_materialized_rows(authenticated_client, customer_profile, service, settings):
+    MaterializedRecommendation.objects.create(
+        customer=customer_profile, services=[service.id], top_n=20, algorithm_version=ALGORITHM_VERSION
+    )
+    settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if not m.startswith('debug_toolbar')]
+    settings.DEBUG = True
+
+    response = authenticated_client.get(reverse('recommended-services'))
+
+    assert response.data['meta'] == {'cached': False, 'materialized': True, 'strategies': {}}
@@ -0,0 +1,127 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from professional.models import ServiceCategory
+from service.models import Service
+from core.utils.location import normalize_city_key
+from ml.models import ServiceTrendBucket
+from ml.recommendation_engine import RecommendationEngine
+from ml.trending import get_trending_services, rebuild_trend_buckets
+
+
+def test_normalize_city_key():
+    assert normalize_city_key('  Mazar-i-Sharif ') == normalize_city_key('mazar-i-sharif')
+    assert normalize_city_key('New   York') == 'new york'
+    assert normalize_city_key(None) == ''
+
+
+@pytest.mark.django_db
+def test_bookings_update_trend_buckets(api_client, user, professional_user, customer_profile, service):
+    api_client.force_authenticate(user=user)
+    response = api_client.post(reverse('booking-list'), {
+        'service_id': service.id,
+        'scheduled_date': '2030-02-01',
+        'scheduled_time': '10:00:00',
+        'address': '123 Main St',
+        'city': ' KABUL',
+    }, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    booking_id = response.data['id']
+    # Pending bookings don't count
+    assert not ServiceTrendBucket.objects.exists()
+
+    api_client.force_authenticate(user=professional_user)
+    api_client.post(reverse('booking-accept', args=[booking_id]))
+    bucket = ServiceTrendBucket.objects.get(service=service)
+    assert (bucket.city_key, bucket.day, bucket.bookings) == ('kabul', timezone.localdate(), 1)
+    assert get_trending_services(city='Kabul') == [(service.id, 1.0)]
+
+    # A new city moves the booking to that city's bucket
+    api_client.force_authenticate(user=user)
+    response = api_client.patch(reverse('booking-detail', args=[booking_id]), {'city': 'Herat'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert dict(ServiceTrendBucket.objects.values_list('city_key', 'bookings')) == {'kabul': 0, 'herat': 1}
+
+    response = api_client.post(
+        reverse('booking-cancel', args=[booking_id]),
+        {'cancellation_reason': 'Changed my mind'}, format='json'
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert dict(ServiceTrendBucket.objects.values_list('city_key', 'bookings')) == {'kabul': 0, 'herat': 0}
+
+
+@pytest.mark.django_db
+def test_trending_scores_decay_and_are_cached(service, django_assert_num_queries):
+    older = Service.objects.create(
+        professional=service.professional,
+        category=ServiceCategory.objects.create(name='Gardening'),
+        title='Mow lawn',
+        pricing_type='FIXED',
+        price_per_unit=Decimal('300.00'),
+    )
+    today = timezone.localdate()
+    ServiceTrendBucket.objects.create(
+        service=service, category=service.category, city_key='kabul', day=today, bookings=2
+    )
+    ServiceTrendBucket.objects.create(
+        service=older, category=older.category, city_key='kabul', day=today - timedelta(days=7), bookings=3
+    )
+    ServiceTrendBucket.objects.create(
+        service=older, category=older.category, city_key='herat', day=today, bookings=1
+    )
+
+    assert get_trending_services(city='Kabul') == [(service.id, 2.0), (older.id, 1.5)]
+    assert get_trending_services(category_id=older.category_id) == [(older.id, 2.5)]
+
+    with django_assert_num_queries(0):
+        assert get_trending_services(city='kabul', limit=1) == [(service.id, 2.0)]
+
+
+@pytest.mark.django_db
+def test_popularity_strategy_reads_trending(booking, django_assert_num_queries):
+    booking.status = 'ACCEPTED'
+    booking.save()
+    rebuild_trend_buckets()
+    engine = RecommendationEngine(booking.customer)
+    engine._popularity_based_services()
+
+    with django_assert_num_queries(0):
+        scores = engine._popularity_based_services()
+
+    assert scores == {booking.service_id: pytest.approx(0.7)}  # rating 0
+
+
+@pytest.mark.django_db
+def test_trending_services_endpoint(authenticated_client, booking):
+    booking.status = 'COMPLETED'
+    booking.save()
+    rebuild_trend_buckets()
+
+    response = authenticated_client.get(reverse('trending-services'), {'city': 'kabul'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [s['id'] for s in response.data['trending_services']] == [booking.service_id]
+    response = authenticated_client.get(reverse('trending-services'), {'city': 'Herat'})
+    assert response.data['count'] == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_deletes_buckets_outside_the_window(booking, settings):
+    settings.ML_SETTINGS = {'TRENDING_WINDOW_DAYS': 30}
+    today = timezone.localdate()
+    for age in (30, 400):
+        ServiceTrendBucket.objects.create(
+            service=booking.service, category=booking.service.category,
+            city_key='kabul', day=today - timedelta(days=age), bookings=3
+        )
+
+    booking.status = 'ACCEPTED'
+    booking.save()
+    rebuild_trend_buckets()
+
+    assert list(ServiceTrendBucket.objects.values_list('day', 'bookings')) == [(today, 1)]
@@ -0,0 +1,67 @@
+import pytest
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def _booking_queries(context):
+    return [q['sql'] for q in context.captured_queries if 'booking_booking' in q['sql']]
+
+
+@pytest.mark.django_db
+def test_recommended_services_unauthenticated(api_client):
+    response = api_client.get(reverse('recommended-services'))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_recommended_services_requires_customer(professional_client):
+    response = professional_client.get(reverse('recommended-services'))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_recommended_services_are_cached(authenticated_client, service):
+    url = reverse('recommended-services')
+
+    with CaptureQueriesContext(connection) as first:
+        response = authenticated_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert _booking_queries(first)
+
+    with CaptureQueriesContext(connection) as second:
+        cached = authenticated_client.get(url)
+    assert cached.data == response.data
+    assert not _booking_queries(second)
+
+
+@pytest.mark.django_db
+def test_new_booking_invalidates_cached_recommendations(authenticated_client, service):
+    url = reverse('recommended-services')
+    authenticated_client.get(url)
+
+    response = authenticated_client.post(reverse('booking-list'), {
+        'service_id': service.id,
+        'scheduled_date': '2030-02-01',
+        'scheduled_time': '10:00:00',
+        'address': '123 Main St',
+        'city': 'Kabul',
+    }, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+
+    with CaptureQueriesContext(connection) as context:
+        authenticated_client.get(url)
+    assert _booking_queries(context)
+
+
+@pytest.mark.django_db
+def test_cache_is_keyed_by_limit(authenticated_client):
+    url = reverse('recommended-categories')
+    authenticated_client.get(url, {'limit': 5})
+
+    with CaptureQueriesContext(connection) as context:
+        authenticated_client.get(url, {'limit': 3})
+    assert _booking_queries(context)
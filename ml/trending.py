@@ -0,0 +1,148 @@
+"""
+Trending services from daily booking buckets.
+
+A booking adds one to its (service, city, creation day) ServiceTrendBucket
+when it is accepted and takes it back if it is cancelled (see
+ml/recievers.py), so, as before the buckets existed, accepted, in-progress
+and completed bookings count and nothing scans the bookings table at
+request time. A booking whose city is edited moves to the new city's
+bucket.
+Scores decay exponentially with the bucket's age, and the top
+TRENDING_TOP_N per city and category are cached for TRENDING_CACHE_TIMEOUT
+seconds. Buckets older than TRENDING_WINDOW_DAYS are deleted by the
+rebuild_trending job.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from booking.models import Booking
+from core.utils.location import normalize_city_key
+from .conf import ml_setting
+from .models import ServiceTrendBucket
+
+
+# Bookings in these statuses count towards trending
+COUNTED_STATUSES = ('ACCEPTED', 'IN_PROGRESS', 'COMPLETED')
+
+
+def record_booking(booking, delta=1):
+    """Add `delta` bookings to the bucket for the booking's service, city and day."""
+    filters = {
+        'service_id': booking.service_id,
+        'city_key': normalize_city_key(booking.city),
+        'day': timezone.localdate(booking.created_at),
+    }
+    buckets = ServiceTrendBucket.objects.filter(**filters)
+
+    if buckets.update(bookings=F('bookings') + delta) or delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            ServiceTrendBucket.objects.create(
+                category_id=booking.service.category_id, bookings=delta, **filters
+            )
+    except IntegrityError:
+        # Created concurrently
+        buckets.update(bookings=F('bookings') + delta)
+
+
+def rebuild_trend_buckets():
+    """
+    Recreate the buckets inside the trending window from bookings and
+    delete the older ones, which are never read.
+    """
+    since = timezone.localdate() - timedelta(days=ml_setting('TRENDING_WINDOW_DAYS'))
+
+    rows = Booking.objects.filter(
+        created_at__date__gt=since
+    ).filter(
+        status__in=COUNTED_STATUSES
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'service_id', 'service__category_id', 'city', 'day'
+    ).annotate(count=Count('id')).order_by()
+
+    buckets = {}
+    for row in rows:
+        key = (row['service_id'], normalize_city_key(row['city']), row['day'])
+        if key not in buckets:
+            buckets[key] = ServiceTrendBucket(
+                service_id=key[0], category_id=row['service__category_id'],
+                city_key=key[1], day=key[2], bookings=0
+            )
+        buckets[key].bookings += row['count']
+
+    with transaction.atomic():
+        ServiceTrendBucket.objects.all().delete()
+        ServiceTrendBucket.objects.bulk_create(buckets.values(), batch_size=1000)
+
+    return len(buckets)
+
+
+def _cache_key(city_key, category_id):
+    return f"ml:trending:{city_key.replace(' ', '_')}:{category_id or ''}"
+
+
+def _compute_trending(city_key, category_id):
+    today = timezone.localdate()
+    buckets = ServiceTrendBucket.objects.filter(
+        day__gt=today - timedelta(days=ml_setting('TRENDING_WINDOW_DAYS')),
+        bookings__gt=0
+    )
+    if city_key:
+        buckets = buckets.filter(city_key=city_key)
+    if category_id:
+        buckets = buckets.filter(category_id=category_id)
+
+    rows = list(buckets.values_list('service_id', 'day', 'bookings'))
+    if not rows:
+        return []
+
+    service_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    ages = np.array([(today - row[1]).days for row in rows], dtype=np.float64)
+    counts = np.array([row[2] for row in rows], dtype=np.float64)
+
+    decayed = counts * 0.5 ** (ages / ml_setting('TRENDING_HALF_LIFE_DAYS'))
+    ids, inverse = np.unique(service_ids, return_inverse=True)
+    scores = np.bincount(inverse, weights=decayed)
+
+    top = np.argsort(-scores, kind='stable')[:ml_setting('TRENDING_TOP_N')]
+    return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def get_trending_services(city=None, category_id=None, limit=None):
+    """
+    Top trending services as [(service_id, score), ...], best first,
+    optionally restricted to a city and/or category.
+    """
+    city_key = normalize_city_key(city)
+    key = _cache_key(city_key, category_id)
+
+    trending = cache.get(key)
+    if trending is None:
+        trending = _compute_trending(city_key, category_id)
+        cache.set(key, trending, ml_setting('TRENDING_CACHE_TIMEOUT'))
+
+    return trending[:limit] if limit else trending
+
+
+def move_booking_in_trending(booking, old_status, new_status):
+    """Count or uncount the booking as it enters or leaves COUNTED_STATUSES."""
+    delta = (new_status in COUNTED_STATUSES) - (old_status in COUNTED_STATUSES)
+    if delta:
+        record_booking(booking, delta)
+
+
+def relocate_booking_in_trending(stored, booking):
+    """Move a counted booking to its new city's bucket after an edit."""
+    if (stored.status in COUNTED_STATUSES and
+            normalize_city_key(stored.city) != normalize_city_key(booking.city)):
+        record_booking(stored, -1)
+        record_booking(booking, 1)
@@ -4,10 +4,15 @@ from .views import (
     RecommendedProfessionalsView,
     RecommendedCategoriesView,
     SimilarServicesView,
+    AlsoViewedServicesView,
+    TrendingServicesView,
+    InteractionIngestView,
     SuggestedCategoriesForProfessionalView,
     PricingSuggestionView,
     CancellationRiskView,
+    CancellationRiskBatchView,
     DemandForecastView,
+    DemandForecastBatchView,
     PeakHoursView
 )
 
@@ -33,6 +38,23 @@ urlpatterns = [
         SimilarServicesView.as_view(),
         name='similar-services'
     ),
+    path(
+        'recommendations/services/<int:service_id>/also-viewed/',
+        AlsoViewedServicesView.as_view(),
+        name='also-viewed-services'
+    ),
+    path(
+        'recommendations/services/trending/',
+        TrendingServicesView.as_view(),
+        name='trending-services'
+    ),
+
+    # Interaction tracking
+    path(
+        'interactions/',
+        InteractionIngestView.as_view(),
+        name='interactions'
+    ),
 
     # Professional Recommendations
     path(
@@ -52,11 +74,21 @@ urlpatterns = [
         CancellationRiskView.as_view(),
         name='cancellation-risk'
     ),
+    path(
+        'analytics/cancellation-risk/batch/',
+        CancellationRiskBatchView.as_view(),
+        name='cancellation-risk-batch'
+    ),
     path(
         'analytics/demand-forecast/',
         DemandForecastView.as_view(),
         name='demand-forecast'
     ),
+    path(
+        'analytics/demand-forecast/batch/',
+        DemandForecastBatchView.as_view(),
+        name='demand-forecast-batch'
+    ),
     path(
         'analytics/peak-hours/',
         PeakHoursView.as_view(),
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -9,12 +11,23 @@ from .recommendation_engine import (
     ProfessionalRecommendationEngine
 )
 from .predictive_analytics import CancellationRiskPredictor, DemandForecaster
+from .ingestion import EVENT_TYPE_CODES, TARGET_TYPE_CODES, interaction_buffer
+from .models import InteractionEvent
+from .conf import ml_setting
+from .recommendation_cache import cached_recommendations
+from .materialized import materialized_recommendations
+from .trending import get_trending_services
+from .forecasting import series_key
 from .serializers import (
     ServiceRecommendationSerializer,
     ProfessionalRecommendationSerializer,
     CategoryRecommendationSerializer,
     CancellationRiskSerializer,
+    CancellationRiskBatchSerializer,
+    BookingCancellationRiskSerializer,
+    InteractionBatchSerializer,
     DemandForecastSerializer,
+    DemandForecastBatchSerializer,
     PeakHoursSerializer,
     PricingSuggestionSerializer
 )
@@ -41,7 +54,7 @@ class RecommendedServicesView(APIView):
             )
 
         try:
-            customer = request.user.customerprofile
+            customer = request.user.customer_profile
         except:
             return Response(
                 {"error": "Customer profile not found."},
@@ -49,16 +62,31 @@ class RecommendedServicesView(APIView):
             )
 
         limit = int(request.query_params.get('limit', 10))
+        meta = {"cached": True, "materialized": False, "strategies": {}}
+
+        def compute():
+            meta["cached"] = False
+            services = materialized_recommendations(customer.id, 'services', limit)
+            if services is None:
+                engine = RecommendationEngine(customer)
+                services = engine.get_recommended_services(limit=limit)
+                meta["strategies"] = engine.strategy_timings
+            else:
+                meta["materialized"] = True
+            return list(ServiceRecommendationSerializer(services, many=True).data)
+
+        recommendations = cached_recommendations(
+            customer.id, 'services', {'limit': limit}, compute
+        )
 
-        engine = RecommendationEngine(customer)
-        services = engine.get_recommended_services(limit=limit)
-
-        serializer = ServiceRecommendationSerializer(services, many=True)
+        data = {
+            "count": len(recommendations),
+            "recommendations": recommendations
+        }
+        if settings.DEBUG:
+            data["meta"] = meta
 
-        return Response({
-            "count": len(services),
-            "recommendations": serializer.data
-        })
+        return Response(data)
 
 
 
@@ -80,7 +108,7 @@ class RecommendedProfessionalsView(APIView):
             )
 
         try:
-            customer = request.user.customerprofile
+            customer = request.user.customer_profile
         except:
             return Response(
                 {"error": "Customer profile not found."},
@@ -90,17 +118,27 @@ class RecommendedProfessionalsView(APIView):
         category_id = request.query_params.get('category_id')
         limit = int(request.query_params.get('limit', 10))
 
-        engine = RecommendationEngine(customer)
-        professionals = engine.get_recommended_professionals(
-            category_id=category_id,
-            limit=limit
+        def compute():
+            # Only the unfiltered list is materialized
+            professionals = None
+            if not category_id:
+                professionals = materialized_recommendations(customer.id, 'professionals', limit)
+            if professionals is None:
+                engine = RecommendationEngine(customer)
+                professionals = engine.get_recommended_professionals(
+                    category_id=category_id,
+                    limit=limit
+                )
+            return list(ProfessionalRecommendationSerializer(professionals, many=True).data)
+
+        recommendations = cached_recommendations(
+            customer.id, 'professionals',
+            {'limit': limit, 'category_id': category_id}, compute
         )
 
-        serializer = ProfessionalRecommendationSerializer(professionals, many=True)
-
         return Response({
-            "count": len(professionals),
-            "recommendations": serializer.data
+            "count": len(recommendations),
+            "recommendations": recommendations
         })
 
 
@@ -121,7 +159,7 @@ class RecommendedCategoriesView(APIView):
             )
 
         try:
-            customer = request.user.customerprofile
+            customer = request.user.customer_profile
         except:
             return Response(
                 {"error": "Customer profile not found."},
@@ -130,14 +168,20 @@ class RecommendedCategoriesView(APIView):
 
         limit = int(request.query_params.get('limit', 5))
 
-        engine = RecommendationEngine(customer)
-        categories = engine.get_recommended_categories(limit=limit)
+        def compute():
+            categories = materialized_recommendations(customer.id, 'categories', limit)
+            if categories is None:
+                engine = RecommendationEngine(customer)
+                categories = engine.get_recommended_categories(limit=limit)
+            return list(CategoryRecommendationSerializer(categories, many=True).data)
 
-        serializer = CategoryRecommendationSerializer(categories, many=True)
+        recommendations = cached_recommendations(
+            customer.id, 'categories', {'limit': limit}, compute
+        )
 
         return Response({
-            "count": len(categories),
-            "recommendations": serializer.data
+            "count": len(recommendations),
+            "recommendations": recommendations
         })
 
 
@@ -152,7 +196,7 @@ class SimilarServicesView(APIView):
 
     def get(self, request, service_id):
         try:
-            customer = request.user.customerprofile
+            customer = request.user.customer_profile
         except:
             return Response(
                 {"error": "Customer profile not found."},
@@ -172,6 +216,111 @@ class SimilarServicesView(APIView):
         })
 
 
+class AlsoViewedServicesView(APIView):
+    """
+    GET /api/ml/recommendations/services/{service_id}/also-viewed/
+
+    Get services viewed in the same sessions as a given service.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, service_id):
+        try:
+            customer = request.user.customer_profile
+        except:
+            return Response(
+                {"error": "Customer profile not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        limit = int(request.query_params.get('limit', 5))
+
+        engine = RecommendationEngine(customer)
+        services = engine.get_also_viewed_services(service_id, limit=limit)
+
+        serializer = ServiceRecommendationSerializer(services, many=True)
+
+        return Response({
+            "count": len(services),
+            "also_viewed": serializer.data
+        })
+
+
+class TrendingServicesView(APIView):
+    """
+    GET /api/ml/recommendations/services/trending/
+    GET /api/ml/recommendations/services/trending/?city=Kabul&category_id=1
+
+    Get the services with the most recent bookings, optionally per city
+    and category.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        city = request.query_params.get('city')
+        category_id = request.query_params.get('category_id')
+        limit = int(request.query_params.get('limit', 10))
+
+        trending = get_trending_services(
+            city=city,
+            category_id=int(category_id) if category_id else None
+        )
+
+        services = Service.objects.filter(
+            id__in=[service_id for service_id, _ in trending],
+            is_active=True,
+            professional__is_active=True,
+            professional__verification_status='VERIFIED'
+        ).select_related('professional__user', 'category').in_bulk()
+
+        # Preserve trending order
+        services = [services[service_id] for service_id, _ in trending if service_id in services]
+        services = services[:limit]
+
+        serializer = ServiceRecommendationSerializer(services, many=True)
+
+        return Response({
+            "count": len(services),
+            "trending_services": serializer.data
+        })
+
+
+class InteractionIngestView(APIView):
+    """
+    POST /api/ml/interactions/
+
+    Record a batch of view/search/bookmark events for the authenticated user.
+    Events are buffered and written in the background (see ml/ingestion.py).
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = InteractionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        now = timezone.now()
+        events = [
+            InteractionEvent(
+                user_id=request.user.id,
+                event_type=EVENT_TYPE_CODES[event['type']],
+                target_type=TARGET_TYPE_CODES[event['target']],
+                object_id=event['object_id'],
+                session_id=event['session_id'],
+                created_at=min(event.get('occurred_at') or now, now),
+            )
+            for event in serializer.validated_data['events']
+        ]
+        interaction_buffer.add(events)
+
+        return Response(
+            {"accepted": len(events)},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
 # PROFESSIONAL RECOMMENDATION ENDPOINTS
 
 
@@ -192,7 +341,7 @@ class SuggestedCategoriesForProfessionalView(APIView):
             )
 
         try:
-            professional = request.user.professional
+            professional = request.user.professional_profile
         except:
             return Response(
                 {"error": "Professional profile not found."},
@@ -226,7 +375,7 @@ class PricingSuggestionView(APIView):
             )
 
         try:
-            professional = request.user.professional
+            professional = request.user.professional_profile
             service = Service.objects.get(id=service_id, professional=professional)
         except Service.DoesNotExist:
             return Response(
@@ -289,6 +438,56 @@ class CancellationRiskView(APIView):
         return Response(serializer.data)
 
 
+class CancellationRiskBatchView(APIView):
+    """
+    POST /api/ml/analytics/cancellation-risk/batch/
+
+    Get cancellation risk predictions for many bookings at once. Without
+    booking_ids, scores the user's pending bookings.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CancellationRiskBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        booking_ids = serializer.validated_data.get('booking_ids')
+
+        # Only the user's own bookings
+        user = request.user
+        bookings = Booking.objects.all()
+        if user.role == 'customer':
+            bookings = bookings.filter(customer__user=user)
+        elif user.role == 'professional':
+            bookings = bookings.filter(professional__user=user)
+        elif booking_ids is None:
+            return Response(
+                {"error": "booking_ids is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if booking_ids is None:
+            bookings = bookings.filter(status='PENDING').order_by('scheduled_date', 'scheduled_time')
+        else:
+            bookings = bookings.filter(id__in=booking_ids)
+        bookings = list(bookings[:ml_setting('RISK_BATCH_MAX')])
+
+        predictor = CancellationRiskPredictor()
+        risks = predictor.predict_risk_many(bookings)
+
+        results = BookingCancellationRiskSerializer(
+            [{'booking_id': booking.id, **risks[booking.id]} for booking in bookings],
+            many=True
+        ).data
+
+        found = {booking.id for booking in bookings}
+        return Response({
+            "count": len(results),
+            "results": results,
+            "not_found": [booking_id for booking_id in booking_ids or [] if booking_id not in found]
+        })
+
+
 class DemandForecastView(APIView):
     """
     GET /api/ml/analytics/demand-forecast/
@@ -320,6 +519,49 @@ class DemandForecastView(APIView):
         })
     
 
+class DemandForecastBatchView(APIView):
+    """
+    POST /api/ml/analytics/demand-forecast/batch/
+
+    Get demand forecasts for many category and city series at once, from
+    their fitted models (see ml/forecasting.py).
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = DemandForecastBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        series = [
+            (item['category_id'], item['city'])
+            for item in serializer.validated_data['series']
+        ]
+
+        forecaster = DemandForecaster()
+        forecasts = forecaster.get_demand_forecasts(
+            series,
+            days_ahead=serializer.validated_data['days']
+        )
+
+        results, not_found = [], []
+        for category_id, city in series:
+            key = series_key(category_id, city)
+            if key in forecasts:
+                results.append({
+                    "category_id": category_id,
+                    "city": city,
+                    "forecasts": DemandForecastSerializer(forecasts[key], many=True).data
+                })
+            else:
+                not_found.append({"category_id": category_id, "city": city})
+
+        return Response({
+            "count": len(results),
+            "results": results,
+            "not_found": not_found
+        })
+
+
 class PeakHoursView(APIView):
     """
     GET /api/ml/analytics/peak-hours/
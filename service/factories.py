@@ -2,7 +2,6 @@ import factory
 from factory.django import DjangoModelFactory
 from .models import Service, ServiceCategory
 from professional.factories import ProfessionalFactory
-from customer.factories import CustomerFactory
 from faker import Faker
     
 fake = Faker()
@@ -12,7 +12,7 @@ from django.db.models import Q
 
 from django.db import transaction
 
-from core.utils.location import get_bounding_box, haversine_distance
+from core.utils.spatial_index import get_professional_index
 from .permissions import IsProfessionalOwnerOrIsAdmin, IsAdminUserOrProfessionalOwner
 from .serializers import AdminServiceSerializer, ProfessionalServiceSerializer
 from .filters import ServiceFilter
@@ -147,29 +147,18 @@ class ServiceViewSet(ModelViewSet):
                 user_lat = float(lat)
                 user_lng = float(lng)
 
-                min_lat, max_lat, min_lng, max_lng = get_bounding_box(user_lat, user_lng, radius)
-        
-                queryset = queryset.filter(
-                    professional__latitude__gte=min_lat,
-                    professional__latitude__lte=max_lat,
-                    professional__longitude__gte=min_lng,
-                    professional__longitude__lte=max_lng,
-                ).exclude(
-                    professional__latitude__isnull=True,
-                ).exclude(
-                    professional__longitude__isnull=True,
+                professional_ids, distances = get_professional_index().within_radius(
+                    user_lat, user_lng, radius
                 )
+                distance_by_professional = dict(zip(professional_ids.tolist(), distances.tolist()))
+
+                queryset = queryset.filter(professional_id__in=distance_by_professional)
 
                 for service in queryset:
-                    prof_lat = float(service.professional.latitude)
-                    prof_lng = float(service.professional.longitude)
-                    distance = haversine_distance(user_lat, user_lng, prof_lat, prof_lng)
-
-                    if distance <= radius:
-                        result.append({
-                            'service': service,
-                            'distance_km': distance,
-                        })
+                    result.append({
+                        'service': service,
+                        'distance_km': distance_by_professional[service.professional_id],
+                    })
             except ValueError:
                 return Response(
                     {"message": "Invalid latitude or longitude"},
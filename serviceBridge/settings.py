@@ -101,13 +101,28 @@ DATABASES = {
 
 
 # Cache configuration for authentication sessions
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 900,  # 15 minutes
+# The ML caches (recommendation generation tokens and locks, and the version
+# keys that tell each worker to reload its feature table, spatial index and
+# co-occurrence matrix) only work across workers with a shared cache, so
+# production must set REDIS_URL. LocMemCache is per process and only meant
+# for development and tests.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 900,  # 15 minutes
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': 900,  # 15 minutes
+        }
     }
-}
 
 
 # Password validation